@@ -0,0 +1,73 @@
+"""Benchmark: input tokens per row and branch recall of candidate-branch retrieval.
+
+For each K, every row of the fixed evaluation set (benchmarks/data/eval_set_lt.csv) is
+routed to its top-K decision-tree branches. Tokens are estimated from the resulting
+messages (estimate_tokens). Branch recall is the share of rows whose labelled category
+is still present in the prompt: a row whose branch was pruned cannot be categorized
+correctly, so recall bounds the accuracy after pruning. Rows labelled Unknown always
+count as recalled, since the Unknown escape is never pruned.
+
+Run with:
+    uv run python -m benchmarks.bench_branch_retrieval
+"""
+
+import csv
+import time
+from pathlib import Path
+
+from src.branch_retrieval import get_branch_retriever
+from src.category_tree import load_category_tree
+from src.csv_service import extract_product_input
+from src.llm_service import build_categorization_messages, estimate_tokens
+
+EVAL_SET_PATH = Path(__file__).parent / "data" / "eval_set_lt.csv"
+TOP_KS = [0, 1, 2, 3]  # 0 sends the full tree
+
+
+def main() -> None:
+    """Report tokens per row, branch recall and pruning rate for each K."""
+    with EVAL_SET_PATH.open(encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    products = [extract_product_input(row) for row in rows]
+    groups = {node.category_id: node.group for node in load_category_tree("lt")}
+    retriever = get_branch_retriever("lt")
+
+    print(f"Rows: {len(rows)}")
+    print(
+        f"{'K':>4} | {'input tok/row':>13} | {'vs full':>7} | {'branch recall':>13} | {'pruned':>6}"
+    )
+    full_tokens = 0.0
+    for top_k in TOP_KS:
+        tokens = 0
+        recalled = 0
+        pruned = 0
+        for row, product in zip(rows, products, strict=True):
+            tokens += estimate_tokens(
+                build_categorization_messages(product, "lt", branch_top_k=top_k)
+            )
+            branches = (
+                retriever.select(product.program_name, product.program_description, top_k)
+                if top_k
+                else None
+            )
+            pruned += branches is not None
+            expected = row["expected_category"]
+            recalled += branches is None or expected == "Unknown" or groups[expected] in branches
+        per_row = tokens / len(rows)
+        full_tokens = full_tokens or per_row
+        print(
+            f"{top_k or 'full':>4} | {per_row:>13.0f} | {per_row / full_tokens:>7.0%} | "
+            f"{recalled / len(rows):>13.0%} | {pruned / len(rows):>6.0%}"
+        )
+
+    started = time.perf_counter()
+    rounds = 1_000
+    for _ in range(rounds):
+        for product in products:
+            retriever.select(product.program_name, product.program_description, 2)
+    per_row_us = (time.perf_counter() - started) / (rounds * len(products)) * 1e6
+    print(f"Retrieval latency: {per_row_us:.1f} us/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark: per-chunk read cost of read_csv_chunk vs. CsvChunkReader.
+
+read_csv_chunk re-parses the file from the top for every chunk, so its per-chunk
+cost grows with file size. CsvChunkReader keeps one reader open and should stay flat.
+
+Run with:
+    uv run python -m benchmarks.bench_csv_reader
+"""
+
+import csv
+import tempfile
+import time
+from pathlib import Path
+
+from src.config import CSV_BATCH_SIZE
+from src.csv_service import CsvChunkReader, read_csv_chunk
+
+ROW_COUNTS = [2_000, 8_000, 32_000]
+OFFSET_SCAN_MAX_ROWS = 8_000  # read_csv_chunk is quadratic; skip it on larger files
+
+
+def write_sample_csv(path: Path, rows: int) -> None:
+    """Write a synthetic supplier export with the required columns."""
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ProgramName", "ProgramDescription", "About_Place", "ExtraCol"])
+        for idx in range(rows):
+            writer.writerow(
+                [
+                    f"SPA procedura {idx}",
+                    "Atpalaiduojantis masazas ir SPA ritualai dviem asmenims. " * 4,
+                    "Vilnius",
+                    f"extra-{idx}",
+                ]
+            )
+
+
+def bench_offset_scan(path: Path, rows: int) -> float:
+    """Return mean seconds per chunk using read_csv_chunk."""
+    start = time.perf_counter()
+    chunks = 0
+    for offset in range(0, rows, CSV_BATCH_SIZE):
+        read_csv_chunk(path, offset, CSV_BATCH_SIZE, "utf-8")
+        chunks += 1
+    return (time.perf_counter() - start) / chunks
+
+
+def bench_streaming(path: Path) -> float:
+    """Return mean seconds per chunk using CsvChunkReader."""
+    start = time.perf_counter()
+    chunks = 0
+    with CsvChunkReader(path, "utf-8", CSV_BATCH_SIZE) as reader:
+        for _ in reader:
+            chunks += 1
+    return (time.perf_counter() - start) / chunks
+
+
+def main() -> None:
+    """Run the benchmark and print per-chunk cost for each file size."""
+    print(f"{'rows':>8} | {'offset scan µs/chunk':>22} | {'streaming µs/chunk':>20}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in ROW_COUNTS:
+            path = Path(tmp) / f"bench_{rows}.csv"
+            write_sample_csv(path, rows)
+            streaming = bench_streaming(path) * 1e6
+            if rows <= OFFSET_SCAN_MAX_ROWS:
+                offset_scan = f"{bench_offset_scan(path, rows) * 1e6:22.1f}"
+            else:
+                offset_scan = f"{'skipped':>22}"
+            print(f"{rows:>8} | {offset_scan} | {streaming:20.1f}")
+
+
+if __name__ == "__main__":
+    main()
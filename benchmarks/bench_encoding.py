@@ -0,0 +1,80 @@
+"""Benchmark: encoding detection and decoding of a 500 MB export with a stray cp1252 row.
+
+The file is UTF-8 except for one cp1252-encoded row near the end, well past the
+detection sample. The old approach (text-mode reading with the detected encoding)
+reads almost the whole file and then fails; CsvChunkReader decodes the row with the
+fallback encoding and finishes. Both are timed over a clean UTF-8 file of the same
+size as well, to show the cost of decoding line by line from a binary stream.
+
+Run with:
+    uv run python -m benchmarks.bench_encoding
+"""
+
+import csv
+import tempfile
+import time
+from pathlib import Path
+
+from src.config import CSV_BATCH_SIZE
+from src.csv_service import CsvChunkReader, detect_encoding
+
+FILE_BYTES = 500 * 1024 * 1024
+STRAY_ROW = "Kavos degustacija,Café su desertu,Vilnius\n".encode("cp1252")
+
+
+def write_sample_csv(path: Path, size: int, stray_row: bytes | None) -> None:
+    """Write a UTF-8 export of about `size` bytes, with `stray_row` near its end."""
+    row = "SPA procedūra dviem,Atpalaiduojantis masažas ir SPA ritualai,Kaunas\n".encode()
+    block = row * 10_000
+    with path.open("wb") as f:
+        f.write(b"ProgramName,ProgramDescription,About_Place\n")
+        for _ in range(size // len(block)):
+            f.write(block)
+        if stray_row is not None:
+            f.write(stray_row)
+        f.write(block)
+
+
+def read_text_mode(path: Path, encoding: str) -> int:
+    """Read every row the way the reader did before DecodedLines; return the row count."""
+    with path.open(encoding=encoding, newline="") as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+
+def read_chunk_reader(path: Path, encoding: str) -> int:
+    """Read every row with CsvChunkReader; return the row count."""
+    with CsvChunkReader(path, encoding, CSV_BATCH_SIZE) as reader:
+        return sum(len(rows) for rows in reader)
+
+
+def timed(label: str, path: Path, encoding: str, read: object) -> None:
+    """Print the outcome and duration of reading the whole file."""
+    assert callable(read)
+    started = time.perf_counter()
+    try:
+        outcome = f"{read(path, encoding)} rows"
+    except UnicodeDecodeError as e:
+        outcome = f"failed at byte {e.start} of its buffer"
+    print(f"  {label:<22} {time.perf_counter() - started:7.2f} s  {outcome}")
+
+
+def main() -> None:
+    """Run detection and a full read over a clean and a mixed-encoding file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, stray_row in (("clean", None), ("stray cp1252 row", STRAY_ROW)):
+            path = Path(tmp) / "bench.csv"
+            write_sample_csv(path, FILE_BYTES, stray_row)
+            size_mb = path.stat().st_size / 1024 / 1024
+
+            started = time.perf_counter()
+            encoding = detect_encoding(path)
+            detect_ms = (time.perf_counter() - started) * 1e3
+            print(f"{name}: {size_mb:.0f} MB, detected {encoding} in {detect_ms:.1f} ms")
+
+            timed("text mode", path, encoding, read_text_mode)
+            timed("CsvChunkReader", path, encoding, read_chunk_reader)
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark: local keyword index hit rate, agreement and latency on a labelled sample.
+
+The sample (benchmarks/data/keyword_sample_lt.csv) holds product rows with the category
+the model is expected to choose. A row is a local hit when the index answers it without
+the model; agreement is the share of hits whose category matches the label.
+
+Run with:
+    uv run python -m benchmarks.bench_keyword_index
+"""
+
+import csv
+import time
+from pathlib import Path
+
+from src.csv_service import extract_product_input
+from src.keyword_index import KeywordIndex
+
+SAMPLE_PATH = Path(__file__).parent / "data" / "keyword_sample_lt.csv"
+LATENCY_ROUNDS = 2_000
+
+
+def main() -> None:
+    """Report local-hit rate, agreement with the labels and per-row latency."""
+    started = time.perf_counter()
+    index = KeywordIndex.for_language("lt")
+    build_ms = (time.perf_counter() - started) * 1000
+
+    with SAMPLE_PATH.open(encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    products = [extract_product_input(row) for row in rows]
+
+    hits = 0
+    agreements = 0
+    for row, product in zip(rows, products, strict=True):
+        match = index.match(product)
+        if match is None:
+            continue
+        hits += 1
+        agrees = match.category == row["expected_category"]
+        agreements += agrees
+        if not agrees:
+            print(
+                f"  disagree: {product.program_name!r} -> {match.category}, "
+                f"expected {row['expected_category']}"
+            )
+
+    started = time.perf_counter()
+    for _ in range(LATENCY_ROUNDS):
+        for product in products:
+            index.match(product)
+    per_row_us = (time.perf_counter() - started) / (LATENCY_ROUNDS * len(products)) * 1e6
+
+    print(f"Index: {len(index)} phrases, built in {build_ms:.1f} ms")
+    print(f"Rows: {len(rows)}")
+    print(f"Local hits: {hits} ({hits / len(rows):.0%})")
+    print(f"Agreement on hits: {agreements}/{hits} ({agreements / max(hits, 1):.0%})")
+    print(f"Latency: {per_row_us:.1f} us/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark: local language identification accuracy and latency on a labelled sample.
+
+The sample (benchmarks/data/language_sample.csv) mixes Lithuanian, Latvian and Polish
+product rows, some typed without diacritics. Rows the identifier leaves unknown fall
+back to the file language while processing, so they are reported separately.
+
+Run with:
+    uv run python -m benchmarks.bench_language_id
+"""
+
+import csv
+import time
+from pathlib import Path
+
+from src.csv_service import extract_product_input
+from src.language_id import get_language_identifier, identify_product_language
+
+SAMPLE_PATH = Path(__file__).parent / "data" / "language_sample.csv"
+LATENCY_ROUNDS = 2_000
+
+
+def main() -> None:
+    """Report accuracy, unknown share and per-row latency."""
+    started = time.perf_counter()
+    get_language_identifier()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    with SAMPLE_PATH.open(encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    products = [extract_product_input(row) for row in rows]
+
+    correct = 0
+    unknown = 0
+    for row, product in zip(rows, products, strict=True):
+        language = identify_product_language(product)
+        if language == "unknown":
+            unknown += 1
+        elif language == row["language"]:
+            correct += 1
+        else:
+            print(f"  wrong: {product.program_name!r} -> {language}, expected {row['language']}")
+
+    started = time.perf_counter()
+    for _ in range(LATENCY_ROUNDS):
+        for product in products:
+            identify_product_language(product)
+    per_row_us = (time.perf_counter() - started) / (LATENCY_ROUNDS * len(products)) * 1e6
+
+    print(f"Model trained in {build_ms:.1f} ms")
+    print(f"Rows: {len(rows)}")
+    print(f"Correct: {correct} ({correct / len(rows):.0%})")
+    print(f"Unknown (file language fallback): {unknown}")
+    print(f"Latency: {per_row_us:.1f} us/row")
+
+
+if __name__ == "__main__":
+    main()
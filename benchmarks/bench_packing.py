@@ -0,0 +1,113 @@
+"""Benchmark: input tokens per row and quota-bound rows per minute by pack size K.
+
+Tokens are estimated from the real prompts (estimate_tokens); throughput is the lower
+of the RPM- and TPM-bound rates for the gpt-5-nano tier limits, so it reflects which
+limit binds at each K. Both single and packed prompts use the same PROMPT_BRANCH_TOP_K
+pruning, so every K is compared like with like. A simulated client also measures wall-clock rows per second
+with a latency that grows with output size.
+
+Run with:
+    uv run python -m benchmarks.bench_packing
+"""
+
+import asyncio
+import json
+import time
+from typing import Any
+from unittest.mock import AsyncMock, Mock
+
+from src.llm_service import (
+    ProductInput,
+    build_categorization_messages,
+    build_packed_messages,
+    categorize_packed_async,
+    estimate_tokens,
+)
+
+PACK_SIZES = [1, 2, 5, 10, 20]
+ROWS = 200
+RPM_LIMIT = 500  # gpt-5-nano, tier 1
+TPM_LIMIT = 200_000  # gpt-5-nano, tier 1
+OUTPUT_TOKENS_PER_ROW = 45  # One-sentence comment plus category
+BASE_LATENCY_SECONDS = 0.02
+LATENCY_PER_ROW_SECONDS = 0.004
+
+
+def sample_products(count: int) -> list[ProductInput]:
+    """Build products with realistic description lengths."""
+    return [
+        ProductInput(
+            program_name=f"SPA ritualas dviem Nr. {idx}",
+            program_description=(
+                "Atpalaiduojantis viso kūno masažas su aromatiniais aliejais, pirties ritualas "
+                "ir arbatos degustacija jaukioje SPA erdvėje. Trukmė 2 val. "
+            )
+            * 3,
+            about_place="Vilnius, Gedimino pr. 1",
+        )
+        for idx in range(count)
+    ]
+
+
+def input_tokens_per_row(products: list[ProductInput], pack_size: int) -> float:
+    """Return estimated input tokens per row for a pack size."""
+    if pack_size == 1:
+        total = sum(
+            estimate_tokens(build_categorization_messages(product, "lt")) for product in products
+        )
+        return total / len(products)
+    packs = [products[idx : idx + pack_size] for idx in range(0, len(products), pack_size)]
+    total = sum(estimate_tokens(build_packed_messages(pack, "lt")) for pack in packs)
+    return total / len(products)
+
+
+async def simulated_rows_per_second(products: list[ProductInput], pack_size: int) -> float:
+    """Measure rows/s through categorize_packed_async against a simulated client."""
+
+    async def fake_create(**kwargs: Any) -> Mock:  # noqa: ANN401
+        entries = str(kwargs["messages"][-1]["content"]).count("Product entry")
+        await asyncio.sleep(BASE_LATENCY_SECONDS + LATENCY_PER_ROW_SECONDS * entries)
+        response = Mock()
+        response.usage = None
+        response.choices = [Mock()]
+        response.choices[0].message.content = json.dumps(
+            {
+                "results": [
+                    {"id": idx, "category": "292", "comment": "Chosen 292 (0.90)."}
+                    for idx in range(1, entries + 1)
+                ]
+            }
+        )
+        return response
+
+    client = AsyncMock()
+    client.chat.completions.create = AsyncMock(side_effect=fake_create)
+    packs = [products[idx : idx + pack_size] for idx in range(0, len(products), pack_size)]
+
+    start = time.perf_counter()
+    for pack in packs:
+        await categorize_packed_async(client, pack, "gpt-5-nano", "lt")
+    return len(products) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Print tokens per row and throughput for each pack size."""
+    products = sample_products(ROWS)
+    header = (
+        f"{'K':>3} | {'input tok/row':>13} | {'RPM-bound rows/min':>18} | "
+        f"{'TPM-bound rows/min':>18} | {'rows/min':>8} | {'simulated rows/s':>16}"
+    )
+    print(header)
+    for pack_size in PACK_SIZES:
+        tokens = input_tokens_per_row(products, pack_size)
+        rpm_bound = RPM_LIMIT * pack_size
+        tpm_bound = TPM_LIMIT / (tokens + OUTPUT_TOKENS_PER_ROW)
+        simulated = asyncio.run(simulated_rows_per_second(products, pack_size))
+        print(
+            f"{pack_size:>3} | {tokens:>13.0f} | {rpm_bound:>18.0f} | {tpm_bound:>18.0f} | "
+            f"{min(rpm_bound, tpm_bound):>8.0f} | {simulated:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
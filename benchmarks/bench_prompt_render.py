@@ -0,0 +1,53 @@
+"""Benchmark: rendering the inline prompt with chained str.replace vs the compiled template.
+
+Run with:
+    uv run python -m benchmarks.bench_prompt_render
+"""
+
+import time
+
+from src.llm_service import COMPILED_PROMPTS, PROMPT_TEMPLATES, ProductInput
+
+RENDERS = 100_000
+
+
+def render_with_replace(template: str, product: ProductInput) -> str:
+    """Render the way prompts were built before templates were compiled."""
+    return (
+        template.replace("{{PRODUCT_NAME}}", product.program_name)
+        .replace("{{PRODUCT_DESCRIPTION}}", product.program_description)
+        .replace("{{PRODUCT_LOCATION}}", product.about_place)
+    )
+
+
+def main() -> None:
+    """Report the time per render of both approaches."""
+    products = [
+        ProductInput(
+            program_name=f"Skrydis oro balionu {index}",
+            program_description="Romantiškas skrydis virš miesto su šampanu",
+            about_place="Vilnius",
+        )
+        for index in range(100)
+    ]
+    template = PROMPT_TEMPLATES["lt"]
+    compiled = COMPILED_PROMPTS["lt"]
+    assert all(compiled.render(p) == render_with_replace(template, p) for p in products)
+
+    started = time.perf_counter()
+    for index in range(RENDERS):
+        render_with_replace(template, products[index % len(products)])
+    replace_us = (time.perf_counter() - started) / RENDERS * 1e6
+
+    started = time.perf_counter()
+    for index in range(RENDERS):
+        compiled.render(products[index % len(products)])
+    compiled_us = (time.perf_counter() - started) / RENDERS * 1e6
+
+    print(f"Template: {len(template)} chars, {RENDERS} renders")
+    print(f"Chained str.replace: {replace_us:.2f} us/render")
+    print(f"Compiled template:   {compiled_us:.2f} us/render ({replace_us / compiled_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark: per-call retry overhead of a tenacity decorator built per call vs RetryPolicy.
+
+Run with:
+    uv run python -m benchmarks.bench_retry_policy
+"""
+
+import asyncio
+import time
+
+from openai import RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random
+
+from src.llm_service import API_RETRY_POLICY
+
+CALLS = 100_000
+
+
+async def request(value: int) -> int:
+    """Stand-in for a successful API call."""
+    return value
+
+
+async def call_with_decorator_per_call(value: int) -> int:
+    """Wrap the request the way categorize_product_async did before RetryPolicy."""
+
+    def on_retry(_retry_state: object) -> None:
+        pass
+
+    request_with_retry = retry(
+        stop=stop_after_attempt(20),
+        wait=wait_random(min=10, max=30),
+        retry=retry_if_exception_type(RateLimitError),
+        before_sleep=on_retry,
+        reraise=True,
+    )(request)
+    return await request_with_retry(value)
+
+
+async def call_with_policy(value: int) -> int:
+    """Wrap the request with the shared policy."""
+    return await API_RETRY_POLICY.call(lambda: request(value))
+
+
+async def measure(call: object) -> float:
+    """Return microseconds per call."""
+    assert callable(call)
+    started = time.perf_counter()
+    for index in range(CALLS):
+        await call(index)
+    return (time.perf_counter() - started) / CALLS * 1e6
+
+
+async def main() -> None:
+    """Report the overhead per successful call of both approaches."""
+    bare_us = await measure(request)
+    decorator_us = await measure(call_with_decorator_per_call)
+    policy_us = await measure(call_with_policy)
+
+    print(f"{CALLS} successful calls")
+    print(f"No retry wrapper:          {bare_us:.2f} us/call")
+    print(f"tenacity built per call:   {decorator_us:.2f} us/call")
+    print(
+        f"Shared RetryPolicy:        {policy_us:.2f} us/call "
+        f"({(decorator_us - bare_us) / max(policy_us - bare_us, 1e-3):.0f}x less overhead)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+"""Curated keyword aliases for the local keyword index.
+
+Category names from the tree files are indexed automatically; these lists add common
+alternative phrasings and remove categories too generic to match on keywords alone.
+"""
+
+# Language -> category ID -> extra phrases that unambiguously identify the category
+CATEGORY_ALIASES: dict[str, dict[str, list[str]]] = {
+    "lt": {
+        "252": ["oro balionas", "skrydis balionu", "skrydis oro balionais"],
+        "253": ["parašiutas", "tandeminis šuolis", "šuolis su parašiutu"],
+        "254": ["parasparnis", "skrydis parasparniais"],
+        "256": ["sklandytuvas"],
+        "261": ["nardymo pamoka", "nardymas su instruktoriumi"],
+        "262": ["baidarės", "plaukimas baidarėmis"],
+        "269": ["kartingas", "kartingų trasa"],
+        "271": ["boulingo takas"],
+        "309": ["pabėgimo kambarys", "escape room"],
+        "310": ["kino bilietai", "kino seansas"],
+        "499": ["irklentė", "sup irklentės"],
+    },
+    "lv": {
+        "203": ["gaisa balons", "lidojums ar gaisa balonu"],
+        "204": ["izpletņlēciens", "lēciens ar izpletni tandēmā"],
+        "212": ["niršana"],
+        "458": ["sup dēļi"],
+    },
+    "pl": {
+        "356": ["paralotnia"],
+        "361": ["balonem", "balon na ogrzane powietrze"],
+        "370": ["gokart", "jazda gokartem"],
+        "527": ["pokój zagadek"],
+    },
+}
+
+# Language -> category IDs never returned by the keyword index
+EXCLUDED_CATEGORY_IDS: dict[str, set[str]] = {
+    "lt": {"314", "371", "374", "382", "443", "488", "577", "651", "725"},
+    "lv": {"197", "217", "257", "497"},
+    "pl": {"616", "783"},
+}
@@ -6,7 +6,7 @@ This spec file packages the Gift Voucher Categorizer application into a standalo
 - Entry point: src/main.py
 - Bundle type: One-file (easier distribution)
 - Mode: Windowed (no console for GUI)
-- Includes: All src modules, prompts module, and required dependencies
+- Includes: All src modules, prompts module, category trees, and required dependencies
 """
 
 from PyInstaller.utils.hooks import collect_data_files
@@ -15,12 +15,14 @@ block_cipher = None
 
 # Collect data files from prompts package
 prompts_datas = collect_data_files('prompts')
+# Category trees (*_categories_tree.md) for the keyword index and prompt branch pruning
+categories_datas = collect_data_files('categories')
 
 a = Analysis(
     ['src/main.py'],
     pathex=[],
     binaries=[],
-    datas=prompts_datas,
+    datas=prompts_datas + categories_datas,
     hiddenimports=[
         'src',
         'src.config',
@@ -37,7 +39,6 @@ a = Analysis(
         'prompts.v1',
         'openai',
         'loguru',
-        'tenacity',
         'tiktoken',  # Required by openai
         'tiktoken_ext',  # Required by openai
         'tiktoken_ext.openai_public',  # Required by openai
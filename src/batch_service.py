@@ -0,0 +1,484 @@
+"""Offline Batch API execution engine.
+
+Prompts are serialized into JSONL batch files, submitted through a BatchTransport and
+polled until the batch reaches a terminal state; the downloaded results are then mapped
+back to input rows. OpenAIBatchTransport talks to the OpenAI Batch API, while
+LocalDirectoryTransport stands in for it in tests and dry runs.
+"""
+
+import asyncio
+import hashlib
+import json
+import shutil
+import uuid
+from collections.abc import Callable, Iterable
+from functools import partial
+from pathlib import Path
+from typing import IO, Any, Literal, Protocol
+
+from loguru import logger
+from openai import AsyncOpenAI
+from openai.types import CompletionUsage
+from pydantic import BaseModel, ValidationError
+
+from src.config import (
+    BATCH_COMPLETION_WINDOW,
+    BATCH_MAX_FILE_BYTES,
+    BATCH_MAX_REQUESTS,
+    BATCH_POLL_INTERVAL_SECONDS,
+)
+from src.llm_service import (
+    API_RETRY_POLICY,
+    CategoryOutput,
+    ProductInput,
+    RetryPolicy,
+    TokenUsage,
+    build_categorization_messages,
+    parse_category_content,
+)
+
+BATCH_ENDPOINT: Literal["/v1/chat/completions"] = "/v1/chat/completions"
+CUSTOM_ID_PREFIX = "row-"
+# Terminal batch states; only "failed" (rejected input file) produces no results at all
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+# Record of submitted batches kept in the results directory, so a rerun resumes them
+SUBMITTED_BATCHES_FILE = "submitted_batches.json"
+
+
+class BatchStatus(BaseModel):
+    """Progress of a submitted batch."""
+
+    status: str
+    completed: int = 0
+    failed: int = 0
+    total: int = 0
+
+    @property
+    def is_terminal(self) -> bool:
+        """Whether the batch will not make further progress."""
+        return self.status in TERMINAL_STATUSES
+
+
+class SubmittedBatch(BaseModel):
+    """Batch started from one request file."""
+
+    sha256: str
+    batch_id: str
+
+
+class SubmittedBatches(BaseModel):
+    """Batches submitted so far, keyed by request file name."""
+
+    batches: dict[str, SubmittedBatch] = {}
+
+
+class BatchTransport(Protocol):
+    """Submits batch files and retrieves their results."""
+
+    async def submit(self, batch_file: Path) -> str:
+        """Upload a batch file and start processing it.
+
+        Args:
+            batch_file: JSONL file of requests
+
+        Returns:
+            Batch identifier
+        """
+        ...
+
+    async def poll(self, batch_id: str) -> BatchStatus:
+        """Return the current status of a batch.
+
+        Args:
+            batch_id: Batch identifier from submit
+
+        Returns:
+            Current BatchStatus
+        """
+        ...
+
+    async def download(self, batch_id: str, destination: Path) -> None:
+        """Write the result lines (successes and errors) of a finished batch.
+
+        Args:
+            batch_id: Batch identifier from submit
+            destination: JSONL file to create
+        """
+        ...
+
+
+class OpenAIBatchTransport:
+    """BatchTransport backed by the OpenAI Files and Batch APIs."""
+
+    def __init__(
+        self, client: AsyncOpenAI, completion_window: str = BATCH_COMPLETION_WINDOW
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+            client: AsyncOpenAI client
+            completion_window: Batch completion window
+        """
+        self.client = client
+        self.completion_window = completion_window
+
+    async def submit(self, batch_file: Path) -> str:
+        with batch_file.open("rb") as f:
+            uploaded = await self.client.files.create(file=f, purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,  # type: ignore[arg-type]
+        )
+        return batch.id
+
+    async def poll(self, batch_id: str) -> BatchStatus:
+        batch = await self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return BatchStatus(
+            status=batch.status,
+            completed=counts.completed if counts else 0,
+            failed=counts.failed if counts else 0,
+            total=counts.total if counts else 0,
+        )
+
+    async def download(self, batch_id: str, destination: Path) -> None:
+        batch = await self.client.batches.retrieve(batch_id)
+        with destination.open("wb") as f:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if not file_id:
+                    continue
+                # Streamed to disk so large result files are never held in memory
+                async with self.client.files.with_streaming_response.content(file_id) as response:
+                    async for chunk in response.iter_bytes():
+                        f.write(chunk)
+
+
+class LocalDirectoryTransport:
+    """BatchTransport that exchanges batch files through a local directory.
+
+    Submitted files are copied to <directory>/<batch_id>.input.jsonl. The batch counts as
+    completed once <directory>/<batch_id>.output.jsonl exists; it is produced either by an
+    external process or, when a responder is given, on the first poll by answering every
+    request body with the responder.
+    """
+
+    def __init__(
+        self, directory: Path, responder: Callable[[dict[str, Any]], dict[str, Any]] | None = None
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+            directory: Exchange directory
+            responder: Optional callable mapping a request body to a chat completion body
+        """
+        self.directory = directory
+        self.responder = responder
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def _input_path(self, batch_id: str) -> Path:
+        return self.directory / f"{batch_id}.input.jsonl"
+
+    def _output_path(self, batch_id: str) -> Path:
+        return self.directory / f"{batch_id}.output.jsonl"
+
+    async def submit(self, batch_file: Path) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        shutil.copyfile(batch_file, self._input_path(batch_id))
+        return batch_id
+
+    async def poll(self, batch_id: str) -> BatchStatus:
+        output_path = self._output_path(batch_id)
+        if not output_path.exists() and self.responder is not None:
+            self._respond(batch_id, self.responder)
+        if not output_path.exists():
+            return BatchStatus(status="in_progress")
+
+        with output_path.open(encoding="utf-8") as f:
+            completed = sum(1 for line in f if line.strip())
+        return BatchStatus(status="completed", completed=completed, total=completed)
+
+    def _respond(
+        self, batch_id: str, responder: Callable[[dict[str, Any]], dict[str, Any]]
+    ) -> None:
+        # Written under a temporary name so pollers never see a partial file
+        partial_path = self._output_path(batch_id).with_suffix(".partial")
+        with (
+            self._input_path(batch_id).open(encoding="utf-8") as requests,
+            partial_path.open("w", encoding="utf-8") as results,
+        ):
+            for line in requests:
+                request = json.loads(line)
+                result = {
+                    "id": f"response_{uuid.uuid4().hex}",
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": responder(request["body"])},
+                    "error": None,
+                }
+                results.write(json.dumps(result, ensure_ascii=False) + "\n")
+        partial_path.replace(self._output_path(batch_id))
+
+    async def download(self, batch_id: str, destination: Path) -> None:
+        shutil.copyfile(self._output_path(batch_id), destination)
+
+
+def make_custom_id(index: int) -> str:
+    """Build the batch request id of an input row.
+
+    Args:
+        index: Row index in the input file
+
+    Returns:
+        Custom id carried through the Batch API
+    """
+    return f"{CUSTOM_ID_PREFIX}{index}"
+
+
+def write_batch_files(
+    rows: Iterable[tuple[int, ProductInput, str]],
+    directory: Path,
+    model: str,
+    *,
+    max_requests: int = BATCH_MAX_REQUESTS,
+    max_bytes: int = BATCH_MAX_FILE_BYTES,
+) -> list[Path]:
+    """Serialize categorization requests into JSONL batch files.
+
+    A new file is started whenever the request count or size limit would be exceeded.
+
+    Args:
+        rows: (row index, product, language code) triples
+        directory: Directory for the batch files
+        model: Model name
+        max_requests: Maximum requests per file
+        max_bytes: Maximum bytes per file
+
+    Returns:
+        Paths of the written batch files
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    paths: list[Path] = []
+    current: IO[bytes] | None = None
+    requests_in_file = 0
+    bytes_in_file = 0
+
+    try:
+        for index, product, language in rows:
+            request = {
+                "custom_id": make_custom_id(index),
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": model,
+                    "messages": build_categorization_messages(product, language),
+                    "response_format": {"type": "json_object"},
+                },
+            }
+            line = (json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8")
+            if current is None or (
+                requests_in_file >= max_requests or bytes_in_file + len(line) > max_bytes
+            ):
+                if current is not None:
+                    current.close()
+                path = directory / f"batch_{len(paths):04d}.jsonl"
+                paths.append(path)
+                current = path.open("wb")
+                requests_in_file = 0
+                bytes_in_file = 0
+            current.write(line)
+            requests_in_file += 1
+            bytes_in_file += len(line)
+    finally:
+        if current is not None:
+            current.close()
+    return paths
+
+
+def parse_batch_result_line(
+    line: str, usage: TokenUsage | None = None
+) -> tuple[int, CategoryOutput] | None:
+    """Map one line of a batch results file back to its row.
+
+    Failed requests are reported as unknown, like failed live requests.
+
+    Args:
+        line: JSON line from the results or error file
+        usage: Optional accumulator for token usage
+
+    Returns:
+        (row index, CategoryOutput), or None for lines that cannot be attributed to a row
+    """
+    try:
+        result = json.loads(line)
+        index = int(str(result["custom_id"]).removeprefix(CUSTOM_ID_PREFIX))
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return None
+
+    response = result.get("response") or {}
+    body = response.get("body") or {}
+    if result.get("error") or response.get("status_code") != 200:  # noqa: PLR2004
+        error = result.get("error") or body.get("error") or {}
+        message = error.get("message", "unknown error") if isinstance(error, dict) else error
+        return index, CategoryOutput(category="unknown", comment=f"Batch request failed: {message}")
+
+    if usage is not None and body.get("usage"):
+        try:
+            usage.record(CompletionUsage.model_validate(body["usage"]))
+        except ValidationError:
+            logger.debug(f"Ignoring malformed usage block for row {index}")
+
+    try:
+        content = body["choices"][0]["message"]["content"]
+        return index, parse_category_content(content)
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        return index, CategoryOutput(category="unknown", comment=f"Invalid batch response: {e}")
+
+
+def hash_batch_file(batch_file: Path) -> str:
+    """Return the SHA-256 of a request file, identifying what a batch was started with.
+
+    Args:
+        batch_file: JSONL file of requests
+
+    Returns:
+        Hex digest of the file contents
+    """
+    with batch_file.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def load_submitted_batches(path: Path) -> SubmittedBatches:
+    """Read the batches submitted by an earlier run.
+
+    A missing or unreadable record means nothing was submitted.
+
+    Args:
+        path: Record file in the results directory
+
+    Returns:
+        SubmittedBatches of the earlier run
+    """
+    if not path.exists():
+        return SubmittedBatches()
+    try:
+        return SubmittedBatches.model_validate_json(path.read_text(encoding="utf-8"))
+    except ValidationError:
+        logger.warning(f"Ignoring unreadable record of submitted batches: {path}")
+        return SubmittedBatches()
+
+
+def save_submitted_batches(path: Path, submitted: SubmittedBatches) -> None:
+    """Write the record of submitted batches, replacing the previous one atomically.
+
+    Args:
+        path: Record file in the results directory
+        submitted: Batches submitted so far
+    """
+    partial_path = path.with_suffix(".partial")
+    partial_path.write_text(submitted.model_dump_json(), encoding="utf-8")
+    partial_path.replace(path)
+
+
+async def run_batch(
+    transport: BatchTransport,
+    batch_files: list[Path],
+    results_directory: Path,
+    poll_interval: float = BATCH_POLL_INTERVAL_SECONDS,
+    status_callback: Callable[[BatchStatus], None] | None = None,
+    *,
+    retry_policy: RetryPolicy = API_RETRY_POLICY,
+) -> list[Path]:
+    """Submit batch files, wait for them to finish and download their results.
+
+    Each batch ID is recorded in the results directory as soon as it is submitted. A
+    rerun after a crash or interruption resumes polling the recorded batches instead of
+    paying for them again; a request file whose contents changed is submitted anew.
+
+    Args:
+        transport: Batch transport
+        batch_files: JSONL request files from write_batch_files
+        results_directory: Existing directory for downloaded result files and the
+            record of submitted batches
+        poll_interval: Seconds between status checks
+        status_callback: Optional callback receiving aggregated progress after each poll
+        retry_policy: Policy retrying transient errors of each submit, poll and download,
+            so one failed call does not abort a job that runs for hours
+
+    Returns:
+        Paths of the downloaded result files
+    """
+    submitted_path = results_directory / SUBMITTED_BATCHES_FILE
+    submitted = load_submitted_batches(submitted_path)
+    batch_ids: list[str] = []
+    for batch_file in batch_files:
+        digest = hash_batch_file(batch_file)
+        previous = submitted.batches.get(batch_file.name)
+        if previous is not None and previous.sha256 == digest:
+            logger.info(f"Resuming batch {previous.batch_id} submitted by an earlier run")
+            batch_ids.append(previous.batch_id)
+            continue
+        batch_id = await retry_policy.call(partial(transport.submit, batch_file))
+        submitted.batches[batch_file.name] = SubmittedBatch(sha256=digest, batch_id=batch_id)
+        save_submitted_batches(submitted_path, submitted)
+        batch_ids.append(batch_id)
+    logger.info(f"Polling {len(batch_ids)} batch(es): {', '.join(batch_ids)}")
+
+    statuses: dict[str, BatchStatus] = {}
+    while True:
+        for batch_id in batch_ids:
+            if batch_id not in statuses or not statuses[batch_id].is_terminal:
+                statuses[batch_id] = await retry_policy.call(partial(transport.poll, batch_id))
+        if status_callback:
+            status_callback(
+                BatchStatus(
+                    status="completed"
+                    if all(status.is_terminal for status in statuses.values())
+                    else "in_progress",
+                    completed=sum(status.completed for status in statuses.values()),
+                    failed=sum(status.failed for status in statuses.values()),
+                    total=sum(status.total for status in statuses.values()),
+                )
+            )
+        if all(status.is_terminal for status in statuses.values()):
+            break
+        await asyncio.sleep(poll_interval)
+
+    result_files: list[Path] = []
+    for batch_id in batch_ids:
+        status = statuses[batch_id]
+        if status.status == "failed":
+            logger.error(f"Batch {batch_id} failed; its rows are reported as unknown")
+            continue
+        if status.status != "completed":
+            logger.warning(
+                f"Batch {batch_id} ended as {status.status}; downloading partial results"
+            )
+        destination = results_directory / f"{batch_id}.results.jsonl"
+        await retry_policy.call(partial(transport.download, batch_id, destination))
+        result_files.append(destination)
+    return result_files
+
+
+def load_batch_results(
+    result_files: Iterable[Path], usage: TokenUsage | None = None
+) -> dict[int, CategoryOutput]:
+    """Read downloaded result files into a row index lookup.
+
+    Args:
+        result_files: Files from run_batch
+        usage: Optional accumulator for token usage
+
+    Returns:
+        Mapping of row index to CategoryOutput
+    """
+    results: dict[int, CategoryOutput] = {}
+    for path in result_files:
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                parsed = parse_batch_result_line(line, usage)
+                if parsed is not None:
+                    index, result = parsed
+                    results[index] = result
+    return results
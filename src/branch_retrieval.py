@@ -0,0 +1,111 @@
+"""Candidate-branch retrieval for pruned decision-tree prompts.
+
+Scores the top-level branches of the decision tree ("Adventure & Active", "Food & Drink",
+...) against the product text with a local lexical model: every branch is the bag of
+stemmed category phrases below it, and product tokens found in a branch add their
+inverse branch frequency to its score. Only the best-scoring branches are then sent to
+the model.
+"""
+
+import math
+from functools import lru_cache
+
+from src.category_tree import TREE_FILES, get_category_phrases, load_category_tree, stem_tokens
+
+NAME_WEIGHT = 2.0  # Product name tokens count more than description tokens
+DESCRIPTION_WEIGHT = 1.0
+# Shorter stems are mostly conjunctions and prepositions ("ir", "ar", "na") or numbers
+MIN_STEM_CHARS = 3
+
+
+class BranchRetriever:
+    """Lexical scorer of top-level decision-tree branches."""
+
+    def __init__(self, branch_vocabularies: dict[str, set[str]]) -> None:
+        """Build the scorer.
+
+        Args:
+            branch_vocabularies: Branch name -> stems of the phrases below it
+        """
+        self.branches = list(branch_vocabularies)
+        document_frequency: dict[str, int] = {}
+        for vocabulary in branch_vocabularies.values():
+            for stem in vocabulary:
+                document_frequency[stem] = document_frequency.get(stem, 0) + 1
+        branch_count = len(branch_vocabularies)
+        # stem -> [(branch, idf)], so scoring only touches branches containing the stem
+        self._postings: dict[str, list[tuple[str, float]]] = {}
+        for branch, vocabulary in branch_vocabularies.items():
+            for stem in vocabulary:
+                idf = math.log(1 + branch_count / document_frequency[stem])
+                self._postings.setdefault(stem, []).append((branch, idf))
+
+    @classmethod
+    def for_language(cls, language: str) -> "BranchRetriever":
+        """Build the scorer of a language from its category tree and phrases.
+
+        Args:
+            language: Language code (lt, lv, pl)
+
+        Returns:
+            BranchRetriever (without branches when the tree file is not available)
+        """
+        groups = {node.category_id: node.group for node in load_category_tree(language)}
+        vocabularies: dict[str, set[str]] = {}
+        for category_id, phrases in get_category_phrases(language).items():
+            vocabulary = vocabularies.setdefault(groups[category_id], set())
+            for phrase in phrases:
+                vocabulary.update(
+                    stem for stem in stem_tokens(phrase) if len(stem) >= MIN_STEM_CHARS
+                )
+        return cls(vocabularies)
+
+    def score(self, name: str, description: str = "") -> dict[str, float]:
+        """Score every branch against the product text.
+
+        Args:
+            name: Product name
+            description: Product description
+
+        Returns:
+            Branch name -> score (0 when no token of the product occurs in the branch)
+        """
+        scores = dict.fromkeys(self.branches, 0.0)
+        for text, weight in ((name, NAME_WEIGHT), (description, DESCRIPTION_WEIGHT)):
+            for stem in set(stem_tokens(text)):
+                for branch, idf in self._postings.get(stem, ()):
+                    scores[branch] += weight * idf
+        return scores
+
+    def select(self, name: str, description: str, top_k: int) -> list[str] | None:
+        """Pick the branches worth sending to the model.
+
+        Args:
+            name: Product name
+            description: Product description
+            top_k: Maximum number of branches
+
+        Returns:
+            Up to top_k branches with a positive score, best first, or None when there is
+            no lexical evidence and the full tree should be used
+        """
+        scores = self.score(name, description)
+        ranked = sorted(
+            (branch for branch in self.branches if scores[branch] > 0),
+            key=lambda branch: scores[branch],
+            reverse=True,
+        )
+        return ranked[:top_k] or None
+
+
+@lru_cache(maxsize=len(TREE_FILES))
+def get_branch_retriever(language: str) -> BranchRetriever:
+    """Return the branch retriever of a language, built once per process.
+
+    Args:
+        language: Language code (lt, lv, pl)
+
+    Returns:
+        Shared BranchRetriever
+    """
+    return BranchRetriever.for_language(language)
@@ -0,0 +1,154 @@
+"""Category tree files and text normalization shared by the local lexical models.
+
+The *_categories_tree.md files mirror the decision trees in the prompts: six top-level
+groups ("Adventure & Active", ...) containing the category IDs the model may return.
+They ship as package data of the categories package, so installed and bundled copies
+of the app find them too.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from importlib.resources import files
+
+from categories.aliases import CATEGORY_ALIASES
+from categories.categories_lt import CATEGORY_NAME_MAP as NAME_MAP_LT
+from categories.categories_lv import CATEGORY_NAME_MAP as NAME_MAP_LV
+from categories.categories_pl import CATEGORY_NAME_MAP as NAME_MAP_PL
+from loguru import logger
+from pydantic import BaseModel
+
+# Tokens are truncated to this many characters, a cheap stemmer for inflected languages
+STEM_LENGTH = 6
+
+TREE_PACKAGE = "categories"
+TREE_FILES = {
+    "lt": "lithuanian_categories_tree.md",
+    "lv": "latvian_categories_tree.md",
+    "pl": "polish_categories_tree.md",
+}
+NAME_MAPS = {"lt": NAME_MAP_LT, "lv": NAME_MAP_LV, "pl": NAME_MAP_PL}
+
+# Letters that Unicode decomposition leaves untouched
+_FOLD_TABLE = str.maketrans({"ł": "l", "Ł": "L", "ø": "o", "Ø": "O", "đ": "d", "ß": "ss"})
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+_TREE_LINE_PATTERN = re.compile(
+    r"^(?P<indent>[| \\]*?)[|\\]-- (?P<label>.+?)\s*(?:\((?P<id>\d+)\))?\s*$"
+)
+_TREE_INDENT = 4
+
+
+def fold_text(text: str) -> str:
+    """Remove diacritics, case and punctuation.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Lowercase ASCII-like text with single spaces between tokens
+    """
+    decomposed = unicodedata.normalize("NFKD", text.translate(_FOLD_TABLE))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_TOKEN_PATTERN.findall(stripped.lower()))
+
+
+def stem_tokens(text: str) -> tuple[str, ...]:
+    """Fold text and truncate each token to STEM_LENGTH characters.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Tuple of stems
+    """
+    return tuple(token[:STEM_LENGTH] for token in fold_text(text).split())
+
+
+class TreeNode(BaseModel):
+    """Category node parsed from a tree file."""
+
+    category_id: str
+    label: str
+    parent_id: str | None
+    group: str  # Top-level group heading, e.g. "Food & Drink"
+
+
+def parse_category_tree(tree_text: str) -> list[TreeNode]:
+    """Parse the ASCII category tree used by the prompts.
+
+    Group headings and Unknown have no ID and are not returned; categories directly
+    below a group heading have no parent.
+
+    Args:
+        tree_text: Contents of a *_categories_tree.md file
+
+    Returns:
+        Category nodes in file order
+    """
+    nodes: list[TreeNode] = []
+    # Category ID (or None for group headings) at each depth of the current branch
+    branch: list[str | None] = []
+    group = ""
+    for line in tree_text.splitlines():
+        match = _TREE_LINE_PATTERN.match(line)
+        if match is None:
+            continue
+        depth = len(match.group("indent")) // _TREE_INDENT
+        del branch[depth:]
+        category_id = match.group("id")
+        if depth == 0:
+            group = match.group("label")
+        if category_id is not None:
+            parent_id = next((node for node in reversed(branch) if node is not None), None)
+            nodes.append(
+                TreeNode(
+                    category_id=category_id,
+                    label=match.group("label"),
+                    parent_id=parent_id,
+                    group=group,
+                )
+            )
+        branch.append(category_id)
+    return nodes
+
+
+@lru_cache(maxsize=len(TREE_FILES))
+def load_category_tree(language: str) -> tuple[TreeNode, ...]:
+    """Read the category tree of a language.
+
+    Args:
+        language: Language code (lt, lv, pl)
+
+    Returns:
+        Category nodes, empty when the tree file is not available
+    """
+    tree_file = files(TREE_PACKAGE) / TREE_FILES.get(language, TREE_FILES["lt"])
+    if not tree_file.is_file():
+        logger.warning(f"Category tree not found: {tree_file}")
+        return ()
+    return tuple(parse_category_tree(tree_file.read_text(encoding="utf-8")))
+
+
+@lru_cache(maxsize=len(TREE_FILES))
+def get_category_phrases(language: str) -> dict[str, frozenset[str]]:
+    """Collect the phrases naming each category of a language's tree.
+
+    Combines the tree label, the category map name and the curated aliases. Names
+    listing alternatives ("Manikiūras, pedikiūras", "Irklentės / Sup") are split.
+
+    Args:
+        language: Language code (lt, lv, pl)
+
+    Returns:
+        Mapping of category ID to its phrases
+    """
+    name_map = NAME_MAPS.get(language, NAME_MAP_LT)
+    aliases = CATEGORY_ALIASES.get(language, {})
+    phrases: dict[str, frozenset[str]] = {}
+    for node in load_category_tree(language):
+        names = {node.label, name_map.get(node.category_id, node.label)}
+        split_names = {part.strip() for name in names for part in re.split(r"[,/]", name)}
+        phrases[node.category_id] = frozenset(
+            {name for name in split_names if name} | set(aliases.get(node.category_id, []))
+        )
+    return phrases
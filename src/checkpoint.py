@@ -0,0 +1,197 @@
+"""Checkpoint journal for resumable CSV processing runs."""
+
+import hashlib
+import os
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Self
+
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+
+from src.config import CHECKPOINT_FLUSH_ROWS
+from src.llm_service import CategoryOutput
+
+FINGERPRINT_PREFIX_BYTES = 1024 * 1024  # Input bytes hashed to recognize the same file
+
+
+class JournalHeader(BaseModel):
+    """First journal line identifying the run it belongs to."""
+
+    input_size: int
+    input_prefix_sha256: str
+    model: str
+    prompt_versions: dict[str, str]
+    language: str | None
+
+
+class JournalEntry(BaseModel):
+    """Result of one completed row."""
+
+    index: int
+    category: str
+    comment: str
+
+
+def get_journal_path(output_path: Path) -> Path:
+    """Return the journal path kept next to an output file.
+
+    Args:
+        output_path: Output CSV path
+
+    Returns:
+        Path of the checkpoint journal
+    """
+    return output_path.with_name(f"{output_path.stem}.journal.jsonl")
+
+
+def build_journal_header(
+    input_path: Path, model: str, prompt_versions: dict[str, str], language: str | None
+) -> JournalHeader:
+    """Fingerprint the input file and run settings.
+
+    Args:
+        input_path: Input CSV path
+        model: Model name
+        prompt_versions: Prompt version per language code
+        language: Language override of the run, None when detected per row
+
+    Returns:
+        JournalHeader for this run
+    """
+    with input_path.open("rb") as f:
+        prefix = f.read(FINGERPRINT_PREFIX_BYTES)
+    return JournalHeader(
+        input_size=input_path.stat().st_size,
+        input_prefix_sha256=hashlib.sha256(prefix).hexdigest(),
+        model=model,
+        prompt_versions=prompt_versions,
+        language=language,
+    )
+
+
+class CheckpointJournal:
+    """Append-only journal of completed rows.
+
+    Results are appended as rows finish and flushed to disk every flush_rows rows,
+    so a crashed run can skip everything already paid for.
+    """
+
+    def __init__(
+        self, path: Path, header: JournalHeader, flush_rows: int = CHECKPOINT_FLUSH_ROWS
+    ) -> None:
+        """Initialize the journal.
+
+        Args:
+            path: Journal file path
+            header: Identity of the current run
+            flush_rows: Rows between flush + fsync
+        """
+        self.path = path
+        self.header = header
+        self.flush_rows = flush_rows
+        self._file: IO[str] | None = None
+        self._unflushed = 0
+        self._resumable = False
+        self._needs_newline = False
+
+    def load(self) -> dict[int, CategoryOutput]:
+        """Read completed rows left by a previous run of the same input.
+
+        A journal from a different input file, model, prompt version or language
+        override is discarded. A truncated
+        last line (crash mid-write) is ignored.
+
+        Returns:
+            Mapping of row index to CategoryOutput
+        """
+        if not self.path.exists():
+            return {}
+
+        completed: dict[int, CategoryOutput] = {}
+        with self.path.open(encoding="utf-8") as f:
+            try:
+                header = JournalHeader.model_validate_json(f.readline())
+            except ValidationError:
+                header = None
+            if header != self.header:
+                logger.info(f"Ignoring checkpoint journal from a different run: {self.path}")
+                return {}
+
+            line = ""
+            for line in f:
+                try:
+                    entry = JournalEntry.model_validate_json(line)
+                except ValidationError:
+                    continue
+                completed[entry.index] = CategoryOutput(
+                    category=entry.category, comment=entry.comment
+                )
+
+        self._resumable = True
+        self._needs_newline = bool(line) and not line.endswith("\n")
+        return completed
+
+    def open(self) -> None:
+        """Open the journal for appending.
+
+        Continues a journal accepted by load, otherwise starts a new one.
+        """
+        if self._resumable:
+            self._file = self.path.open("a", encoding="utf-8")
+            if self._needs_newline:
+                # Terminate a line cut short by a crash so new entries stay parseable
+                self._file.write("\n")
+        else:
+            self._file = self.path.open("w", encoding="utf-8")
+            self._file.write(self.header.model_dump_json() + "\n")
+        self.flush()
+
+    def _write_entry(self, index: int, result: CategoryOutput) -> None:
+        if self._file is None:
+            msg = "Checkpoint journal is not open"
+            raise RuntimeError(msg)
+        entry = JournalEntry(index=index, category=result.category, comment=result.comment)
+        self._file.write(entry.model_dump_json() + "\n")
+
+    def record(self, index: int, result: CategoryOutput) -> None:
+        """Append a completed row.
+
+        Args:
+            index: Row index in the input file
+            result: Categorization result
+        """
+        self._write_entry(index, result)
+        self._unflushed += 1
+        if self._unflushed >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """Flush buffered entries and fsync them to disk."""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unflushed = 0
+
+    def close(self) -> None:
+        """Flush and close the journal file."""
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """Close and delete the journal once the run has completed."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,175 @@
+"""Headless command-line entry point for batch and scheduled runs.
+
+Progress and the final summary are printed to stdout as JSON lines; logs go to stderr.
+Nothing here imports tkinter, so the categorizer runs on servers without a display.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any
+
+LANGUAGES = ("lt", "lv", "pl")
+ENGINES = ("async", "batch")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser.
+
+    Returns:
+        Configured ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="gera-dovana-categorizer",
+        description="Categorize gift voucher products in a CSV file without the GUI.",
+    )
+    parser.add_argument("input", type=Path, help="Input CSV file")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="Output CSV file (default: <input>_categorized.csv next to the input)",
+    )
+    parser.add_argument("-m", "--model", help="Model name (default: configured model)")
+    parser.add_argument("-c", "--concurrency", type=_positive_int, help="Concurrent API requests")
+    parser.add_argument(
+        "-b", "--batch-size", type=_positive_int, help="Rows per CSV read/write chunk"
+    )
+    parser.add_argument(
+        "-l",
+        "--language",
+        choices=LANGUAGES,
+        help="Language of the products, skips language detection",
+    )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=ENGINES,
+        default="async",
+        help="async sends live requests; batch uses the half-price offline Batch API",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        help="Seconds between batch status checks (batch engine only)",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Seconds the run may take; remaining rows are written as unknown (async engine only)",
+    )
+    return parser
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        msg = f"must be a positive integer, got {value}"
+        raise argparse.ArgumentTypeError(msg)
+    return number
+
+
+def emit(event: str, **fields: Any) -> None:  # noqa: ANN401
+    """Write one JSON event line to stdout.
+
+    Args:
+        event: Event type (progress, rate_limit, summary, error)
+        **fields: Event payload
+    """
+    sys.stdout.write(json.dumps({"event": event, **fields}, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the categorizer from the command line.
+
+    Args:
+        argv: Command-line arguments, defaults to sys.argv
+
+    Returns:
+        Process exit code
+    """
+    args = build_parser().parse_args(argv)
+
+    # Deferred so --help and argument errors return without loading the OpenAI client
+    from loguru import logger  # noqa: PLC0415
+
+    from src.batch_service import BatchStatus  # noqa: PLC0415
+    from src.config import (  # noqa: PLC0415
+        ACTIVE_CONFIG,
+        BATCH_POLL_INTERVAL_SECONDS,
+        RUN_DEADLINE_SECONDS,
+    )
+    from src.core import (  # noqa: PLC0415
+        RunProgress,
+        process_csv_async,
+        process_csv_batch_async,
+    )
+    from src.logging_utils import setup_logging  # noqa: PLC0415
+
+    setup_logging()
+
+    if api_key := os.environ.get("OPENAI_API_KEY"):
+        ACTIVE_CONFIG.openai_api_key = api_key
+    if not ACTIVE_CONFIG.openai_api_key:
+        emit("error", message="No OpenAI API key: set OPENAI_API_KEY or configure it in the GUI")
+        return 1
+    if not args.input.is_file():
+        emit("error", message=f"Input file not found: {args.input}")
+        return 1
+
+    def on_progress(progress: RunProgress) -> None:
+        emit(
+            "progress",
+            processed=progress.rows_processed,
+            total=progress.total_rows,
+            bytes_processed=progress.bytes_processed,
+            total_bytes=progress.total_bytes,
+        )
+
+    def on_rate_limit(is_waiting: bool) -> None:
+        emit("rate_limit", waiting=is_waiting)
+
+    def on_batch_status(status: BatchStatus) -> None:
+        emit("batch_status", **status.model_dump())
+
+    if args.engine == "batch":
+        run = process_csv_batch_async(
+            args.input,
+            progress_callback=on_progress,
+            status_callback=on_batch_status,
+            output_path=args.output,
+            model=args.model,
+            batch_size=args.batch_size,
+            language=args.language,
+            poll_interval=args.poll_interval or BATCH_POLL_INTERVAL_SECONDS,
+        )
+    else:
+        run = process_csv_async(
+            args.input,
+            on_progress,
+            on_rate_limit,
+            output_path=args.output,
+            model=args.model,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            language=args.language,
+            deadline=args.deadline if args.deadline is not None else RUN_DEADLINE_SECONDS,
+        )
+
+    try:
+        output_path, summary = asyncio.run(run)
+    except Exception as e:
+        logger.exception("Categorization failed")
+        emit("error", message=str(e))
+        return 1
+
+    emit("summary", output_path=str(output_path), **summary)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,20 +17,91 @@ from pydantic import BaseModel, ValidationError
 # More information on limits personalized: https://platform.openai.com/settings/organization/limits
 CSV_BATCH_SIZE = 50  # Rows to read per chunk
 API_CONCURRENT_BATCH_SIZE = 50  # Number of concurrent API requests
+# Rows read from the input but not yet written to the output (reader look-ahead + reorder buffer)
+PIPELINE_MAX_PENDING_ROWS = 500
+# Memory those rows may take, so wide rows (many columns, long HTML descriptions) cannot
+# multiply it; with the limits below, peak memory does not grow with the input file size
+PIPELINE_MAX_PENDING_BYTES = 64 * 1024 * 1024
+# Results of finished requests kept for in-run deduplication; duplicates further apart
+# issue their own request or hit the persistent result cache
+DEDUP_MAX_ENTRIES = 10_000
+# Completed rows are journaled next to the output so a crashed run can resume;
+# the journal is flushed and fsynced every CHECKPOINT_FLUSH_ROWS rows
+CHECKPOINT_FLUSH_ROWS = 50
+# The output is written to <output>.partial through one buffered handle, flushed and fsynced
+# every OUTPUT_FLUSH_ROWS rows, and renamed into place once the run has completed
+OUTPUT_BUFFER_BYTES = 1024 * 1024
+OUTPUT_FLUSH_ROWS = 5000
 
 # CSV configuration
 ENCODINGS = ["utf-8", "cp1252", "latin1"]  # Encoding fallback order
+ENCODING_SAMPLE_BYTES = 256 * 1024  # File prefix read once to choose the encoding
+# Lines the chosen encoding cannot decode are decoded with the next candidate that can;
+# after this many such lines in a row, that candidate becomes the file encoding
+ENCODING_SWITCH_LINES = 50
+# Rows are counted for progress reporting from raw bytes, alongside processing; files
+# larger than this are not counted and progress is reported as bytes read instead
+ROW_COUNT_MAX_BYTES = 1024 * 1024 * 1024
+ROW_COUNT_BLOCK_BYTES = 1024 * 1024  # Bytes read per block while counting rows
+CSV_FIELD_SIZE_LIMIT = 16 * 1024 * 1024  # Characters per field, raised from csv's 128 KiB
 REQUIRED_COLUMNS = ["ProgramName", "ProgramDescription", "About_Place"]  # Required CSV columns
 LANGUAGE_SAMPLE_LINES = 10  # Number of lines to sample for language detection
+# Local per-row language identification (character n-gram model, no API call).
+# Rows without a clear winner fall back to the majority language of the sampled rows
+LANGUAGE_ID_MIN_MARGIN = 8.0  # Log-likelihood lead required over the runner-up language
+LANGUAGE_ID_MAX_CHARS = 300  # Characters of a row considered, bounding the cost per row
+
+# Prompt assembly: "prefix_cached" sends the static decision tree as a leading system message
+# and the product fields as a short trailing user message, so provider-side prompt caching
+# can reuse the tree across requests. "inline" sends the single templated user prompt.
+PROMPT_LAYOUT = "prefix_cached"
+# Candidate-branch retrieval: with the prefix_cached layout, send only the K top-level
+# decision-tree branches that best match the product text (plus the Unknown escape)
+# instead of the whole tree. Products without lexical evidence still get the full tree.
+# 0 disables pruning.
+PROMPT_BRANCH_TOP_K = 2
+
+# Packed mode: categorize several products per request so the decision tree is sent once
+# per pack instead of once per product. 1 disables packing.
+PACK_SIZE = 1  # Products per API request
+PACK_LINGER_SECONDS = 0.05  # Max wait for a pack to fill before sending it partially filled
+
+# Local keyword index: rows whose product name clearly names a single category are
+# categorized without an API call; everything else still goes to the model
+KEYWORD_INDEX_ENABLED = True
+KEYWORD_MIN_COVERAGE = 0.5  # Fraction of product name tokens the matched phrases must cover
+
+# Offline Batch API engine: requests are uploaded as JSONL files and completed within the
+# completion window at half the price of live requests, without RPM/TPM pressure
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL_SECONDS = 60  # Seconds between batch status checks
+BATCH_MAX_REQUESTS = 50_000  # Requests per batch file (Batch API limit)
+BATCH_MAX_FILE_BYTES = 190 * 1024 * 1024  # Batch file size, kept under the 200 MB API limit
 
 LOG_LEVEL = "DEBUG"  # Default log level
 RETRY_MIN_WAIT = 10  # RateLimit error minimum wait time in seconds
 RETRY_MAX_WAIT = 30  # RateLimit error maximum wait time in seconds
 RETRY_MAX_ATTEMPTS = 20  # Maximum number of retry attempts for RateLimitError
+# Timeouts, connection failures and 5xx errors are retried with exponential backoff
+TRANSIENT_RETRY_MIN_WAIT = 1  # Wait before the first retry in seconds, doubled per retry
+TRANSIENT_RETRY_MAX_WAIT = 30  # Upper bound of the wait in seconds
+TRANSIENT_RETRY_MAX_ATTEMPTS = 5  # Attempts in total for transient errors
+RETRY_JITTER = 0.5  # Up to this fraction of each wait is randomly taken off
+# Time limits bounding how long a run can take
+REQUEST_TIMEOUT_SECONDS = 60  # Per API attempt
+ROW_TIME_BUDGET_SECONDS = 300  # Per row, all attempts and retry waits together
+# Whole-run deadline in seconds; rows not categorized by then are written as unknown and
+# left out of the checkpoint journal, so a resumed run picks them up. None disables it
+RUN_DEADLINE_SECONDS: float | None = None
 
 # User config
 CONFIG_FILE_PATH = Path.home() / ".product_categorizer_config.json"
 
+# Persistent result cache: unchanged rows in re-run exports are answered without an API call
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_PATH = Path.home() / ".product_categorizer_cache.sqlite3"
+RESULT_CACHE_MAX_ENTRIES = 500_000  # Least recently used entries are evicted beyond this
+
 # Hardcoded available models list
 AVAILABLE_MODELS = [
     "gpt-5-nano-2025-08-07",
@@ -38,6 +109,38 @@ AVAILABLE_MODELS = [
 ]
 
 
+class ModelRateLimits(BaseModel):
+    """Per-minute request and token budgets for a model."""
+
+    rpm: int  # Requests per minute
+    tpm: int  # Tokens per minute (input + output)
+
+
+# Tier 1 limits for the available models, enforced client-side by the rate limiter
+MODEL_RATE_LIMITS: dict[str, ModelRateLimits] = {
+    "gpt-5-nano-2025-08-07": ModelRateLimits(rpm=500, tpm=200_000),
+    "gpt-5-mini-2025-08-07": ModelRateLimits(rpm=500, tpm=500_000),
+}
+DEFAULT_RATE_LIMITS = ModelRateLimits(rpm=500, tpm=200_000)  # For models not listed above
+RATE_LIMIT_UTILIZATION = 0.95  # Fraction of the quota the limiter hands out
+RATE_LIMIT_BURST_SECONDS = 5  # Bucket capacity, in seconds worth of quota
+OUTPUT_TOKENS_ESTIMATE = 300  # Budgeted output + reasoning tokens per product, before usage
+
+# Adaptive concurrency driven by x-ratelimit-* response headers (remaining / limit fraction)
+RATE_LIMIT_HIGH_WATERMARK = 0.5  # Above this, effective concurrency grows by one
+RATE_LIMIT_LOW_WATERMARK = 0.1  # Below this, effective concurrency is halved
+RATE_LIMIT_PAUSE_WATERMARK = 0.02  # Below this, new requests wait for the quota reset
+
+# Request hedging: a request still running after the running p95 latency gets a duplicate,
+# the first response wins and the other is cancelled. Off by default since a hedge can be
+# billed twice; HEDGE_MAX_RATE bounds the extra requests
+HEDGE_ENABLED = False
+HEDGE_PERCENTILE = 0.95  # Latency percentile after which a duplicate is sent
+HEDGE_MAX_RATE = 0.05  # Maximum fraction of requests that may be hedged
+HEDGE_MIN_SAMPLES = 20  # Completed requests observed before hedging starts
+HEDGE_LATENCY_WINDOW = 500  # Recent latencies the percentile is computed over
+
+
 class Config(BaseModel):
     """Configuration structure for Gift Voucher Categorizer."""
 
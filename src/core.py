@@ -1,7 +1,11 @@
 """CSV processing orchestration."""
 
+import asyncio
+import itertools
 import re
-from collections.abc import Callable
+import shutil
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
 from pathlib import Path
 
 from categories.categories_lt import CATEGORY_NAME_MAP as NAME_MAP_LT
@@ -12,18 +16,79 @@ from categories.categories_pl import CATEGORY_NAME_MAP as NAME_MAP_PL
 from categories.categories_pl import CATEGORY_URL_MAP as URL_MAP_PL
 from loguru import logger
 from openai import AsyncOpenAI
-
-from src.config import ACTIVE_CONFIG, CSV_BATCH_SIZE
+from pydantic import BaseModel
+
+from src.batch_service import (
+    BatchStatus,
+    BatchTransport,
+    OpenAIBatchTransport,
+    load_batch_results,
+    run_batch,
+    write_batch_files,
+)
+from src.checkpoint import CheckpointJournal, build_journal_header, get_journal_path
+from src.config import (
+    ACTIVE_CONFIG,
+    API_CONCURRENT_BATCH_SIZE,
+    BATCH_POLL_INTERVAL_SECONDS,
+    CSV_BATCH_SIZE,
+    DEDUP_MAX_ENTRIES,
+    HEDGE_ENABLED,
+    KEYWORD_INDEX_ENABLED,
+    LANGUAGE_SAMPLE_LINES,
+    PACK_SIZE,
+    PIPELINE_MAX_PENDING_BYTES,
+    PIPELINE_MAX_PENDING_ROWS,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_PATH,
+    ROW_COUNT_MAX_BYTES,
+    RUN_DEADLINE_SECONDS,
+)
 from src.csv_service import (
-    build_language_sample,
+    CsvChunkReader,
+    CsvOutputWriter,
+    count_csv_rows,
     detect_encoding,
     extract_product_input,
     get_csv_columns,
+    get_row_size,
     read_csv_chunk,
     validate_csv_columns,
-    write_csv_chunk,
 )
-from src.llm_service import CategoryOutput, categorize_batch_async, detect_language_async
+from src.keyword_index import get_keyword_index
+from src.language_id import identify_majority_language, identify_product_language
+from src.llm_service import (
+    PROMPT_TEMPLATES,
+    CategoryOutput,
+    PackedCategorizer,
+    ProductInput,
+    RateLimitController,
+    RateLimiter,
+    RequestHedger,
+    TokenUsage,
+    categorize_product_async,
+    get_prompt_version,
+)
+from src.result_cache import ResultCache, make_cache_key
+from src.routing import LanguageRouter, PendingBudget
+from src.run_control import RunControl
+
+
+class RunProgress(BaseModel):
+    """Progress of a run, reported to progress_callback after each written chunk."""
+
+    rows_processed: int
+    total_rows: int | None  # None while rows are still being counted or for uncounted files
+    bytes_processed: int  # Input bytes consumed by the reader
+    total_bytes: int
+
+    @property
+    def fraction(self) -> float:
+        """Completed fraction of the run, by rows when counted, by bytes otherwise."""
+        if self.total_rows is not None:
+            return self.rows_processed / self.total_rows if self.total_rows else 1.0
+        return self.bytes_processed / self.total_bytes if self.total_bytes else 1.0
 
 
 def normalize_comment_with_names(comment: str, category_name_map: dict[str, str]) -> str:
@@ -53,23 +118,165 @@ def normalize_comment_with_names(comment: str, category_name_map: dict[str, str]
     return re.sub(pattern, replace_id_with_name, comment)
 
 
-async def process_csv_async(  # noqa: PLR0915
+def apply_category_result(
+    row: dict[str, str],
+    result: CategoryOutput,
+    category_name_map: dict[str, str],
+    category_url_map: dict[str, str],
+    language_note: str = "",
+) -> None:
+    """Fill output columns of a row from a categorization result.
+
+    Args:
+        row: CSV row dictionary, updated in place
+        result: Categorization result for the row
+        category_name_map: Mapping of category ID to name
+        category_url_map: Mapping of category ID to URL
+        language_note: Optional note appended to the comment
+    """
+    category_id = str(result.category)
+    row["category_id"] = category_id
+    row["category_url"] = category_url_map.get(category_id, "")
+    row["category_name"] = category_name_map.get(category_id, "")
+
+    # Normalize comment by replacing category IDs with category names
+    comment = normalize_comment_with_names(str(result.comment), category_name_map)
+
+    # Append language note if language was unknown
+    if language_note:
+        comment += language_note
+    row["comment"] = comment
+
+
+def count_row_outcome(summary: dict[str, int | float], row: dict[str, str], language: str) -> None:
+    """Add a written row to the overall and per-language summary counts.
+
+    Args:
+        summary: Summary stats, updated in place
+        row: Output row with category columns applied
+        language: Language code the row was processed in
+    """
+    outcome = "unknown" if row["category_id"].lower() == "unknown" else "categorized"
+    summary[outcome] += 1
+    for key in (f"{language}_rows", f"{language}_{outcome}"):
+        summary[key] = summary.get(key, 0) + 1
+
+
+# Category name and URL maps per language
+CATEGORY_CATALOGS = {
+    "lt": (NAME_MAP_LT, URL_MAP_LT),
+    "lv": (NAME_MAP_LV, URL_MAP_LV),
+    "pl": (NAME_MAP_PL, URL_MAP_PL),
+}
+
+
+def resolve_language(
+    input_path: Path, encoding: str, language: str | None = None
+) -> tuple[str, str]:
+    """Determine the fallback language of a CSV file.
+
+    Rows are identified one by one while processing; this language is used for rows
+    the local identifier cannot place, and is the majority language of the sampled rows.
+
+    Args:
+        input_path: Path to input CSV file
+        encoding: File encoding
+        language: Optional language override applied to every row
+
+    Returns:
+        Tuple of (language code, note appended to comments when the language was defaulted)
+    """
+    if language is not None:
+        logger.info(f"Using language override: {language}")
+        return language, ""
+
+    sample = read_csv_chunk(input_path, offset=0, limit=LANGUAGE_SAMPLE_LINES, encoding=encoding)
+    detected_language = identify_majority_language(extract_product_input(row) for row in sample)
+
+    # Default to Lithuanian if unknown
+    if detected_language == "unknown":
+        logger.warning("Could not detect language, defaulting to Lithuanian (lt)")
+        return "lt", "; Language unidentified, defaulted to Lithuanian."
+
+    logger.info(f"Detected language: {detected_language}")
+    return detected_language, ""
+
+
+def first_leaf_exception(group: BaseExceptionGroup[BaseException]) -> BaseException:
+    """Return the first exception inside a possibly nested exception group.
+
+    Args:
+        group: Exception group raised by a TaskGroup
+
+    Returns:
+        The first exception that is not itself a group
+    """
+    error: BaseException = group
+    while isinstance(error, BaseExceptionGroup):
+        error = error.exceptions[0]
+    return error
+
+
+def resolve_row_language(
+    product: ProductInput, file_language: tuple[str, str], override: str | None = None
+) -> tuple[str, str]:
+    """Determine the language of a single row.
+
+    Args:
+        product: Product input
+        file_language: (language, note) from resolve_language, used when the row is unclear
+        override: Optional language override applied to every row
+
+    Returns:
+        Tuple of (language code, note appended to the comment)
+    """
+    if override is not None:
+        return override, ""
+    # Rows override the file language only with letters of their own language as evidence
+    row_language = identify_product_language(product, file_language[0])
+    if row_language == "unknown":
+        return file_language
+    return row_language, ""
+
+
+async def process_csv_async(  # noqa: PLR0912, PLR0915
     input_path: Path,
-    progress_callback: Callable[[int, int], None] | None = None,
+    progress_callback: Callable[[RunProgress], None] | None = None,
     rate_limit_callback: Callable[[bool], None] | None = None,
-) -> tuple[Path, dict[str, int]]:
+    *,
+    output_path: Path | None = None,
+    model: str | None = None,
+    concurrency: int | None = None,
+    batch_size: int | None = None,
+    language: str | None = None,
+    deadline: float | None = RUN_DEADLINE_SECONDS,
+    control: RunControl | None = None,
+) -> tuple[Path, dict[str, int | float]]:
     """Process CSV file and categorize products using OpenAI API.
 
     Args:
         input_path: Path to input CSV file
-        progress_callback: Optional callback(rows_processed, total_rows)
+        progress_callback: Optional callback receiving RunProgress after each written chunk
         rate_limit_callback: Optional callback(is_waiting) for rate limit status
+        output_path: Output CSV path, defaults to <input>_categorized.csv next to the input
+        model: Model name, defaults to the configured model
+        concurrency: Concurrent API requests, defaults to API_CONCURRENT_BATCH_SIZE
+        batch_size: Rows per CSV read/write chunk, defaults to CSV_BATCH_SIZE
+        language: Language code (lt, lv, pl) skipping language detection
+        deadline: Seconds the run may take; rows not categorized by then are written
+            as unknown and kept resumable. None for no deadline
+        control: Optional pause/cancel switch, may be operated from another thread
 
     Returns:
         Tuple of (output_path, summary_stats)
     """
-    # Create OpenAI client
-    client = AsyncOpenAI(api_key=ACTIVE_CONFIG.openai_api_key)
+    model_name = model or ACTIVE_CONFIG.model_name
+    concurrency = concurrency or API_CONCURRENT_BATCH_SIZE
+    batch_size = batch_size or CSV_BATCH_SIZE
+
+    # Create OpenAI client. SDK retries are off: API_RETRY_POLICY is the only retry layer, so
+    # every attempt passes the rate limiter and 429s reach the rate-limit controller
+    client = AsyncOpenAI(api_key=ACTIVE_CONFIG.openai_api_key, max_retries=0)
 
     encoding = detect_encoding(input_path)
     logger.info(f"Processing {input_path} with encoding {encoding}")
@@ -78,88 +285,447 @@ async def process_csv_async(  # noqa: PLR0915
     validate_csv_columns(input_columns)
     logger.debug(f"CSV columns: {input_columns}")
 
-    # Detect language from sample
-    language_sample = build_language_sample(input_path, encoding)
-    detected_language = await detect_language_async(
-        client, language_sample, ACTIVE_CONFIG.model_name
-    )
-
-    # Default to Lithuanian if unknown
-    if detected_language == "unknown":
-        logger.warning("Could not detect language, defaulting to Lithuanian (lt)")
-        detected_language = "lt"
-        language_note = "; Language unidentified, defaulted to Lithuanian."
-    else:
-        logger.info(f"Detected language: {detected_language}")
-        language_note = ""
-
-    # Select category catalogs based on detected language
-    catalog_map = {
-        "lt": (NAME_MAP_LT, URL_MAP_LT),
-        "lv": (NAME_MAP_LV, URL_MAP_LV),
-        "pl": (NAME_MAP_PL, URL_MAP_PL),
-    }
-    category_name_map, category_url_map = catalog_map.get(
-        detected_language, (NAME_MAP_LT, URL_MAP_LT)
-    )
+    # Each row is identified locally; this is the fallback for rows without a clear language
+    file_language = resolve_language(input_path, encoding, language)
 
     output_columns = [*input_columns, "category_id", "category_url", "category_name", "comment"]
 
-    # Count rows by reading raw lines instead of parsing CSV
-    with input_path.open(encoding=encoding) as f:
-        total_rows = sum(1 for _ in f) - 1  # Subtract 1 for header row
+    # Single linear pass over the input: the reader keeps the file handle open
+    reader = CsvChunkReader(input_path, encoding, batch_size)
 
-    logger.info(f"Total rows to process: {total_rows}")
+    # Rows are counted in a thread alongside processing, so large files do not wait for the
+    # count; the exact total replaces it once the reader reaches the end of the file
+    total_bytes = reader.file_size
+    total_rows: int | None = None
+    count_task: asyncio.Task[int] | None = None
+    if total_bytes <= ROW_COUNT_MAX_BYTES:
+        count_task = asyncio.create_task(asyncio.to_thread(count_csv_rows, input_path))
+    else:
+        logger.info(f"Input is {total_bytes} bytes; reporting progress in bytes instead of rows")
 
-    output_path = input_path.parent / f"{input_path.stem}_categorized.csv"
-    summary: dict[str, int] = {"total": total_rows, "categorized": 0, "unknown": 0}
-    offset = 0
-    is_first_chunk = True
+    if output_path is None:
+        output_path = input_path.parent / f"{input_path.stem}_categorized.csv"
+    summary: dict[str, int | float] = {"total": 0, "categorized": 0, "unknown": 0}
 
-    while offset < total_rows:
-        rows = read_csv_chunk(input_path, offset, CSV_BATCH_SIZE, encoding)
+    # Rows finished by an interrupted earlier run are restored instead of re-requested
+    prompt_versions = {code: get_prompt_version(code) for code in PROMPT_TEMPLATES}
+    journal = CheckpointJournal(
+        get_journal_path(output_path),
+        build_journal_header(input_path, model_name, prompt_versions, language),
+    )
+    completed = journal.load()
+    if completed:
+        logger.info(f"Resuming from checkpoint: {len(completed)} rows already completed")
+    summary["resumed_rows"] = len(completed)
+    journal.open()
+    usage = TokenUsage()
+    limiter = RateLimiter.for_model(model_name)
+    # The controller reports rate-limit pauses through rate_limit_callback, once per pause
+    controller = RateLimitController(concurrency, pause_callback=rate_limit_callback)
+    cache: ResultCache | None = None
+    if RESULT_CACHE_ENABLED:
+        cache = ResultCache(RESULT_CACHE_PATH, RESULT_CACHE_MAX_ENTRIES)
+        # Entries from edited prompt files can never match again; drop them
+        cache.purge_stale(prompt_versions.values())
+    local_hits = 0
+    unfinished_rows = 0
+    deadline_at = None if deadline is None else asyncio.get_running_loop().time() + deadline
+
+    # Sliding-window pipeline: reader -> per-language queues -> N workers -> reorder buffer
+    # -> writer. Workers pick up the next row as soon as they finish one, so a single slow
+    # request never holds back the others, and the router splits the workers between
+    # languages by their share of the rows. The pending budget bounds rows held in memory by
+    # count and size, so memory stays flat however large the input is. In packed mode each
+    # request carries PACK_SIZE rows, so more rows are kept in flight to keep `concurrency`
+    # requests busy
+    packer: PackedCategorizer | None = None
+    if PACK_SIZE > 1:
+        packer = PackedCategorizer(
+            client,
+            model_name,
+            PACK_SIZE,
+            usage=usage,
+            limiter=limiter,
+            controller=controller,
+        )
+    # Stragglers get a duplicate request once they outlive the running p95 latency
+    hedger = RequestHedger() if HEDGE_ENABLED and packer is None else None
+    worker_count = max(1, concurrency) * max(1, PACK_SIZE)
+    window = PendingBudget(
+        max(PIPELINE_MAX_PENDING_ROWS, 2 * worker_count), PIPELINE_MAX_PENDING_BYTES
+    )
+    row_sizes: dict[int, int] = {}
+    router: LanguageRouter[tuple[int, dict[str, str], ProductInput, str]] = LanguageRouter(
+        worker_count
+    )
+    done_queue: asyncio.Queue[tuple[int, str, dict[str, str]] | None] = asyncio.Queue()
+
+    async def read_rows() -> None:
+        nonlocal total_rows
+        index = 0
+        with reader:
+            for rows in reader:
+                for row in rows:
+                    row_sizes[index] = get_row_size(row)
+                    await window.acquire(row_sizes[index])
+                    product = extract_product_input(row)
+                    row_language, language_note = resolve_row_language(
+                        product, file_language, language
+                    )
+                    router.put(row_language, (index, row, product, language_note))
+                    index += 1
+        total_rows = index
+        if reader.fallback_lines:
+            summary["decode_fallback_lines"] = reader.fallback_lines
+        router.close()
+
+    # Identical products share one request: the first row starts it, later rows in flight at
+    # the same moment await the same future, and later ones reuse the recently finished results.
+    # Failures are reported as unknown, so as with the result cache only definite categories
+    # are shared; a duplicate whose request ended unknown issues its own
+    shared_results: dict[str, asyncio.Future[CategoryOutput]] = {}
+    recent_results: OrderedDict[str, CategoryOutput] = OrderedDict()
+    duplicate_rows = 0
+
+    async def categorize(product: ProductInput, row_language: str) -> CategoryOutput:
+        nonlocal duplicate_rows
+        product_key = make_cache_key(
+            product, row_language, model_name, prompt_versions[row_language]
+        )
+        if (recent := recent_results.get(product_key)) is not None:
+            duplicate_rows += 1
+            recent_results.move_to_end(product_key)
+            return recent
+        while (shared := shared_results.get(product_key)) is not None:
+            try:
+                result = await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                # The row that owns the request ran out of time (run deadline): so does
+                # this one, unless this task is itself being cancelled
+                current = asyncio.current_task()
+                if not shared.cancelled() or (current is not None and current.cancelling()):
+                    raise
+                raise TimeoutError from None
+            if result.category.lower() != "unknown":
+                duplicate_rows += 1
+                return result
+
+        future: asyncio.Future[CategoryOutput] = asyncio.get_running_loop().create_future()
+        shared_results[product_key] = future
+        try:
+            result = await resolve(product, row_language, product_key)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Mark retrieved; waiting duplicates still receive it
+            raise
+        finally:
+            # Failed requests are forgotten so later duplicates issue their own request
+            del shared_results[product_key]
+        future.set_result(result)
+        if result.category.lower() != "unknown":
+            recent_results[product_key] = result
+            if len(recent_results) > DEDUP_MAX_ENTRIES:
+                recent_results.popitem(last=False)
+        return result
+
+    async def resolve(product: ProductInput, row_language: str, cache_key: str) -> CategoryOutput:
+        nonlocal local_hits
+        # Rows whose name plainly names one category skip the API entirely
+        if KEYWORD_INDEX_ENABLED and (local := get_keyword_index(row_language).classify(product)):
+            local_hits += 1
+            return local
+        if cache is not None and (cached := cache.get(cache_key)):
+            return cached
+
+        if packer is not None:
+            result = await packer.categorize(product, row_language)
+        else:
+            # AsyncOpenAI client is thread-safe and designed to be shared across concurrent requests
+            result = await categorize_product_async(
+                client,
+                product,
+                model_name,
+                row_language,
+                usage=usage,
+                limiter=limiter,
+                controller=controller,
+                hedger=hedger,
+            )
+        # Failures are reported as unknown too, so only definite categories are cached
+        if cache is not None and result.category.lower() != "unknown":
+            cache.put(cache_key, prompt_versions[row_language], result)
+        return result
+
+    # Rows in flight run under a timeout that expires at the deadline, or at once when
+    # the run is cancelled
+    active_timeouts: set[asyncio.Timeout] = set()
+
+    def stop_now() -> None:
+        nonlocal deadline_at
+        deadline_at = asyncio.get_running_loop().time()
+        for timeout in active_timeouts:
+            timeout.reschedule(deadline_at)
+
+    if control is not None:
+        control.bind()
+        control.add_cancel_callback(stop_now)
+
+    async def categorize_before_deadline(
+        product: ProductInput, row_language: str
+    ) -> CategoryOutput | None:
+        try:
+            async with asyncio.timeout_at(deadline_at) as timeout:
+                active_timeouts.add(timeout)
+                try:
+                    if control is not None:
+                        await control.wait_resumed()
+                    return await categorize(product, row_language)
+                finally:
+                    active_timeouts.discard(timeout)
+        except TimeoutError:
+            return None
+
+    async def categorize_rows() -> None:
+        nonlocal unfinished_rows
+        while (routed := await router.get()) is not None:
+            row_language, (index, row, product, language_note) = routed
+            try:
+                if (restored := completed.pop(index, None)) is not None:
+                    result = restored
+                elif (
+                    categorized := await categorize_before_deadline(product, row_language)
+                ) is not None:
+                    result = categorized
+                    # Failures are reported as unknown too, so only definite categories are
+                    # journaled and a resumed run retries the rest
+                    if result.category.lower() != "unknown":
+                        journal.record(index, result)
+                else:
+                    # Not journaled, so a resumed run categorizes the row
+                    unfinished_rows += 1
+                    reason = (
+                        "Run cancelled"
+                        if control is not None and control.cancelled
+                        else f"Run deadline of {deadline}s reached"
+                    )
+                    result = CategoryOutput(
+                        category="unknown", comment=f"{reason} before categorization"
+                    )
+            finally:
+                router.task_done(row_language)
+            category_name_map, category_url_map = CATEGORY_CATALOGS[row_language]
+            apply_category_result(row, result, category_name_map, category_url_map, language_note)
+            await done_queue.put((index, row_language, row))
+
+    async def write_rows() -> None:
+        pending: dict[int, tuple[str, dict[str, str]]] = {}
+        next_index = 0
+        buffer: list[dict[str, str]] = []
+
+        def flush() -> None:
+            nonlocal total_rows
+            writer.write_rows(buffer)
+            buffer.clear()
+            if total_rows is None and count_task is not None and count_task.done():
+                total_rows = count_task.result()
+            progress = RunProgress(
+                rows_processed=next_index,
+                total_rows=total_rows,
+                bytes_processed=reader.bytes_read,
+                total_bytes=total_bytes,
+            )
+            logger.info(
+                f"Processed {next_index}/{'?' if total_rows is None else total_rows} rows "
+                f"({progress.fraction:.0%})"
+            )
+            if progress_callback:
+                progress_callback(progress)
+
+        while (item := await done_queue.get()) is not None:
+            index, row_language, row = item
+            pending[index] = (row_language, row)
+            # Emit rows in input order as soon as the head of the window is complete
+            while next_index in pending:
+                ready_language, ready = pending.pop(next_index)
+                count_row_outcome(summary, ready, ready_language)
+                buffer.append(ready)
+                window.release(row_sizes.pop(next_index))
+                next_index += 1
+                if len(buffer) >= batch_size:
+                    flush()
+
+        if buffer or not writer.rows_written:
+            flush()
+
+    # The output only appears under its own name once every row has been written
+    writer = CsvOutputWriter(output_path, encoding, output_columns)
+    try:
+        writer.open()
+        async with asyncio.TaskGroup() as pipeline:
+            pipeline.create_task(write_rows())
+            async with asyncio.TaskGroup() as producers:
+                producers.create_task(read_rows())
+                for _ in range(worker_count):
+                    producers.create_task(categorize_rows())
+            await done_queue.put(None)
+        writer.commit()
+    except BaseExceptionGroup as group:
+        # Callers report str(error): surface the error that stopped the pipeline rather
+        # than the task groups wrapping it
+        raise first_leaf_exception(group) from None
+    finally:
+        writer.close()
+        if count_task is not None:
+            count_task.cancel()
+        if packer is not None:
+            await packer.aclose()
+        if cache is not None:
+            cache.close()
+        journal.close()
+
+    if unfinished_rows:
+        logger.warning(f"Run stopped early: {unfinished_rows} rows left uncategorized")
+    else:
+        # The output is complete, so there is nothing left to resume
+        journal.remove()
+
+    rows_read = reader.rows_read
+    summary["total"] = rows_read
+    summary.update(usage.to_summary())
+    summary["duplicate_rows"] = duplicate_rows
+    summary["dedup_ratio"] = round(duplicate_rows / rows_read, 4) if rows_read else 0.0
+    summary["local_hits"] = local_hits
+    summary["local_hit_rate"] = round(local_hits / rows_read, 4) if rows_read else 0.0
+    summary["peak_pending_bytes"] = window.peak_bytes
+    if control is not None and control.cancelled:
+        summary["cancelled_rows"] = unfinished_rows
+    elif deadline is not None:
+        summary["deadline_rows"] = unfinished_rows
+    if hedger is not None:
+        summary.update(hedger.to_summary())
+    if cache is not None:
+        summary["cache_hits"] = cache.hits
+        summary["cache_misses"] = cache.misses
 
-        if not rows:
-            break
+    logger.success(f"Categorization complete. Output: {output_path}")
+    logger.info(f"Summary: {summary}")
 
-        products = [extract_product_input(row) for row in rows]
-        # AsyncOpenAI client is thread-safe and designed to be shared across concurrent requests
-        results: list[CategoryOutput] = await categorize_batch_async(
-            client, products, ACTIVE_CONFIG.model_name, detected_language, rate_limit_callback
-        )
+    return output_path, summary
 
-        for row, result in zip(rows, results, strict=True):
-            category_id = str(result.category)
-            row["category_id"] = category_id
-            row["category_url"] = category_url_map.get(category_id, "")
-            row["category_name"] = category_name_map.get(category_id, "")
 
-            # Normalize comment by replacing category IDs with category names
-            comment = str(result.comment)
-            comment = normalize_comment_with_names(comment, category_name_map)
+async def process_csv_batch_async(
+    input_path: Path,
+    transport: BatchTransport | None = None,
+    progress_callback: Callable[[RunProgress], None] | None = None,
+    status_callback: Callable[[BatchStatus], None] | None = None,
+    *,
+    output_path: Path | None = None,
+    model: str | None = None,
+    batch_size: int | None = None,
+    language: str | None = None,
+    poll_interval: float = BATCH_POLL_INTERVAL_SECONDS,
+) -> tuple[Path, dict[str, int | float]]:
+    """Process CSV file through the offline Batch API.
+
+    Trades latency (up to the batch completion window) for half-price requests that are
+    not subject to the live RPM/TPM limits. The input is read twice: once to serialize
+    the requests, once to write the output in input order.
 
-            # Append language note if language was unknown
-            if language_note:
-                comment += language_note
-            row["comment"] = comment
+    Args:
+        input_path: Path to input CSV file
+        transport: Batch transport, defaults to the OpenAI Batch API
+        progress_callback: Optional callback receiving RunProgress after each written chunk
+        status_callback: Optional callback receiving batch progress after each poll
+        output_path: Output CSV path, defaults to <input>_categorized.csv next to the input
+        model: Model name, defaults to the configured model
+        batch_size: Rows per CSV read/write chunk, defaults to CSV_BATCH_SIZE
+        language: Language code (lt, lv, pl) skipping language detection
+        poll_interval: Seconds between batch status checks
 
-            if category_id.lower() == "unknown":
-                summary["unknown"] += 1
-            else:
-                summary["categorized"] += 1
+    Returns:
+        Tuple of (output_path, summary_stats)
+    """
+    model_name = model or ACTIVE_CONFIG.model_name
+    batch_size = batch_size or CSV_BATCH_SIZE
 
-        write_csv_chunk(output_path, rows, is_first_chunk, encoding, output_columns)
+    # SDK retries are off, as for live runs: run_batch retries each transport call with
+    # API_RETRY_POLICY
+    client = AsyncOpenAI(api_key=ACTIVE_CONFIG.openai_api_key, max_retries=0)
+    if transport is None:
+        transport = OpenAIBatchTransport(client)
+
+    encoding = detect_encoding(input_path)
+    logger.info(f"Processing {input_path} with encoding {encoding} through the Batch API")
 
-        is_first_chunk = False
-        offset += len(rows)
+    input_columns = get_csv_columns(input_path, encoding)
+    validate_csv_columns(input_columns)
 
-        logger.info(f"Processed {offset}/{total_rows} rows")
+    file_language = resolve_language(input_path, encoding, language)
+    output_columns = [*input_columns, "category_id", "category_url", "category_name", "comment"]
 
-        # Call progress callback if provided
-        if progress_callback:
-            progress_callback(offset, total_rows)
+    if output_path is None:
+        output_path = input_path.parent / f"{input_path.stem}_categorized.csv"
+    # Request and result files are kept until the output is written, so nothing paid for
+    # is lost if writing fails
+    work_directory = output_path.with_name(f"{output_path.stem}.batch")
+
+    total_rows = 0
+
+    def read_products() -> Iterator[tuple[int, ProductInput, str]]:
+        nonlocal total_rows
+        with CsvChunkReader(input_path, encoding, batch_size) as reader:
+            for index, row in enumerate(itertools.chain.from_iterable(reader)):
+                total_rows = index + 1
+                product = extract_product_input(row)
+                row_language, _ = resolve_row_language(product, file_language, language)
+                yield index, product, row_language
+
+    batch_files = write_batch_files(read_products(), work_directory, model_name)
+    result_files = await run_batch(
+        transport, batch_files, work_directory, poll_interval, status_callback
+    )
 
-    logger.success(f"Categorization complete. Output: {output_path}")
+    usage = TokenUsage()
+    results = load_batch_results(result_files, usage)
+    missing = CategoryOutput(category="unknown", comment="No batch result returned")
+
+    summary: dict[str, int | float] = {"total": total_rows, "categorized": 0, "unknown": 0}
+    with (
+        CsvChunkReader(input_path, encoding, batch_size) as reader,
+        CsvOutputWriter(output_path, encoding, output_columns) as writer,
+    ):
+        for rows in reader:
+            for index, row in enumerate(rows, start=reader.rows_read - len(rows)):
+                result = results.pop(index, missing)
+                row_language, language_note = resolve_row_language(
+                    extract_product_input(row), file_language, language
+                )
+                category_name_map, category_url_map = CATEGORY_CATALOGS[row_language]
+                apply_category_result(
+                    row, result, category_name_map, category_url_map, language_note
+                )
+                count_row_outcome(summary, row, row_language)
+            writer.write_rows(rows)
+            if progress_callback:
+                progress_callback(
+                    RunProgress(
+                        rows_processed=reader.rows_read,
+                        total_rows=total_rows,
+                        bytes_processed=reader.bytes_read,
+                        total_bytes=reader.file_size,
+                    )
+                )
+        writer.commit()
+
+    shutil.rmtree(work_directory, ignore_errors=True)
+
+    summary["batch_files"] = len(batch_files)
+    summary.update(usage.to_summary())
+
+    logger.success(f"Batch categorization complete. Output: {output_path}")
     logger.info(f"Summary: {summary}")
 
     return output_path, summary
@@ -1,43 +1,209 @@
 """CSV utility functions for reading, writing, and validating CSV files."""
 
+import codecs
 import csv
 import itertools
+import os
+import re
+import sys
+from collections.abc import Iterator
 from pathlib import Path
+from types import TracebackType
+from typing import IO, Self
 
 from loguru import logger
 
-from src.config import ENCODINGS, LANGUAGE_SAMPLE_LINES, REQUIRED_COLUMNS
+from src.config import (
+    CSV_FIELD_SIZE_LIMIT,
+    ENCODING_SAMPLE_BYTES,
+    ENCODING_SWITCH_LINES,
+    ENCODINGS,
+    OUTPUT_BUFFER_BYTES,
+    OUTPUT_FLUSH_ROWS,
+    REQUIRED_COLUMNS,
+    ROW_COUNT_BLOCK_BYTES,
+)
 from src.llm_service import ProductInput
 
+# C1 control characters (U+0080-U+009F) almost never occur in real text; they appear
+# when UTF-8 or cp1252 bytes are decoded with a single-byte encoding such as latin1
+_C1_CONTROL_PATTERN = re.compile("[\x80-\x9f]")
+
+# Exports embed whole HTML pages in ProgramDescription
+csv.field_size_limit(CSV_FIELD_SIZE_LIMIT)
+
 
 def detect_encoding(file_path: Path) -> str:
-    """Detect CSV file encoding using fallback strategy.
+    """Detect CSV file encoding from a single read of the file's beginning.
+
+    The first ENCODING_SAMPLE_BYTES are decoded with each candidate in ENCODINGS; the
+    candidate decoding them with the fewest C1 control characters wins, earlier
+    candidates winning ties. UTF-8 stays a candidate despite a few undecodable bytes
+    as long as its valid multi-byte characters outnumber them, since other encodings
+    rarely produce valid UTF-8 sequences by chance. Bytes the chosen encoding cannot
+    decode are handled by DecodedLines.
 
     Args:
         file_path: Path to the CSV file
 
     Returns:
-        Detected encoding name
+        Detected encoding name ("utf-8-sig" for UTF-8 with a byte order mark)
 
     Raises:
         ValueError: If all encodings fail
     """
+    with file_path.open("rb") as f:
+        sample = f.read(ENCODING_SAMPLE_BYTES)
+    if sample.startswith(codecs.BOM_UTF8):
+        logger.debug("Detected encoding: utf-8-sig")
+        return "utf-8-sig"
+
+    scores: dict[str, int] = {}
     for encoding in ENCODINGS:
+        # Not final: the sample may end inside a multi-byte character
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        text = decoder.decode(sample, final=False)
+        invalid = text.count("\ufffd")
+        if invalid:
+            non_ascii = sum(1 for char in text if char > "\x7f") - invalid
+            if codecs.lookup(encoding).name != "utf-8" or non_ascii <= invalid:
+                continue
+        scores[encoding] = len(_C1_CONTROL_PATTERN.findall(text))
+
+    if not scores:
+        msg = f"Failed to detect encoding for {file_path}. Tried: {ENCODINGS}"
+        raise ValueError(msg)
+    encoding = min(scores, key=scores.__getitem__)
+    logger.debug(f"Detected encoding: {encoding}")
+    return encoding
+
+
+def count_csv_rows(file_path: Path, block_size: int = ROW_COUNT_BLOCK_BYTES) -> int:
+    """Count data rows of a CSV file without decoding or parsing it.
+
+    Only newlines outside quoted fields end a row, so descriptions spanning several
+    lines count once. Blocks without quotes are counted with a single bytes.count.
+    All supported encodings are ASCII-compatible, so quote and newline bytes are
+    never part of a multi-byte character.
+
+    Args:
+        file_path: Path to the CSV file
+        block_size: Bytes read per block
+
+    Returns:
+        Number of rows after the header
+    """
+    records = 0
+    in_quotes = False
+    last_byte = b"\n"
+    with file_path.open("rb") as f:
+        while block := f.read(block_size):
+            if not in_quotes and b'"' not in block:
+                records += block.count(b"\n")
+            else:
+                # Parts alternate between outside and inside quotes; an escaped quote ("")
+                # leaves an empty part inside and keeps the alternation intact
+                parts = block.split(b'"')
+                records += b"".join(parts[int(in_quotes) :: 2]).count(b"\n")
+                in_quotes ^= len(parts) % 2 == 0
+            last_byte = block[-1:]
+    if last_byte != b"\n":
+        records += 1  # Last row without a trailing newline
+    return max(records - 1, 0)
+
+
+class DecodedLines:
+    """Text lines of a file decoded from a single binary pass, tolerating stray bytes.
+
+    Lines the file encoding cannot decode, such as a cp1252 row in a UTF-8 export, are
+    decoded with the first other candidate in ENCODINGS that can (or with replacement
+    characters if none can) instead of failing the run. After ENCODING_SWITCH_LINES
+    consecutive lines needed the same fallback, it becomes the file encoding.
+    All supported encodings are ASCII-compatible, so lines split on b"\\n" never cut
+    a character and every line decodes independently.
+    """
+
+    def __init__(
+        self, file_path: Path, encoding: str, switch_after: int = ENCODING_SWITCH_LINES
+    ) -> None:
+        """Open the file.
+
+        Args:
+            file_path: Path to the file
+            encoding: Encoding detected for the file
+            switch_after: Consecutive fallback lines after which the encoding is switched
+        """
+        self.file_path = file_path
+        self.encoding = encoding
+        self.switch_after = switch_after
+        self.line_number = 0
+        self.bytes_read = 0
+        self.fallback_lines = 0
+        self._file = file_path.open("rb")
+        self._lines = iter(self._file)
+        self._streak_encoding: str | None = None
+        self._streak = 0
+        self._streak_end = 0
+
+    def __iter__(self) -> Self:
+        return self
+
+    def __next__(self) -> str:
+        raw = next(self._lines)
+        self.line_number += 1
+        self.bytes_read += len(raw)
         try:
-            with file_path.open(encoding=encoding) as f:
-                # Try to read first few lines to validate encoding
-                for _ in range(10):
-                    line = f.readline()
-                    if not line:
-                        break
-        except (UnicodeDecodeError, UnicodeError):
-            continue
+            return raw.decode(self.encoding)
+        except UnicodeDecodeError:
+            return self._decode_fallback(raw)
+
+    def _decode_fallback(self, raw: bytes) -> str:
+        self.fallback_lines += 1
+        for encoding in ENCODINGS:
+            if encoding == self.encoding:
+                continue
+            try:
+                text = raw.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+            break
         else:
-            logger.debug(f"Detected encoding: {encoding}")
-            return encoding
-
-    msg = f"Failed to detect encoding for {file_path}. Tried: {ENCODINGS}"
-    raise ValueError(msg)
+            encoding = self.encoding
+            text = raw.decode(encoding, errors="replace")
+        logger.warning(
+            f"{self.file_path.name} line {self.line_number} is not valid {self.encoding}, "
+            f"decoded as {encoding}" + (" with replacements" if encoding == self.encoding else "")
+        )
+
+        consecutive = self._streak_end == self.line_number - 1
+        if consecutive and encoding == self._streak_encoding:
+            self._streak += 1
+        else:
+            self._streak_encoding, self._streak = encoding, 1
+        self._streak_end = self.line_number
+        if self._streak >= self.switch_after and encoding != self.encoding:
+            logger.warning(
+                f"Switching {self.file_path.name} from {self.encoding} to {encoding} "
+                f"at line {self.line_number}"
+            )
+            self.encoding = encoding
+            self._streak = 0
+        return text
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
 
 
 def read_csv_chunk(file_path: Path, offset: int, limit: int, encoding: str) -> list[dict[str, str]]:
@@ -52,11 +218,98 @@ def read_csv_chunk(file_path: Path, offset: int, limit: int, encoding: str) -> l
     Returns:
         List of row dictionaries
     """
-    with file_path.open(encoding=encoding, newline="") as f:
-        reader = csv.DictReader(f)
+    with DecodedLines(file_path, encoding) as lines:
+        reader = csv.DictReader(lines)
         return list(itertools.islice(reader, offset, offset + limit))
 
 
+class CsvChunkReader:
+    """Stream successive row chunks from a CSV file in a single linear pass.
+
+    Unlike read_csv_chunk, the file handle and csv.DictReader stay open between
+    chunks, so each chunk costs the same regardless of how far into the file it is.
+    """
+
+    def __init__(self, file_path: Path, encoding: str, chunk_size: int) -> None:
+        """Initialize the reader.
+
+        Args:
+            file_path: Path to CSV file
+            encoding: File encoding
+            chunk_size: Maximum rows per chunk
+        """
+        if chunk_size < 1:
+            msg = f"chunk_size must be positive, got {chunk_size}"
+            raise ValueError(msg)
+
+        self.file_path = file_path
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.rows_read = 0
+        self.fallback_lines = 0
+        self._closed_bytes_read = 0
+        self._file: DecodedLines | None = None
+        self._reader: csv.DictReader[str] | None = None
+
+    def _get_reader(self) -> csv.DictReader[str]:
+        """Return the open CSV reader, opening the file on first use."""
+        if self._reader is None:
+            self._file = DecodedLines(self.file_path, self.encoding)
+            self._reader = csv.DictReader(self._file)
+        return self._reader
+
+    @property
+    def file_size(self) -> int:
+        """Size of the file in bytes."""
+        return self.file_path.stat().st_size
+
+    @property
+    def bytes_read(self) -> int:
+        """Bytes of the file consumed so far, including the header."""
+        if self._file is None:
+            return self._closed_bytes_read
+        return self._closed_bytes_read + self._file.bytes_read
+
+    def open(self) -> None:
+        """Open the underlying file and CSV reader."""
+        self._get_reader()
+
+    def close(self) -> None:
+        """Close the underlying file."""
+        if self._file is not None:
+            self.fallback_lines += self._file.fallback_lines
+            self._closed_bytes_read += self._file.bytes_read
+            self._file.close()
+            self._file = None
+            self._reader = None
+
+    def read_chunk(self) -> list[dict[str, str]]:
+        """Read the next chunk of rows.
+
+        Returns:
+            List of row dictionaries, empty when the file is exhausted
+        """
+        rows = list(itertools.islice(self._get_reader(), self.chunk_size))
+        self.rows_read += len(rows)
+        return rows
+
+    def __enter__(self) -> Self:
+        self.open()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[list[dict[str, str]]]:
+        while rows := self.read_chunk():
+            yield rows
+
+
 def get_csv_columns(file_path: Path, encoding: str) -> list[str]:
     """Get column names from CSV header.
 
@@ -67,8 +320,8 @@ def get_csv_columns(file_path: Path, encoding: str) -> list[str]:
     Returns:
         List of column names
     """
-    with file_path.open(encoding=encoding, newline="") as f:
-        reader = csv.DictReader(f)
+    with DecodedLines(file_path, encoding) as lines:
+        reader = csv.DictReader(lines)
         return list(reader.fieldnames) if reader.fieldnames else []
 
 
@@ -87,6 +340,18 @@ def validate_csv_columns(columns: list[str]) -> None:
         raise ValueError(msg)
 
 
+def get_row_size(row: dict[str, str]) -> int:
+    """Return the memory taken by the field values of a row.
+
+    Args:
+        row: CSV row dictionary
+
+    Returns:
+        Size of the values in bytes
+    """
+    return sum(sys.getsizeof(value) for value in row.values())
+
+
 def extract_product_input(row: dict[str, str]) -> ProductInput:
     """Extract ProductInput from CSV row.
 
@@ -103,48 +368,101 @@ def extract_product_input(row: dict[str, str]) -> ProductInput:
     )
 
 
-def build_language_sample(file_path: Path, encoding: str) -> str:
-    """Build text sample from first N rows for language detection.
+class CsvOutputWriter:
+    """Output CSV written through one buffered handle and published atomically.
 
-    Args:
-        file_path: Path to CSV file
-        encoding: File encoding
-
-    Returns:
-        Combined sample text from first N rows
-    """
-    rows = read_csv_chunk(file_path, offset=0, limit=LANGUAGE_SAMPLE_LINES, encoding=encoding)
-    samples = []
-    for row in rows:
-        product = extract_product_input(row)
-        # Combine name, description, and place with spaces
-        sample_text = f"{product.program_name} {product.program_description} {product.about_place}"
-        samples.append(sample_text.strip())
-    return " | ".join(samples)
-
-
-def write_csv_chunk(
-    output_path: Path,
-    rows: list[dict[str, str]],
-    is_first_chunk: bool,
-    encoding: str,
-    output_columns: list[str],
-) -> None:
-    """Write a chunk of rows to output CSV.
-
-    Args:
-        output_path: Output file path
-        rows: Row dictionaries to write
-        is_first_chunk: Whether to write header
-        encoding: File encoding
-        output_columns: Column names
+    Rows go to a ".partial" file next to the output, which is flushed and fsynced every
+    flush_rows rows. commit renames it to the output path, so anything polling the
+    output directory only ever sees a complete file. Closing without commit (the run
+    failed) removes the partial file.
     """
-    mode = "w" if is_first_chunk else "a"
-
-    with output_path.open(mode=mode, encoding=encoding, newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=output_columns)
-
-        if is_first_chunk:
-            writer.writeheader()
 
-        writer.writerows(rows)
+    def __init__(
+        self,
+        output_path: Path,
+        encoding: str,
+        output_columns: list[str],
+        buffer_bytes: int = OUTPUT_BUFFER_BYTES,
+        flush_rows: int = OUTPUT_FLUSH_ROWS,
+    ) -> None:
+        """Initialize the writer.
+
+        Args:
+            output_path: Output file path
+            encoding: File encoding
+            output_columns: Column names
+            buffer_bytes: Write buffer size
+            flush_rows: Rows between flush + fsync
+        """
+        self.output_path = output_path
+        self.partial_path = output_path.with_name(f"{output_path.name}.partial")
+        self.encoding = encoding
+        self.output_columns = output_columns
+        self.buffer_bytes = buffer_bytes
+        self.flush_rows = flush_rows
+        self.rows_written = 0
+        self._file: IO[str] | None = None
+        self._writer: csv.DictWriter[str] | None = None
+        self._unflushed = 0
+
+    def open(self) -> None:
+        """Create the partial file and write the header."""
+        # Rows repaired with a fallback encoding may hold characters the output encoding lacks
+        self._file = self.partial_path.open(
+            "w", encoding=self.encoding, errors="replace", newline="", buffering=self.buffer_bytes
+        )
+        self._writer = csv.DictWriter(self._file, fieldnames=self.output_columns)
+        self._writer.writeheader()
+
+    def write_rows(self, rows: list[dict[str, str]]) -> None:
+        """Append rows to the partial file.
+
+        Args:
+            rows: Row dictionaries to write
+        """
+        if self._writer is None:
+            msg = "Output writer is not open"
+            raise RuntimeError(msg)
+        self._writer.writerows(rows)
+        self.rows_written += len(rows)
+        self._unflushed += len(rows)
+        if self._unflushed >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """Flush buffered rows and fsync them to disk."""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unflushed = 0
+
+    def commit(self) -> None:
+        """Flush, close and move the partial file to the output path."""
+        if self._file is None:
+            msg = "Output writer is not open"
+            raise RuntimeError(msg)
+        self.flush()
+        self._file.close()
+        self._file = None
+        self._writer = None
+        self.partial_path.replace(self.output_path)
+
+    def close(self) -> None:
+        """Close the writer, discarding the partial file unless committed."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+            self.partial_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> Self:
+        self.open()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
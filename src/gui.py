@@ -10,7 +10,8 @@ from tkinter import filedialog, messagebox, ttk
 from loguru import logger
 
 from src.config import ACTIVE_CONFIG, AVAILABLE_MODELS, Config, load_config, save_config
-from src.core import process_csv_async
+from src.core import RunProgress, process_csv_async
+from src.run_control import RunControl
 
 
 def prompt_for_config(root: tk.Tk | None = None) -> Config | None:  # noqa: PLR0915, ARG001
@@ -155,6 +156,7 @@ class ProductCategorizerApp:
         # Application state
         self.selected_file: Path | None = None
         self.is_processing = False
+        self.run_control: RunControl | None = None
 
         # Progress tracking labels (initialized later in _build_ui)
         self.time_elapsed_label: tk.Label | None = None
@@ -281,6 +283,28 @@ class ProductCategorizerApp:
         )
         self.run_button.pack(side=tk.LEFT, padx=(0, 10))
 
+        self.pause_button = tk.Button(
+            button_frame,
+            text="Pause",
+            command=self._on_pause_resume,
+            font=("Helvetica", 10),
+            padx=20,
+            pady=12,
+            state=tk.DISABLED,
+        )
+        self.pause_button.pack(side=tk.LEFT, padx=(0, 10))
+
+        self.cancel_button = tk.Button(
+            button_frame,
+            text="Cancel",
+            command=self._on_cancel,
+            font=("Helvetica", 10),
+            padx=20,
+            pady=12,
+            state=tk.DISABLED,
+        )
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 10))
+
         settings_button = tk.Button(
             button_frame,
             text="Settings",
@@ -332,7 +356,10 @@ class ProductCategorizerApp:
 
         # Start processing in background thread
         self.is_processing = True
+        self.run_control = RunControl()
         self.run_button.config(state=tk.DISABLED, text="Processing...")
+        self.pause_button.config(state=tk.NORMAL, text="Pause")
+        self.cancel_button.config(state=tk.NORMAL)
         self._update_status(f"\n{'=' * 50}")
         self._update_status(f"Starting categorization of {self.selected_file.name}...")
         self._update_status(f"Using model: {ACTIVE_CONFIG.model_name}")
@@ -350,17 +377,51 @@ class ProductCategorizerApp:
         thread = threading.Thread(target=run_in_thread, daemon=True)
         thread.start()
 
-    def _update_progress(self, processed: int, total: int) -> None:
+    def _on_pause_resume(self) -> None:
+        """Handle Pause/Resume button click."""
+        if self.run_control is None:
+            return
+        if self.run_control.paused:
+            self.run_control.resume()
+            self.pause_button.config(text="Pause")
+            self._update_status("Resumed.")
+        else:
+            self.run_control.pause()
+            self.pause_button.config(text="Resume")
+            self._update_status("Paused. Requests in flight will finish...")
+
+    def _on_cancel(self) -> None:
+        """Handle Cancel button click."""
+        if self.run_control is None:
+            return
+        self.run_control.cancel()
+        self.pause_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.DISABLED)
+        self._update_status("Cancelling... Remaining rows will be written as unknown.")
+
+    def _reset_buttons(self) -> None:
+        """Restore buttons to their idle state."""
+        self.is_processing = False
+        self.run_control = None
+        self.run_button.config(state=tk.NORMAL, text="Run Categorization")
+        self.pause_button.config(state=tk.DISABLED, text="Pause")
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def _update_progress(self, progress: RunProgress) -> None:
         """Update progress label (thread-safe).
 
         Args:
-            processed: Number of rows processed
-            total: Total number of rows
+            progress: Rows and input bytes processed so far
         """
+        if progress.total_rows is None:
+            # Rows not counted (yet): the file share read so far stands in for the total
+            text = f"{progress.rows_processed} rows processed ({progress.fraction:.0%} of file)"
+        else:
+            text = f"{progress.rows_processed}/{progress.total_rows} rows processed"
 
         def update() -> None:
             if self.progress_label:
-                self.progress_label.config(text=f"{processed}/{total} rows processed")
+                self.progress_label.config(text=text)
 
         self.root.after(0, update)
 
@@ -415,21 +476,21 @@ class ProductCategorizerApp:
                 self.selected_file,
                 progress_callback=self._update_progress,
                 rate_limit_callback=self._update_rate_limit_status,
+                control=self.run_control,
             )
         )
 
         # Update UI on success (schedule on main thread)
         self.root.after(0, self._on_processing_complete, output_path, summary)
 
-    def _on_processing_complete(self, output_path: Path, summary: dict[str, int]) -> None:
+    def _on_processing_complete(self, output_path: Path, summary: dict[str, int | float]) -> None:
         """Handle successful processing completion.
 
         Args:
             output_path: Path to output CSV file
             summary: Processing summary statistics
         """
-        self.is_processing = False
-        self.run_button.config(state=tk.NORMAL, text="Run Categorization")
+        self._reset_buttons()
 
         # Stop timer
         self._stop_timer()
@@ -442,12 +503,35 @@ class ProductCategorizerApp:
         if self.rate_limit_label:
             self.rate_limit_label.config(text="")
 
-        self._update_status("\n✓ Categorization complete!")
+        cancelled_rows = summary.get("cancelled_rows")
+        if cancelled_rows is not None:
+            self._update_status("\n■ Categorization cancelled.")
+        else:
+            self._update_status("\n✓ Categorization complete!")
         self._update_status(f"Output file: {output_path}")
         self._update_status("\nSummary:")
         self._update_status(f"  Total rows: {summary['total']}")
         self._update_status(f"  Categorized: {summary['categorized']}")
         self._update_status(f"  Unknown: {summary['unknown']}")
+        if "cache_hits" in summary:
+            self._update_status(f"  From cache: {summary['cache_hits']}")
+        if "input_tokens" in summary:
+            self._update_status(
+                f"  Input tokens: {summary['input_tokens']} "
+                f"(cached: {summary['cached_input_tokens']})"
+            )
+        if cancelled_rows is not None:
+            self._update_status(f"  Not categorized: {cancelled_rows}")
+            self._update_status("Run again on the same file to resume the remaining rows.")
+            messagebox.showinfo(
+                "Cancelled",
+                f"Categorization cancelled.\n\n"
+                f"Categorized: {summary['categorized']}\n"
+                f"Not categorized: {cancelled_rows}\n\n"
+                f"Partial output saved to:\n{output_path}\n\n"
+                f"Run again on the same file to resume.",
+            )
+            return
 
         messagebox.showinfo(
             "Success",
@@ -464,8 +548,7 @@ class ProductCategorizerApp:
         Args:
             error_message: Error message to display
         """
-        self.is_processing = False
-        self.run_button.config(state=tk.NORMAL, text="Run Categorization")
+        self._reset_buttons()
 
         # Stop timer
         self._stop_timer()
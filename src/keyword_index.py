@@ -0,0 +1,188 @@
+"""Local keyword/alias index for categorizing obvious products without an API call.
+
+Phrases come from the category trees (*_categories_tree.md), the category name maps and
+the curated aliases in categories.aliases. Text is diacritic-folded, lowercased and
+stemmed by truncation (see src.category_tree), so "Šuolis parašiutu" and
+"suolis parasiutu" match the same entry.
+"""
+
+from functools import lru_cache
+
+from categories.aliases import EXCLUDED_CATEGORY_IDS
+from loguru import logger
+from pydantic import BaseModel
+
+from src.category_tree import (
+    TREE_FILES,
+    get_category_phrases,
+    load_category_tree,
+    stem_tokens,
+)
+from src.config import KEYWORD_MIN_COVERAGE
+from src.llm_service import CategoryOutput, ProductInput
+
+# Single-token phrases shorter than this are too likely to appear by accident
+MIN_SINGLE_TOKEN_CHARS = 3
+
+
+class KeywordMatch(BaseModel):
+    """Category identified by the keyword index."""
+
+    category: str
+    phrase: str
+    coverage: float
+
+
+class KeywordIndex:
+    """Phrase index mapping stemmed token sequences to category IDs."""
+
+    def __init__(
+        self,
+        phrases: dict[str, set[str]],
+        parents: dict[str, str | None],
+        min_coverage: float = KEYWORD_MIN_COVERAGE,
+    ) -> None:
+        """Build the index.
+
+        Args:
+            phrases: Raw phrase -> category IDs it identifies
+            parents: Category ID -> parent category ID
+            min_coverage: Fraction of name tokens matched phrases must cover for a hit
+        """
+        self.parents = parents
+        self.min_coverage = min_coverage
+        # Top-level categories with subcategories are sections too broad to answer locally
+        parent_ids = {parent for parent in parents.values() if parent is not None}
+        self._sections = {category for category in parent_ids if parents.get(category) is None}
+        self._phrases: dict[tuple[str, ...], set[str]] = {}
+        self._labels: dict[tuple[str, ...], str] = {}
+        for phrase, category_ids in phrases.items():
+            key = stem_tokens(phrase)
+            if not key or (len(key) == 1 and len(key[0]) < MIN_SINGLE_TOKEN_CHARS):
+                continue
+            self._phrases.setdefault(key, set()).update(category_ids)
+            self._labels.setdefault(key, phrase)
+        self._max_phrase_tokens = max((len(key) for key in self._phrases), default=0)
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    @classmethod
+    def for_language(cls, language: str) -> "KeywordIndex":
+        """Build the index of a language from its tree file, name map and aliases.
+
+        Args:
+            language: Language code (lt, lv, pl)
+
+        Returns:
+            KeywordIndex (empty when the tree file is not available)
+        """
+        nodes = load_category_tree(language)
+        if not nodes:
+            logger.warning(f"Keyword index disabled for {language}: no category tree")
+            return cls({}, {})
+
+        excluded = EXCLUDED_CATEGORY_IDS.get(language, set())
+        phrases: dict[str, set[str]] = {}
+        for category_id, category_phrases in get_category_phrases(language).items():
+            if category_id in excluded:
+                continue
+            for phrase in category_phrases:
+                phrases.setdefault(phrase, set()).add(category_id)
+
+        parents = {node.category_id: node.parent_id for node in nodes}
+        return cls(phrases, parents)
+
+    def _ancestors(self, category_id: str) -> set[str]:
+        ancestors: set[str] = set()
+        parent = self.parents.get(category_id)
+        while parent is not None and parent not in ancestors:
+            ancestors.add(parent)
+            parent = self.parents.get(parent)
+        return ancestors
+
+    def match(self, product: ProductInput) -> KeywordMatch | None:
+        """Find the single category named by the product name, if any.
+
+        Matched phrases contained in a longer match are ignored. The match is accepted
+        only when the remaining phrases point to one category (or to a category and its
+        ancestors, in which case the most specific wins) and cover at least
+        min_coverage of the name. A name matching only a top-level section with
+        subcategories ("SPA ir masažai") is left to the model to pick the subcategory.
+
+        Args:
+            product: Product to classify
+
+        Returns:
+            KeywordMatch, or None when the product is ambiguous or not covered
+        """
+        tokens = stem_tokens(product.program_name)
+        if not tokens or not self._phrases:
+            return None
+
+        spans: list[tuple[int, int]] = []
+        for start in range(len(tokens)):
+            for length in range(min(self._max_phrase_tokens, len(tokens) - start), 0, -1):
+                if tokens[start : start + length] in self._phrases:
+                    spans.append((start, start + length))
+                    break
+
+        # Drop matches nested inside a longer one ("Skrydis" inside "Skrydis oro balionu")
+        maximal = [
+            span
+            for span in spans
+            if not any(o != span and o[0] <= span[0] and span[1] <= o[1] for o in spans)
+        ]
+        if not maximal:
+            return None
+
+        candidates: set[str] = set()
+        for start, end in maximal:
+            candidates |= self._phrases[tokens[start:end]]
+        specific = [c for c in candidates if not any(c in self._ancestors(o) for o in candidates)]
+        if len(specific) != 1:
+            return None
+        category = specific[0]
+        if category in self._sections or not candidates - {category} <= self._ancestors(category):
+            return None
+
+        covered = {position for start, end in maximal for position in range(start, end)}
+        coverage = len(covered) / len(tokens)
+        if coverage < self.min_coverage:
+            return None
+
+        start, end = max(maximal, key=lambda span: span[1] - span[0])
+        return KeywordMatch(
+            category=category, phrase=self._labels[tokens[start:end]], coverage=coverage
+        )
+
+    def classify(self, product: ProductInput) -> CategoryOutput | None:
+        """Categorize a product locally when the keyword match is unambiguous.
+
+        Args:
+            product: Product to classify
+
+        Returns:
+            CategoryOutput, or None when the product should be sent to the model
+        """
+        match = self.match(product)
+        if match is None:
+            return None
+        return CategoryOutput(
+            category=match.category,
+            comment=f'Chosen {match.category}; local keyword match on "{match.phrase}", '
+            "no model confidence.",
+        )
+
+
+@lru_cache(maxsize=len(TREE_FILES))
+def get_keyword_index(language: str) -> KeywordIndex:
+    """Return the keyword index of a language, built once per process.
+
+    Args:
+        language: Language code (lt, lv, pl)
+
+    Returns:
+        Shared KeywordIndex
+    """
+    return KeywordIndex.for_language(language)
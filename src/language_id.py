@@ -0,0 +1,237 @@
+"""Offline language identification for Lithuanian, Latvian and Polish product rows.
+
+A multinomial naive Bayes model over character 1-3-grams, trained on the category name
+maps plus a short seed text of everyday words per language. The languages are told apart
+mostly by diacritics (ė ų š / ā ē ī ņ / ą ę ł ż) and characteristic endings (-as -ų /
+-s -u -ā / -ie -ów), so short product names are enough in most cases.
+"""
+
+import math
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
+
+from src.category_tree import NAME_MAPS, fold_text
+from src.config import LANGUAGE_ID_MAX_CHARS, LANGUAGE_ID_MIN_MARGIN
+from src.llm_service import ProductInput
+
+NGRAM_SIZES = (1, 2, 3)
+
+# Letters each language writes with. Text in none of the three languages (English names,
+# place names) still scores highest under one of them, so a row only counts as evidence
+# against the file language when it contains letters of the language it was scored as
+LANGUAGE_LETTERS = {
+    "lt": frozenset("ąčęėįšųūž"),
+    "lv": frozenset("āčēģīķļņšūž"),
+    "pl": frozenset("ąćęłńóśźż"),
+}
+
+# Common words of gift voucher texts, complementing the category names
+SEED_TEXTS = {
+    "lt": (
+        "ir su į už iš per prie dviem vienam asmeniui dviems asmenims valandų minučių "
+        "dovanų čekis pramoga su instruktoriumi nakvynė pusryčiai vakarienė masažas "
+        "kaina galioja mėnesių trukmė vieta įspūdis pasiūlymas kelionė romantiška "
+        "Vilnius Vilniuje Kaunas Kaune Klaipėda Palanga Druskininkai Trakai Šiauliai"
+    ),
+    "lv": (
+        "un ar par uz no pie divām vienai personai divām personām stundas minūtes "
+        "dāvanu karte izklaide ar instruktoru nakšņošana brokastis vakariņas masāža "
+        "cena derīgs mēneši ilgums vieta piedzīvojums piedāvājums ceļojums romantiskas "
+        "Rīga Rīgā Jūrmala Jūrmalā Liepāja Sigulda Cēsis Daugavpils Ventspils"
+    ),
+    "pl": (
+        "i z w na do dla przy dwojga jednej osoby dwóch osób godziny minut "
+        "bon podarunkowy atrakcja z instruktorem nocleg śniadanie kolacja masaż "
+        "cena ważny miesięcy czas trwania miejsce przeżycie oferta podróż romantyczna "
+        "Warszawa Warszawie Kraków Krakowie Gdańsk Wrocław Poznań Łódź Zakopane"
+    ),
+}
+
+
+def extract_ngrams(text: str) -> list[str]:
+    """Split text into lowercased character n-grams.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Character 1-3-grams, with words padded by spaces
+    """
+    padded = f" {' '.join(text.lower().split())} "
+    return [
+        padded[start : start + size]
+        for size in NGRAM_SIZES
+        for start in range(len(padded) - size + 1)
+    ]
+
+
+class LanguageIdentifier:
+    """Character n-gram naive Bayes language identifier."""
+
+    def __init__(
+        self,
+        corpora: Mapping[str, Iterable[str]],
+        min_margin: float = LANGUAGE_ID_MIN_MARGIN,
+        max_chars: int = LANGUAGE_ID_MAX_CHARS,
+    ) -> None:
+        """Train the model.
+
+        Args:
+            corpora: Language code -> training texts
+            min_margin: Log-likelihood lead the best language needs over the runner-up
+            max_chars: Characters of input considered, bounding the cost per call
+        """
+        self.min_margin = min_margin
+        self.max_chars = max_chars
+        counts = {language: Counter[str]() for language in corpora}
+        for language, texts in corpora.items():
+            for text in texts:
+                counts[language].update(extract_ngrams(text))
+
+        self.languages = tuple(counts)
+        vocabulary = set().union(*counts.values())
+        # Add-one smoothing; grams unseen in a language get its default log probability
+        denominators = {
+            language: sum(counter.values()) + len(vocabulary)
+            for language, counter in counts.items()
+        }
+        self._default = tuple(math.log(1 / denominators[language]) for language in self.languages)
+        self._log_probs = {
+            gram: tuple(
+                math.log((counts[language][gram] + 1) / denominators[language])
+                for language in self.languages
+            )
+            for gram in vocabulary
+        }
+
+    @classmethod
+    def default(cls) -> "LanguageIdentifier":
+        """Train on the category name maps and seed texts of lt, lv and pl.
+
+        Every text is also added without diacritics, since many exports are typed
+        without them.
+
+        Returns:
+            LanguageIdentifier
+        """
+        return cls(
+            {
+                language: [
+                    text
+                    for text in [*name_map.values(), SEED_TEXTS[language]]
+                    for text in (text, fold_text(text))
+                ]
+                for language, name_map in NAME_MAPS.items()
+            }
+        )
+
+    def scores(self, text: str) -> dict[str, float]:
+        """Compute the log-likelihood of text under each language.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Language code -> log-likelihood
+        """
+        totals = [0.0] * len(self.languages)
+        for gram in extract_ngrams(text[: self.max_chars]):
+            log_probs = self._log_probs.get(gram, self._default)
+            for position, log_prob in enumerate(log_probs):
+                totals[position] += log_prob
+        return dict(zip(self.languages, totals, strict=True))
+
+    def identify(self, text: str) -> str:
+        """Identify the language of text.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Language code, or "unknown" when the text has no letters or no clear winner
+        """
+        if not any(char.isalpha() for char in text):
+            return "unknown"
+        ranked = sorted(self.scores(text).items(), key=lambda item: item[1], reverse=True)
+        (best, best_score), (_, runner_up_score) = ranked[0], ranked[1]
+        if best_score - runner_up_score < self.min_margin:
+            return "unknown"
+        return best
+
+
+@lru_cache(maxsize=1)
+def get_language_identifier() -> LanguageIdentifier:
+    """Return the shared identifier, trained on first use.
+
+    Returns:
+        LanguageIdentifier
+    """
+    return LanguageIdentifier.default()
+
+
+def has_language_letters(text: str, language: str) -> bool:
+    """Check whether text contains letters specific to a language's alphabet.
+
+    Args:
+        text: Input text
+        language: Language code (lt, lv, pl)
+
+    Returns:
+        True when at least one of the language's diacritic letters occurs in text
+    """
+    letters = LANGUAGE_LETTERS.get(language, frozenset())
+    return not letters.isdisjoint(text.lower())
+
+
+def _product_text(product: ProductInput) -> str:
+    return f"{product.program_name} {product.program_description} {product.about_place}"
+
+
+def identify_product_language(product: ProductInput, file_language: str | None = None) -> str:
+    """Identify the language of a product row.
+
+    Args:
+        product: Product input
+        file_language: Language of the file the row belongs to; a row differing from it
+            without any of its own language's letters is reported as unknown
+
+    Returns:
+        Language code (lt, lv, pl) or "unknown"
+    """
+    text = _product_text(product)
+    language = get_language_identifier().identify(text)
+    if (
+        file_language is not None
+        and language not in {"unknown", file_language}
+        and not has_language_letters(text, language)
+    ):
+        return "unknown"
+    return language
+
+
+def identify_majority_language(products: Iterable[ProductInput]) -> str:
+    """Identify the most common language among product rows.
+
+    Rows containing letters of the language they were identified as decide; only when no
+    row does, as in exports typed without diacritics, do all identified rows vote.
+
+    Args:
+        products: Product inputs, typically the first rows of a file
+
+    Returns:
+        Language code (lt, lv, pl), or "unknown" when no row could be identified
+    """
+    votes: Counter[str] = Counter()
+    evidence_votes: Counter[str] = Counter()
+    for product in products:
+        language = identify_product_language(product)
+        if language == "unknown":
+            continue
+        votes[language] += 1
+        if has_language_letters(_product_text(product), language):
+            evidence_votes[language] += 1
+    decisive = evidence_votes or votes
+    if not decisive:
+        return "unknown"
+    return decisive.most_common(1)[0][0]
@@ -1,27 +1,58 @@
 """OpenAI API client for product categorization."""
 
 import asyncio
+import hashlib
 import json
-from collections.abc import Callable
+import random
+import re
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from contextlib import asynccontextmanager, suppress
+from functools import lru_cache, partial
 
 from loguru import logger
-from openai import APIError, AsyncOpenAI, RateLimitError
+from openai import (
+    APIConnectionError,
+    APIError,
+    APIStatusError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionMessageParam
 from prompts.latvian_v1 import PROMPT_V1 as PROMPT_LATVIAN
 from prompts.lithuanian_v1 import PROMPT_V1 as PROMPT_LITHUANIAN
 from prompts.polish_v1 import PROMPT_V1 as PROMPT_POLISH
-from pydantic import BaseModel
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_random,
-)
+from pydantic import BaseModel, ValidationError
 
+from src.branch_retrieval import get_branch_retriever
 from src.config import (
-    API_CONCURRENT_BATCH_SIZE,
+    DEFAULT_RATE_LIMITS,
+    HEDGE_LATENCY_WINDOW,
+    HEDGE_MAX_RATE,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    MODEL_RATE_LIMITS,
+    OUTPUT_TOKENS_ESTIMATE,
+    PACK_LINGER_SECONDS,
+    PROMPT_BRANCH_TOP_K,
+    PROMPT_LAYOUT,
+    RATE_LIMIT_BURST_SECONDS,
+    RATE_LIMIT_HIGH_WATERMARK,
+    RATE_LIMIT_LOW_WATERMARK,
+    RATE_LIMIT_PAUSE_WATERMARK,
+    RATE_LIMIT_UTILIZATION,
+    REQUEST_TIMEOUT_SECONDS,
+    RETRY_JITTER,
     RETRY_MAX_ATTEMPTS,
     RETRY_MAX_WAIT,
     RETRY_MIN_WAIT,
+    ROW_TIME_BUDGET_SECONDS,
+    TRANSIENT_RETRY_MAX_ATTEMPTS,
+    TRANSIENT_RETRY_MAX_WAIT,
+    TRANSIENT_RETRY_MIN_WAIT,
 )
 
 
@@ -40,52 +71,871 @@ class CategoryOutput(BaseModel):
     comment: str
 
 
-async def detect_language_async(client: AsyncOpenAI, sample_text: str, model: str) -> str:
-    """Detect language of sample text.
+class PackedResultItem(BaseModel):
+    """Single product result inside a packed response."""
+
+    id: int
+    category: str
+    comment: str
+
+
+class TokenUsage(BaseModel):
+    """Token usage accumulated across categorization requests."""
+
+    requests: int = 0
+    input_tokens: int = 0
+    cached_input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def uncached_input_tokens(self) -> int:
+        """Input tokens not served from the provider prompt cache."""
+        return self.input_tokens - self.cached_input_tokens
+
+    def record(self, usage: CompletionUsage | None) -> None:
+        """Add the usage of a single API response.
+
+        Args:
+            usage: Usage block of a chat completion response
+        """
+        if not isinstance(usage, CompletionUsage):
+            return
+
+        self.requests += 1
+        self.input_tokens += usage.prompt_tokens
+        self.output_tokens += usage.completion_tokens
+        details = usage.prompt_tokens_details
+        if details and details.cached_tokens:
+            self.cached_input_tokens += details.cached_tokens
+
+    def to_summary(self) -> dict[str, int]:
+        """Return usage counters for the processing summary."""
+        return {
+            "api_requests": self.requests,
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_input_tokens,
+            "uncached_input_tokens": self.uncached_input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+class TokenBucket:
+    """Continuously refilling budget of a single resource (requests or tokens)."""
+
+    def __init__(self, rate_per_second: float, capacity: float) -> None:
+        """Initialize a full bucket.
+
+        Args:
+            rate_per_second: Refill rate
+            capacity: Maximum stored budget
+        """
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def time_until_available(self, amount: float) -> float:
+        """Seconds until amount can be consumed (0 if available now).
+
+        Amounts above capacity are capped, so oversized requests wait for a full bucket.
+        """
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate_per_second)
+
+    def consume(self, amount: float) -> None:
+        """Take amount from the bucket; the level may go negative (debt)."""
+        self._refill()
+        self.level -= amount
+
+
+class RateLimiter:
+    """Client-side limiter admitting requests only when RPM and TPM budget is available.
+
+    Requests are admitted in FIFO order. Token estimates are corrected with the
+    actual usage reported by the API through settle().
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        burst_seconds: float = RATE_LIMIT_BURST_SECONDS,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            requests_per_minute: Request budget
+            tokens_per_minute: Token budget
+            burst_seconds: Bucket capacity, in seconds worth of budget
+        """
+        request_rate = requests_per_minute / 60
+        token_rate = tokens_per_minute / 60
+        self.requests = TokenBucket(request_rate, max(1.0, request_rate * burst_seconds))
+        self.tokens = TokenBucket(token_rate, max(1.0, token_rate * burst_seconds))
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def for_model(cls, model: str) -> "RateLimiter":
+        """Create a limiter from the configured limits of a model.
+
+        Args:
+            model: Model name
+
+        Returns:
+            RateLimiter using RATE_LIMIT_UTILIZATION of the model quota
+        """
+        limits = MODEL_RATE_LIMITS.get(model, DEFAULT_RATE_LIMITS)
+        return cls(limits.rpm * RATE_LIMIT_UTILIZATION, limits.tpm * RATE_LIMIT_UTILIZATION)
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until one request and the estimated tokens fit in the budget.
+
+        Args:
+            tokens: Estimated tokens of the request
+        """
+        async with self._lock:
+            # Budget refills continuously, so there is no event to wait for
+            while (  # noqa: ASYNC110
+                delay := max(
+                    self.requests.time_until_available(1),
+                    self.tokens.time_until_available(tokens),
+                )
+            ) > 0:
+                await asyncio.sleep(delay)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+
+    def settle(self, estimated_tokens: int, usage: CompletionUsage | None) -> None:
+        """Correct the token budget with the actual usage of a response.
+
+        Args:
+            estimated_tokens: Tokens consumed by acquire
+            usage: Usage block of the response
+        """
+        if isinstance(usage, CompletionUsage):
+            self.tokens.consume(usage.total_tokens - estimated_tokens)
+
+
+def parse_reset_duration(value: str | None) -> float | None:
+    """Parse an x-ratelimit-reset-* header value such as "1s", "6m0s" or "20ms".
 
     Args:
-        client: AsyncOpenAI client
-        sample_text: Sample text from CSV
-        model: Model name
+        value: Header value
 
     Returns:
-        Language code: lt, lv, pl, or unknown
+        Duration in seconds, or None if missing or unparseable
     """
-    prompt = f"""Detect the language of the following text sample from a CSV file.
-The text may be in Lithuanian (lt), Latvian (lv), or Polish (pl).
-
-Text sample:
-{sample_text}
+    if not value:
+        return None
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
 
-Return ONLY a JSON object with key "language" and value "lt", "lv", "pl", or "unknown".
-Example: {{"language": "lt"}}"""
 
+def _header_int(headers: Mapping[str, str], name: str) -> int | None:
     try:
-        response = await client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def parse_retry_after(error: BaseException) -> float | None:
+    """Read the server-requested wait from a retry-after-ms or retry-after header.
+
+    Args:
+        error: Error raised by the API client
+
+    Returns:
+        Seconds to wait, or None if the error carries no usable header
+    """
+    if not isinstance(error, APIStatusError):
+        return None
+    headers = getattr(error.response, "headers", None)
+    if not isinstance(headers, Mapping):
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if not isinstance(value, str):
+            continue
+        try:
+            seconds = float(value) * scale
+        except ValueError:
+            # HTTP-date values are not used by the API
+            continue
+        if seconds >= 0:
+            return seconds
+    return None
+
+
+class RateLimitController:
+    """Shared concurrency gate adapted from x-ratelimit-* response headers and 429s.
+
+    Effective concurrency grows by one while plenty of quota remains, halves when
+    quota runs low, and new requests pause until the reported reset when it is
+    nearly exhausted. A 429 pauses every request until the quota resets, then
+    releases them in a slow-start ramp instead of all at once.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        pause_callback: Callable[[bool], None] | None = None,
+    ) -> None:
+        """Initialize the controller at full concurrency.
+
+        Args:
+            max_concurrency: Upper bound for concurrent requests
+            min_concurrency: Lower bound for concurrent requests
+            pause_callback: Optional callback(is_waiting), called once when a pause starts
+                and once when it ends
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.concurrency = self.max_concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.pause_episodes = 0
+        # Concurrency the slow-start ramp climbs back to after a 429 pause (0 when not ramping)
+        self.ramp_target = 0
+        self.pause_callback = pause_callback
+        self._pausing = False
+        self._condition = asyncio.Condition()
+
+    def pause_remaining(self) -> float:
+        """Seconds left in the current pre-emptive pause (0 if not paused)."""
+        return max(0.0, self.paused_until - time.monotonic())
+
+    async def acquire(self) -> None:
+        """Wait for a free slot outside of any pause."""
+        async with self._condition:
+            while (pause := self.pause_remaining()) > 0 or self.in_flight >= self.concurrency:
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(self._condition.wait(), pause or None)
+            if self._pausing:
+                self._pausing = False
+                if self.pause_callback:
+                    self.pause_callback(False)
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        """Return a slot taken by acquire."""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a concurrency slot for the duration of a request."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+    def pause(self, seconds: float) -> None:
+        """Hold new requests for the given time, extending a pause already in progress.
+
+        Args:
+            seconds: Pause length from now
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        if not self._pausing:
+            self._pausing = True
+            self.pause_episodes += 1
+            if self.pause_callback:
+                self.pause_callback(True)
+
+    def rate_limited(self, error: BaseException, fallback_wait: float) -> None:
+        """Pause all requests after a 429 and restart them in a slow-start ramp.
+
+        Args:
+            error: RateLimitError raised by the API client
+            fallback_wait: Pause used when the response says nothing about the reset
+        """
+        wait = parse_retry_after(error)
+        if wait is None and isinstance(error, APIStatusError):
+            headers = getattr(error.response, "headers", None)
+            if isinstance(headers, Mapping):
+                resets = [
+                    parse_reset_duration(headers.get(f"x-ratelimit-reset-{resource}"))
+                    for resource in ("requests", "tokens")
+                ]
+                wait = max((reset for reset in resets if reset is not None), default=None)
+        wait = fallback_wait if wait is None else wait
+
+        if not self._pausing:
+            logger.info(f"Rate limited, pausing all requests for {wait:.1f}s")
+            self.ramp_target = max(self.ramp_target, self.concurrency)
+        self.concurrency = self.min_concurrency
+        self.pause(wait)
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Adapt concurrency and pausing from the rate-limit headers of a response.
+
+        Args:
+            headers: Response headers
+        """
+        if self.ramp_target:
+            # Slow start: each success admits one more request, doubling concurrency per
+            # round of requests until the pre-pause level is reached
+            self.concurrency = min(self.ramp_target, self.concurrency + 1)
+            if self.concurrency >= self.ramp_target:
+                self.ramp_target = 0
+
+        fractions: list[float] = []
+        pause = 0.0
+        for resource in ("requests", "tokens"):
+            remaining = _header_int(headers, f"x-ratelimit-remaining-{resource}")
+            limit = _header_int(headers, f"x-ratelimit-limit-{resource}")
+            if remaining is None or not limit:
+                continue
+            fraction = remaining / limit
+            fractions.append(fraction)
+            if fraction < RATE_LIMIT_PAUSE_WATERMARK:
+                reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{resource}"))
+                pause = max(pause, reset or 0.0)
+
+        if not fractions:
+            return
+
+        lowest = min(fractions)
+        if lowest < RATE_LIMIT_LOW_WATERMARK:
+            self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+        elif lowest > RATE_LIMIT_HIGH_WATERMARK:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+
+        if pause > 0:
+            logger.info(f"Rate-limit quota nearly exhausted, pausing new requests for {pause:.1f}s")
+            self.pause(pause)
+
+
+class RequestHedger:
+    """Tail-latency hedging for API requests.
+
+    A request still running after the running HEDGE_PERCENTILE latency gets a duplicate;
+    whichever returns first wins and the other is cancelled. Hedges are capped at
+    max_hedge_rate of all requests so stragglers cannot eat into the rate limit.
+    """
+
+    def __init__(
+        self,
+        percentile: float = HEDGE_PERCENTILE,
+        max_hedge_rate: float = HEDGE_MAX_RATE,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        window: int = HEDGE_LATENCY_WINDOW,
+    ) -> None:
+        """Initialize without latency history; hedging starts after min_samples requests.
+
+        Args:
+            percentile: Latency percentile after which a duplicate is sent
+            max_hedge_rate: Maximum fraction of requests that may be hedged
+            min_samples: Latencies observed before hedging starts
+            window: Recent latencies the percentile is computed over
+        """
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.time_saved = 0.0
+        self._latencies: deque[float] = deque(maxlen=window)
+        # Latencies of unhedged requests slower than the hedge delay, estimating what a
+        # straggler would have cost without its hedge
+        self._stragglers: deque[float] = deque(maxlen=window)
+
+    def hedge_delay(self) -> float | None:
+        """Return the current hedge delay, or None while too few latencies are known."""
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+
+    def _hedge_allowed(self) -> bool:
+        return self.hedges < self.max_hedge_rate * self.requests
+
+    def _straggler_estimate(self, delay: float) -> float:
+        if self._stragglers:
+            return sum(self._stragglers) / len(self._stragglers)
+        return 2 * delay
+
+    async def run[T](
+        self,
+        request: Callable[[], Awaitable[T]],
+        hedge_request: Callable[[], Awaitable[T]] | None = None,
+    ) -> T:
+        """Run a request, hedging it if it outlives the hedge delay.
+
+        Args:
+            request: Factory starting the request
+            hedge_request: Factory starting the duplicate, defaults to request
+
+        Returns:
+            Result of whichever attempt succeeded first
+
+        Raises:
+            Exception: The primary attempt's error when every attempt failed
+        """
+        self.requests += 1
+        started = time.monotonic()
+        delay = self.hedge_delay()
+        primary = asyncio.ensure_future(request())
+        hedge: asyncio.Future[T] | None = None
+        # Attempts still running when the caller is cancelled (row budget, run deadline)
+        # are cancelled with it rather than left orphaned
+        try:
+            if delay is not None:
+                await asyncio.wait({primary}, timeout=delay)
+            if delay is None or primary.done() or not self._hedge_allowed():
+                result = await primary
+                latency = time.monotonic() - started
+                self._latencies.append(latency)
+                if delay is not None and latency > delay:
+                    self._stragglers.append(latency)
+                return result
+
+            self.hedges += 1
+            hedge = asyncio.ensure_future((hedge_request or request)())
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (primary, hedge):
+                    if task in done and task.exception() is None:
+                        return self._settle_win(task, primary, delay, started)
+            # Both attempts failed
+            return primary.result()
+        finally:
+            primary.cancel()
+            if hedge is not None:
+                hedge.cancel()
+
+    def _settle_win[T](
+        self, winner: asyncio.Future[T], primary: asyncio.Future[T], delay: float, started: float
+    ) -> T:
+        latency = time.monotonic() - started
+        self._latencies.append(latency)
+        if winner is not primary:
+            self.hedge_wins += 1
+            self.time_saved += max(0.0, self._straggler_estimate(delay) - latency)
+        return winner.result()
+
+    def to_summary(self) -> dict[str, int | float]:
+        """Return hedging counters for the processing summary."""
+        return {
+            "hedged_requests": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_time_saved_seconds": round(self.time_saved, 2),
+        }
+
+
+class RetryRule(BaseModel):
+    """Backoff settings for one class of retryable errors."""
+
+    max_attempts: int  # Attempts in total, including the first
+    min_wait: float  # Wait before the first retry, doubled for each further retry
+    max_wait: float  # Upper bound of the exponential wait
+    jitter: float = RETRY_JITTER  # Fraction of the wait randomly taken off
+
+
+class RetryPolicy:
+    """Retry loop with exponential backoff, jitter and Retry-After support per error class.
+
+    Built once and shared by all requests; each call keeps its state on the stack, so
+    retrying costs nothing until an attempt fails.
+    """
+
+    def __init__(self, rules: Mapping[type[BaseException], RetryRule]) -> None:
+        """Initialize the policy.
+
+        Args:
+            rules: Backoff settings per error class; subclasses match their closest
+                registered base. Errors matching no rule are raised at once
+        """
+        self.rules = dict(rules)
+        self._resolved: dict[type[BaseException], RetryRule | None] = {}
+
+    def rule_for(self, error: BaseException) -> RetryRule | None:
+        """Return the rule applying to an error.
+
+        Args:
+            error: Raised error
+
+        Returns:
+            Matching rule, or None if the error is not retryable
+        """
+        error_type = type(error)
+        if error_type not in self._resolved:
+            self._resolved[error_type] = next(
+                (self.rules[base] for base in error_type.__mro__ if base in self.rules), None
+            )
+        return self._resolved[error_type]
+
+    def wait_seconds(self, rule: RetryRule, attempt: int, error: BaseException) -> float:
+        """Return the wait before the next attempt.
+
+        Args:
+            rule: Rule matching the error
+            attempt: Number of the attempt that failed, starting at 1
+            error: Raised error
+
+        Returns:
+            The server's Retry-After when given, else the jittered exponential wait
+        """
+        if (retry_after := parse_retry_after(error)) is not None:
+            return retry_after
+        backoff = min(rule.max_wait, rule.min_wait * 2.0 ** (attempt - 1))
+        return backoff * (1 - rule.jitter * random.random())  # noqa: S311
+
+    async def call[T](
+        self,
+        request: Callable[[], Awaitable[T]],
+        on_retry: Callable[[BaseException, float], float | None] | None = None,
+    ) -> T:
+        """Run a request, retrying retryable errors.
+
+        Args:
+            request: Factory starting one attempt
+            on_retry: Optional callback(error, wait) run before each wait; a returned
+                number replaces the wait
+
+        Returns:
+            Result of the first successful attempt
+
+        Raises:
+            Exception: The last error when it is not retryable or attempts are exhausted
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await request()
+            except Exception as error:
+                rule = self.rule_for(error)
+                if rule is None or attempt >= rule.max_attempts:
+                    raise
+                wait = self.wait_seconds(rule, attempt, error)
+                if on_retry and (replaced := on_retry(error, wait)) is not None:
+                    wait = replaced
+            await asyncio.sleep(wait)
+
+
+def build_retry_policy() -> RetryPolicy:
+    """Build the policy for API requests from the retry settings in src.config.
+
+    The policy is the only retry layer: clients are created with max_retries=0, so every
+    attempt passes the rate limiter and counts against the attempt limits below.
+
+    Returns:
+        Policy retrying rate limits, timeouts, connection failures and 5xx errors
+    """
+    transient = RetryRule(
+        max_attempts=TRANSIENT_RETRY_MAX_ATTEMPTS,
+        min_wait=TRANSIENT_RETRY_MIN_WAIT,
+        max_wait=TRANSIENT_RETRY_MAX_WAIT,
+    )
+    return RetryPolicy(
+        {
+            RateLimitError: RetryRule(
+                max_attempts=RETRY_MAX_ATTEMPTS, min_wait=RETRY_MIN_WAIT, max_wait=RETRY_MAX_WAIT
+            ),
+            # Includes APITimeoutError
+            APIConnectionError: transient,
+            InternalServerError: transient,
+        }
+    )
+
+
+API_RETRY_POLICY = build_retry_policy()
+
+
+# Product fields block shared by all prompt templates
+PRODUCT_ENTRY_TEMPLATE = """Product entry:
+- Name: {{PRODUCT_NAME}}
+- Description: {{PRODUCT_DESCRIPTION}}
+- Location: {{PRODUCT_LOCATION}}
+"""
+
+
+# Placeholder name -> ProductInput attribute substituted for it
+PRODUCT_PLACEHOLDERS = {
+    "PRODUCT_NAME": "program_name",
+    "PRODUCT_DESCRIPTION": "program_description",
+    "PRODUCT_LOCATION": "about_place",
+}
+_PLACEHOLDER_PATTERN = re.compile(
+    r"\{\{(" + "|".join(map(re.escape, PRODUCT_PLACEHOLDERS)) + r")\}\}"
+)
+
+
+class CompiledTemplate:
+    """Prompt template pre-split at its product placeholders.
+
+    The template is scanned once; rendering joins the literal segments with the product
+    fields in a single pass. Substituted text is never scanned again, so placeholder-like
+    text inside a product description is kept verbatim.
+    """
+
+    def __init__(self, template: str) -> None:
+        """Split the template.
+
+        Args:
+            template: Template text with {{PRODUCT_*}} placeholders
+        """
+        parts = _PLACEHOLDER_PATTERN.split(template)
+        self.template = template
+        self._head = parts[0]
+        # (ProductInput attribute, literal text following the placeholder) per slot
+        self._slots = [
+            (PRODUCT_PLACEHOLDERS[name], literal)
+            for name, literal in zip(parts[1::2], parts[2::2], strict=True)
+        ]
+
+    def render(self, product: ProductInput) -> str:
+        """Fill the placeholders with the product fields.
+
+        Args:
+            product: Product data
+
+        Returns:
+            Rendered prompt text
+        """
+        pieces = [self._head]
+        for attribute, literal in self._slots:
+            pieces.append(getattr(product, attribute))
+            pieces.append(literal)
+        return "".join(pieces)
+
+
+def split_prompt_template(prompt_template: str) -> str:
+    """Strip the product entry block from a prompt template.
+
+    Args:
+        prompt_template: Full prompt template containing PRODUCT_ENTRY_TEMPLATE
+
+    Returns:
+        Static part of the prompt, identical for every product
+
+    Raises:
+        ValueError: If the template does not contain the product entry block
+    """
+    if PRODUCT_ENTRY_TEMPLATE not in prompt_template:
+        msg = "Prompt template does not contain the product entry block"
+        raise ValueError(msg)
+    return prompt_template.replace(PRODUCT_ENTRY_TEMPLATE + "\n", "", 1).replace(
+        PRODUCT_ENTRY_TEMPLATE, "", 1
+    )
+
+
+# Appended after the decision tree in packed mode; overrides its single-product OUTPUT section
+PACKED_OUTPUT_INSTRUCTIONS = """PACKED INPUT:
+The user message contains several product entries, each introduced by "Product entry <id>:".
+Classify every entry independently with the decision tree above.
+Return ONLY a JSON object with key "results": an array with one element per entry, each an
+object with keys id (the entry id as a number), category and comment, following the OUTPUT
+rules above for category and comment."""
+
+PROMPT_TEMPLATES = {
+    "lt": PROMPT_LITHUANIAN,
+    "lv": PROMPT_LATVIAN,
+    "pl": PROMPT_POLISH,
+}
+
+# Inline prompts and the product entry block, compiled once at import
+COMPILED_PROMPTS = {
+    language: CompiledTemplate(template) for language, template in PROMPT_TEMPLATES.items()
+}
+COMPILED_PRODUCT_ENTRY = CompiledTemplate(PRODUCT_ENTRY_TEMPLATE)
+
+# Static decision-tree prefixes, computed once so every request sends byte-identical text
+SYSTEM_PROMPTS = {
+    language: split_prompt_template(template) for language, template in PROMPT_TEMPLATES.items()
+}
+
+
+class DecisionTreePrompt(BaseModel):
+    """Static system prompt split into its top-level decision-tree branches."""
+
+    header: str  # Instructions and output rules preceding the "Top level:" list
+    top_level: dict[str, str]  # Branch name -> top-level routing question
+    branches: dict[str, str]  # Branch name -> branch section text
+
+
+TOP_LEVEL_HEADING = "Top level:\n"
+_TOP_LEVEL_LINE_PATTERN = re.compile(r"^\d+\) (?P<question>.+?) -> (?P<branch>.+)$")
+
+
+def parse_decision_tree_prompt(system_prompt: str) -> DecisionTreePrompt:
+    """Split a static system prompt into header, top-level routing and branches.
+
+    Args:
+        system_prompt: Static prompt from SYSTEM_PROMPTS
+
+    Returns:
+        DecisionTreePrompt
+
+    Raises:
+        ValueError: If the prompt has no "Top level:" list
+    """
+    header, found, tree = system_prompt.partition(TOP_LEVEL_HEADING)
+    if not found:
+        msg = "Prompt does not contain a top-level decision list"
+        raise ValueError(msg)
+
+    routing, _, sections = tree.partition("\n\n")
+    top_level: dict[str, str] = {}
+    for line in routing.splitlines():
+        match = _TOP_LEVEL_LINE_PATTERN.match(line)
+        if match and match.group("branch") != "Unknown":
+            top_level[match.group("branch")] = match.group("question")
+
+    # Branch sections start with "<branch name>:" on their own line
+    starts = sorted(
+        (position, branch)
+        for branch in top_level
+        if (position := sections.find(f"{branch}:\n")) >= 0
+    )
+    branches = {
+        branch: sections[start:end].strip("\n")
+        for (start, branch), (end, _) in zip(
+            starts, [*starts[1:], (len(sections), "")], strict=True
         )
+    }
+    return DecisionTreePrompt(header=header, top_level=top_level, branches=branches)
 
-        content = response.choices[0].message.content
-        if not content:
-            logger.warning("Empty response from language detection API")
-            return "unknown"
 
-        result = json.loads(content)
-        language = str(result.get("language", "unknown")).lower()
+DECISION_TREE_PROMPTS = {
+    language: parse_decision_tree_prompt(prompt) for language, prompt in SYSTEM_PROMPTS.items()
+}
 
-        # Validate language code
-        if language not in ["lt", "lv", "pl", "unknown"]:
-            logger.warning(f"Invalid language code returned: {language}, defaulting to unknown")
-            return "unknown"
 
-        logger.info(f"Detected language: {language}")
-        return language  # noqa: TRY300
+@lru_cache(maxsize=256)
+def build_pruned_system_prompt(language: str, branches: tuple[str, ...]) -> str:
+    """Assemble a system prompt containing only some top-level branches.
 
-    except Exception as e:
-        logger.error(f"Language detection failed: {e}, defaulting to unknown")
-        return "unknown"
+    Branches keep their original order, so every product routed to the same branches
+    shares a byte-identical (prompt-cacheable) prefix. The Unknown escape is always kept.
+
+    Args:
+        language: Language code (lt, lv, pl)
+        branches: Branch names to keep
+
+    Returns:
+        Pruned static system prompt
+    """
+    tree = DECISION_TREE_PROMPTS.get(language, DECISION_TREE_PROMPTS["lt"])
+    kept = [branch for branch in tree.top_level if branch in branches]
+    routing = [
+        f"{number}) {tree.top_level[branch]} -> {branch}"
+        for number, branch in enumerate(kept, start=1)
+    ]
+    routing.append(f"{len(kept) + 1}) Otherwise -> Unknown")
+    sections = [tree.branches[branch] for branch in kept if branch in tree.branches]
+    return (
+        tree.header + TOP_LEVEL_HEADING + "\n".join(routing) + "\n\n" + "\n\n".join(sections) + "\n"
+    )
+
+
+def select_system_prompt(product: ProductInput, language: str, branch_top_k: int) -> str:
+    """Return the static system prompt for a product.
+
+    Args:
+        product: Product data to categorize
+        language: Language code (lt, lv, pl)
+        branch_top_k: Number of top-level branches to keep, 0 for the full tree
+
+    Returns:
+        Full or pruned system prompt
+    """
+    full_prompt = SYSTEM_PROMPTS.get(language, SYSTEM_PROMPTS["lt"])  # Default to Lithuanian
+    if branch_top_k <= 0:
+        return full_prompt
+
+    branches = get_branch_retriever(language).select(
+        product.program_name, product.program_description, branch_top_k
+    )
+    if branches is None:
+        return full_prompt
+    return build_pruned_system_prompt(language, tuple(branches))
+
+
+def select_packed_system_prompt(
+    products: list[ProductInput], language: str, branch_top_k: int
+) -> str:
+    """Return the static system prompt for a pack of products.
+
+    The prompt keeps the union of the branches selected for each product, so every
+    product sees the branches it would have been sent alone.
+
+    Args:
+        products: Products sent together
+        language: Language code (lt, lv, pl)
+        branch_top_k: Number of top-level branches to keep per product, 0 for the full tree
+
+    Returns:
+        Full or pruned system prompt
+    """
+    full_prompt = SYSTEM_PROMPTS.get(language, SYSTEM_PROMPTS["lt"])  # Default to Lithuanian
+    if branch_top_k <= 0:
+        return full_prompt
+
+    retriever = get_branch_retriever(language)
+    kept: set[str] = set()
+    for product in products:
+        branches = retriever.select(product.program_name, product.program_description, branch_top_k)
+        # A product without lexical evidence gets the full tree, and so does its pack
+        if branches is None:
+            return full_prompt
+        kept.update(branches)
+    return build_pruned_system_prompt(language, tuple(sorted(kept)))
+
+
+# Rough average for Baltic/Polish text with the o200k tokenizer; used only for budgeting
+CHARS_PER_TOKEN = 3.5
+# Fixed per-message overhead added by the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(messages: list[ChatCompletionMessageParam]) -> int:
+    """Estimate input tokens of a chat request without a tokenizer.
+
+    Args:
+        messages: Messages for the chat completions API
+
+    Returns:
+        Estimated input token count
+    """
+    chars = sum(len(str(message.get("content") or "")) for message in messages)
+    return int(chars / CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS * len(messages)
+
+
+def get_prompt_version(
+    language: str, layout: str = PROMPT_LAYOUT, branch_top_k: int = PROMPT_BRANCH_TOP_K
+) -> str:
+    """Fingerprint the prompt used for a language.
+
+    Changes whenever the prompt file, layout or branch pruning changes, so cached
+    results produced with an older prompt are never reused.
+
+    Args:
+        language: Language code (lt, lv, pl)
+        layout: Prompt layout
+        branch_top_k: Branches kept by candidate-branch retrieval, 0 for the full tree
+
+    Returns:
+        Short hex digest of the prompt template and layout
+    """
+    template = PROMPT_TEMPLATES.get(language, PROMPT_LITHUANIAN)
+    settings = layout if branch_top_k <= 0 or layout == "inline" else f"{layout}:{branch_top_k}"
+    return hashlib.sha256(f"{settings}\n{template}".encode()).hexdigest()[:16]
 
 
 def build_categorization_prompt(product: ProductInput, language: str) -> str:
@@ -99,33 +949,198 @@ def build_categorization_prompt(product: ProductInput, language: str) -> str:
         Formatted prompt string
     """
     # Select prompt based on language
-    prompt_map = {
-        "lt": PROMPT_LITHUANIAN,
-        "lv": PROMPT_LATVIAN,
-        "pl": PROMPT_POLISH,
-    }
-    prompt_template = prompt_map.get(language, PROMPT_LITHUANIAN)  # Default to Lithuanian
+    template = COMPILED_PROMPTS.get(language, COMPILED_PROMPTS["lt"])  # Default to Lithuanian
+    return template.render(product)
 
-    return (
-        prompt_template.replace("{{PRODUCT_NAME}}", product.program_name)
-        .replace("{{PRODUCT_DESCRIPTION}}", product.program_description)
-        .replace("{{PRODUCT_LOCATION}}", product.about_place)
+
+def build_categorization_messages(
+    product: ProductInput,
+    language: str,
+    layout: str = PROMPT_LAYOUT,
+    branch_top_k: int = PROMPT_BRANCH_TOP_K,
+) -> list[ChatCompletionMessageParam]:
+    """Build chat messages for categorization.
+
+    Args:
+        product: Product data to categorize
+        language: Language code (lt, lv, pl)
+        layout: "prefix_cached" for a static system prefix followed by the product,
+            or "inline" for the single templated user prompt
+        branch_top_k: With "prefix_cached", keep only this many top-level branches of
+            the decision tree (0 for the full tree)
+
+    Returns:
+        Messages for the chat completions API
+    """
+    if layout == "inline":
+        return [{"role": "user", "content": build_categorization_prompt(product, language)}]
+
+    system_prompt = select_system_prompt(product, language, branch_top_k)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": COMPILED_PRODUCT_ENTRY.render(product)},
+    ]
+
+
+def build_packed_messages(
+    products: list[ProductInput], language: str, branch_top_k: int = PROMPT_BRANCH_TOP_K
+) -> list[ChatCompletionMessageParam]:
+    """Build chat messages that categorize several products in one request.
+
+    Entries are numbered from 1 in the order given.
+
+    Args:
+        products: Products to categorize
+        language: Language code (lt, lv, pl)
+        branch_top_k: Top-level branches of the decision tree kept per product
+            (0 for the full tree)
+
+    Returns:
+        Messages for the chat completions API
+    """
+    system_prompt = select_packed_system_prompt(products, language, branch_top_k)
+    entries = [
+        COMPILED_PRODUCT_ENTRY.render(product).replace(
+            "Product entry:", f"Product entry {entry_id}:", 1
+        )
+        for entry_id, product in enumerate(products, start=1)
+    ]
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": PACKED_OUTPUT_INSTRUCTIONS},
+        {"role": "user", "content": "\n".join(entries)},
+    ]
+
+
+def parse_packed_response(content: str, expected: int) -> dict[int, CategoryOutput]:
+    """Validate a packed response and map results back to entry ids.
+
+    Malformed elements, unknown ids and duplicates are dropped, so callers can
+    retry the missing entries individually.
+
+    Args:
+        content: Raw JSON response content
+        expected: Number of entries sent
+
+    Returns:
+        Mapping of entry id (1-based) to CategoryOutput
+    """
+    try:
+        payload = json.loads(content)
+    except json.JSONDecodeError:
+        return {}
+
+    items = payload.get("results") if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        return {}
+
+    results: dict[int, CategoryOutput] = {}
+    for raw_item in items:
+        try:
+            item = PackedResultItem.model_validate(raw_item)
+        except ValidationError:
+            continue
+        if 1 <= item.id <= expected and item.id not in results:
+            results[item.id] = CategoryOutput(category=item.category, comment=item.comment)
+    return results
+
+
+async def _send_completion(
+    client: AsyncOpenAI,
+    model: str,
+    messages: list[ChatCompletionMessageParam],
+    controller: RateLimitController | None,
+) -> ChatCompletion:
+    if controller is None:
+        return await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            response_format={"type": "json_object"},
+            timeout=REQUEST_TIMEOUT_SECONDS,
+        )
+
+    # The raw-response API exposes the x-ratelimit-* headers for the controller
+    raw_response = await client.chat.completions.with_raw_response.create(
+        model=model,
+        messages=messages,
+        response_format={"type": "json_object"},
+        timeout=REQUEST_TIMEOUT_SECONDS,
     )
+    controller.observe(raw_response.headers)
+    return raw_response.parse()
+
+
+async def _create_completion(
+    client: AsyncOpenAI,
+    model: str,
+    messages: list[ChatCompletionMessageParam],
+    controller: RateLimitController | None,
+    *,
+    hedger: RequestHedger | None = None,
+    send_hedge: Callable[[], Awaitable[ChatCompletion]] | None = None,
+) -> ChatCompletion:
+    def send() -> Awaitable[ChatCompletion]:
+        if hedger is None:
+            return _send_completion(client, model, messages, controller)
+        return hedger.run(
+            partial(_send_completion, client, model, messages, controller), send_hedge
+        )
+
+    if controller is None:
+        return await send()
+    # Hedging starts once the slot is held: time queued behind a 429 pause or reduced
+    # concurrency is not response latency and must not trigger duplicates
+    async with controller.slot():
+        return await send()
 
 
 async def _categorize_product_internal(
-    client: AsyncOpenAI, product: ProductInput, model: str, language: str
+    client: AsyncOpenAI,
+    product: ProductInput,
+    model: str,
+    language: str,
+    *,
+    usage: TokenUsage | None = None,
+    limiter: RateLimiter | None = None,
+    controller: RateLimitController | None = None,
+    hedger: RequestHedger | None = None,
 ) -> CategoryOutput:
-    prompt = build_categorization_prompt(product, language)
+    messages = build_categorization_messages(product, language)
+    estimated_tokens = estimate_tokens(messages) + OUTPUT_TOKENS_ESTIMATE
+    if limiter is not None:
+        await limiter.acquire(estimated_tokens)
 
-    response = await client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        response_format={"type": "json_object"},
+    async def send_hedge() -> ChatCompletion:
+        # The duplicate is a real request, so it takes its own rate-limit budget and slot
+        if limiter is not None:
+            await limiter.acquire(estimated_tokens)
+        return await _create_completion(client, model, messages, controller)
+
+    response = await _create_completion(
+        client, model, messages, controller, hedger=hedger, send_hedge=send_hedge
     )
 
+    if usage is not None:
+        usage.record(response.usage)
+    if limiter is not None:
+        limiter.settle(estimated_tokens, response.usage)
+
     # Extract and parse the response
-    content = response.choices[0].message.content
+    return parse_category_content(response.choices[0].message.content)
+
+
+def parse_category_content(content: str | None) -> CategoryOutput:
+    """Parse the JSON content of a single-product categorization response.
+
+    Args:
+        content: Message content returned by the model
+
+    Returns:
+        CategoryOutput from the response
+
+    Raises:
+        ValueError: If the content is empty or not valid JSON
+    """
     if not content:
         msg = "Empty response from API"
         raise ValueError(msg)
@@ -137,12 +1152,41 @@ async def _categorize_product_internal(
     return CategoryOutput(category=category, comment=comment)
 
 
+def _coordinate_rate_limit_wait(
+    rate_limit_callback: Callable[[bool], None] | None,
+    controller: RateLimitController | None,
+    error: BaseException,
+    wait: float,
+) -> float | None:
+    """RetryPolicy on_retry hook handling waits caused by rate limiting.
+
+    With a controller, the 429 pauses all requests at its gate and the retry waits
+    there instead of sleeping on its own; without one, the wait is reported through
+    rate_limit_callback.
+    """
+    if not isinstance(error, RateLimitError):
+        return None
+    if controller is not None:
+        controller.rate_limited(error, wait)
+        return 0.0
+    if rate_limit_callback:
+        rate_limit_callback(True)
+    return None
+
+
 async def categorize_product_async(
     client: AsyncOpenAI,
     product: ProductInput,
     model: str,
     language: str,
     rate_limit_callback: Callable[[bool], None] | None = None,
+    *,
+    usage: TokenUsage | None = None,
+    limiter: RateLimiter | None = None,
+    controller: RateLimitController | None = None,
+    hedger: RequestHedger | None = None,
+    time_budget: float | None = ROW_TIME_BUDGET_SECONDS,
+    retry_policy: RetryPolicy = API_RETRY_POLICY,
 ) -> CategoryOutput:
     """Categorize a single product using OpenAI API.
 
@@ -152,28 +1196,40 @@ async def categorize_product_async(
         model: Model name
         language: Language code (lt, lv, pl)
         rate_limit_callback: Optional callback(is_waiting) for rate limit status
+        usage: Optional accumulator for token usage
+        limiter: Optional client-side RPM/TPM limiter
+        controller: Optional header-driven concurrency controller
+        hedger: Optional tail-latency hedger duplicating slow requests
+        time_budget: Seconds allowed for all attempts and retry waits together,
+            None for no limit
+        retry_policy: Policy deciding which errors are retried and how long to wait
 
     Returns:
         CategoryOutput (returns 'unknown' on failure)
     """
 
-    def on_retry(_retry_state: object) -> None:
-        """Called before sleeping due to rate limit."""
-        if rate_limit_callback:
-            rate_limit_callback(True)
-
-    # Apply retry decorator to the internal function
-    categorize_product_internal_with_retry = retry(
-        stop=stop_after_attempt(RETRY_MAX_ATTEMPTS),
-        wait=wait_random(min=RETRY_MIN_WAIT, max=RETRY_MAX_WAIT),
-        retry=retry_if_exception_type(RateLimitError),
-        before_sleep=on_retry,
-        reraise=True,
-    )(_categorize_product_internal)
-
     try:
-        # Call the retrying function
-        result = await categorize_product_internal_with_retry(client, product, model, language)
+        # Retry transient errors, bounded by the row's time budget
+        async with asyncio.timeout(time_budget):
+            result = await retry_policy.call(
+                lambda: _categorize_product_internal(
+                    client,
+                    product,
+                    model,
+                    language,
+                    usage=usage,
+                    limiter=limiter,
+                    controller=controller,
+                    hedger=hedger,
+                ),
+                partial(_coordinate_rate_limit_wait, rate_limit_callback, controller),
+            )
+    except TimeoutError:
+        if rate_limit_callback:
+            rate_limit_callback(False)
+        msg = f"Row time budget of {time_budget}s exceeded"
+        logger.error(msg)
+        return CategoryOutput(category="unknown", comment=msg)
     except RateLimitError as e:
         if rate_limit_callback:
             rate_limit_callback(False)
@@ -181,6 +1237,8 @@ async def categorize_product_async(
         logger.error(msg)
         return CategoryOutput(category="unknown", comment=msg)
     except APIError as e:
+        if rate_limit_callback:
+            rate_limit_callback(False)
         msg = f"OpenAI API error: {e}"
         logger.error(msg)
         return CategoryOutput(category="unknown", comment=msg)
@@ -196,14 +1254,53 @@ async def categorize_product_async(
         return result
 
 
-async def categorize_batch_async(
+async def _categorize_packed_internal(
+    client: AsyncOpenAI,
+    products: list[ProductInput],
+    model: str,
+    language: str,
+    *,
+    usage: TokenUsage | None = None,
+    limiter: RateLimiter | None = None,
+    controller: RateLimitController | None = None,
+) -> dict[int, CategoryOutput]:
+    messages = build_packed_messages(products, language)
+    estimated_tokens = estimate_tokens(messages) + OUTPUT_TOKENS_ESTIMATE * len(products)
+    if limiter is not None:
+        await limiter.acquire(estimated_tokens)
+
+    response = await _create_completion(client, model, messages, controller)
+
+    if usage is not None:
+        usage.record(response.usage)
+    if limiter is not None:
+        limiter.settle(estimated_tokens, response.usage)
+
+    content = response.choices[0].message.content
+    if not content:
+        msg = "Empty response from API"
+        raise ValueError(msg)
+
+    return parse_packed_response(content, len(products))
+
+
+async def categorize_packed_async(
     client: AsyncOpenAI,
     products: list[ProductInput],
     model: str,
     language: str,
     rate_limit_callback: Callable[[bool], None] | None = None,
+    *,
+    usage: TokenUsage | None = None,
+    limiter: RateLimiter | None = None,
+    controller: RateLimitController | None = None,
+    time_budget: float | None = ROW_TIME_BUDGET_SECONDS,
 ) -> list[CategoryOutput]:
-    """Categorize a batch of products with concurrent API calls.
+    """Categorize several products with a single API request.
+
+    Products missing from the response, or returned malformed, are retried
+    individually with categorize_product_async, within what is left of the
+    same time budget.
 
     Args:
         client: AsyncOpenAI client
@@ -211,21 +1308,179 @@ async def categorize_batch_async(
         model: Model name
         language: Language code (lt, lv, pl)
         rate_limit_callback: Optional callback(is_waiting) for rate limit status
+        usage: Optional accumulator for token usage
+        limiter: Optional client-side RPM/TPM limiter
+        controller: Optional header-driven concurrency controller
+        time_budget: Seconds allowed for the packed request, its retries and the
+            individual fallbacks together, None for no limit
 
     Returns:
         List of CategoryOutput in same order as input
     """
-    semaphore = asyncio.Semaphore(API_CONCURRENT_BATCH_SIZE)
+    if not products:
+        return []
+
+    loop = asyncio.get_running_loop()
+    budget_ends_at = None if time_budget is None else loop.time() + time_budget
+    try:
+        async with asyncio.timeout_at(budget_ends_at):
+            packed = await API_RETRY_POLICY.call(
+                lambda: _categorize_packed_internal(
+                    client,
+                    products,
+                    model,
+                    language,
+                    usage=usage,
+                    limiter=limiter,
+                    controller=controller,
+                ),
+                partial(_coordinate_rate_limit_wait, rate_limit_callback, controller),
+            )
+    except TimeoutError:
+        msg = f"Row time budget of {time_budget}s exceeded"
+        logger.error(msg)
+        return [CategoryOutput(category="unknown", comment=msg) for _ in products]
+    except Exception as e:
+        logger.warning(f"Packed request for {len(products)} products failed: {e}")
+        packed = {}
+    finally:
+        if rate_limit_callback:
+            rate_limit_callback(False)
+
+    missing = [idx for idx in range(1, len(products) + 1) if idx not in packed]
+    if missing:
+        logger.debug(f"Retrying {len(missing)}/{len(products)} packed products individually")
+        retried = await asyncio.gather(
+            *(
+                categorize_product_async(
+                    client,
+                    products[idx - 1],
+                    model,
+                    language,
+                    rate_limit_callback,
+                    usage=usage,
+                    limiter=limiter,
+                    controller=controller,
+                    time_budget=(
+                        None if budget_ends_at is None else max(budget_ends_at - loop.time(), 0)
+                    ),
+                )
+                for idx in missing
+            )
+        )
+        packed.update(zip(missing, retried, strict=True))
+
+    return [packed[idx] for idx in range(1, len(products) + 1)]
+
+
+class PackedCategorizer:
+    """Collect single-product requests into packs of pack_size products.
+
+    Each call to categorize waits until its pack is full (or linger_seconds have
+    passed since the pack was started) and then receives its own result.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        model: str,
+        pack_size: int,
+        rate_limit_callback: Callable[[bool], None] | None = None,
+        *,
+        usage: TokenUsage | None = None,
+        limiter: RateLimiter | None = None,
+        controller: RateLimitController | None = None,
+        linger_seconds: float = PACK_LINGER_SECONDS,
+    ) -> None:
+        """Initialize the packer.
+
+        Args:
+            client: AsyncOpenAI client
+            model: Model name
+            pack_size: Products per API request
+            rate_limit_callback: Optional callback(is_waiting) for rate limit status
+            usage: Optional accumulator for token usage
+            limiter: Optional client-side RPM/TPM limiter
+            controller: Optional header-driven concurrency controller
+            linger_seconds: Max wait for a pack to fill
+        """
+        self.client = client
+        self.model = model
+        self.pack_size = pack_size
+        self.rate_limit_callback = rate_limit_callback
+        self.usage = usage
+        self.limiter = limiter
+        self.controller = controller
+        self.linger_seconds = linger_seconds
+        self._pending: dict[str, list[tuple[ProductInput, asyncio.Future[CategoryOutput]]]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def categorize(self, product: ProductInput, language: str) -> CategoryOutput:
+        """Queue a product into the current pack and wait for its result.
+
+        Args:
+            product: Product data to categorize
+            language: Language code (lt, lv, pl)
+
+        Returns:
+            CategoryOutput for the product
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[CategoryOutput] = loop.create_future()
+        pending = self._pending.setdefault(language, [])
+        pending.append((product, future))
+
+        if len(pending) >= self.pack_size:
+            self._flush(language)
+        elif len(pending) == 1:
+            self._timers[language] = loop.call_later(self.linger_seconds, self._flush, language)
+
+        return await asyncio.shield(future)
+
+    def _flush(self, language: str) -> None:
+        if timer := self._timers.pop(language, None):
+            timer.cancel()
+        pack = self._pending.pop(language, [])
+        if pack:
+            task = asyncio.get_running_loop().create_task(self._send(pack, language))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
 
-    async def categorize_with_limit(product: ProductInput) -> CategoryOutput:
-        async with semaphore:
-            return await categorize_product_async(
-                client, product, model, language, rate_limit_callback
+    async def _send(
+        self, pack: list[tuple[ProductInput, asyncio.Future[CategoryOutput]]], language: str
+    ) -> None:
+        products = [product for product, _ in pack]
+        try:
+            results = await categorize_packed_async(
+                self.client,
+                products,
+                self.model,
+                language,
+                self.rate_limit_callback,
+                usage=self.usage,
+                limiter=self.limiter,
+                controller=self.controller,
             )
+        except Exception as e:
+            for _, future in pack:
+                if not future.done():
+                    future.set_exception(e)
+            return
 
-    # Create tasks for all products
-    tasks = [categorize_with_limit(product) for product in products]
+        for (_, future), result in zip(pack, results, strict=True):
+            if not future.done():
+                future.set_result(result)
 
-    # Execute all tasks concurrently (with semaphore limiting concurrency)
-    results = await asyncio.gather(*tasks)
-    return list(results)
+    async def aclose(self) -> None:
+        """Cancel pending timers and in-flight packs."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for pack in self._pending.values():
+            for _, future in pack:
+                future.cancel()
+        self._pending.clear()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,205 @@
+"""Persistent on-disk cache of categorization results."""
+
+import hashlib
+import json
+import sqlite3
+import time
+import unicodedata
+from collections.abc import Iterable
+from pathlib import Path
+from types import TracebackType
+from typing import Self
+
+from loguru import logger
+
+from src.llm_service import CategoryOutput, ProductInput
+
+# Fraction of max_entries kept after eviction, so eviction does not run on every insert
+EVICTION_LOW_WATERMARK = 0.9
+# Pending writes committed together to avoid one fsync per row
+COMMIT_EVERY = 100
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so cosmetic differences do not change the cache key.
+
+    Args:
+        text: Raw text from the CSV
+
+    Returns:
+        NFC-normalized text with collapsed whitespace
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def make_cache_key(product: ProductInput, language: str, model: str, prompt_version: str) -> str:
+    """Build a cache key from normalized product content and prompt settings.
+
+    Args:
+        product: Product data
+        language: Language code (lt, lv, pl)
+        model: Model name
+        prompt_version: Fingerprint of the prompt template
+
+    Returns:
+        Hex digest identifying the categorization request
+    """
+    payload = json.dumps(
+        [
+            normalize_text(product.program_name),
+            normalize_text(product.program_description),
+            normalize_text(product.about_place),
+            language,
+            model,
+            prompt_version,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed cache mapping categorization requests to results.
+
+    Entries are evicted least-recently-used first once max_entries is exceeded.
+    """
+
+    def __init__(self, path: Path, max_entries: int) -> None:
+        """Open (or create) the cache database.
+
+        Args:
+            path: SQLite database file
+            max_entries: Maximum number of cached results
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pending_writes = 0
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                prompt_version TEXT NOT NULL,
+                category TEXT NOT NULL,
+                comment TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON results (last_used)")
+        self._conn.commit()
+        self._size = self._count()
+
+    def _count(self) -> int:
+        row = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        return int(row[0])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> CategoryOutput | None:
+        """Look up a cached result and mark it as recently used.
+
+        Args:
+            key: Cache key from make_cache_key
+
+        Returns:
+            Cached CategoryOutput, or None on a miss
+        """
+        row = self._conn.execute(
+            "SELECT category, comment FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._mark_dirty()
+        return CategoryOutput(category=row[0], comment=row[1])
+
+    def put(self, key: str, prompt_version: str, result: CategoryOutput) -> None:
+        """Store a result.
+
+        Args:
+            key: Cache key from make_cache_key
+            prompt_version: Fingerprint of the prompt template used
+            result: Categorization result
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (key, prompt_version, category, comment, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, prompt_version, result.category, result.comment, time.time()),
+        )
+        # Upper bound (replacements do not grow the table); reconciled before evicting
+        self._size += 1
+        if self._size > self.max_entries:
+            self._size = self._count()
+            if self._size > self.max_entries:
+                self._evict()
+        self._mark_dirty()
+
+    def _evict(self) -> None:
+        keep = int(self.max_entries * EVICTION_LOW_WATERMARK)
+        self._conn.execute(
+            "DELETE FROM results WHERE key IN "
+            "(SELECT key FROM results ORDER BY last_used ASC LIMIT ?)",
+            (self._size - keep,),
+        )
+        self._size = self._count()
+        logger.debug(f"Result cache evicted down to {self._size} entries")
+
+    def purge_stale(self, prompt_versions: Iterable[str]) -> int:
+        """Delete entries created with prompt templates that no longer exist.
+
+        Args:
+            prompt_versions: Fingerprints of the current prompt templates
+
+        Returns:
+            Number of deleted entries
+        """
+        versions = list(prompt_versions)
+        placeholders = ", ".join("?" for _ in versions)
+        cursor = self._conn.execute(
+            f"DELETE FROM results WHERE prompt_version NOT IN ({placeholders})",  # noqa: S608
+            versions,
+        )
+        self._conn.commit()
+        self._size = self._count()
+        if cursor.rowcount:
+            logger.info(f"Result cache purged {cursor.rowcount} entries from old prompt versions")
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        """Delete all cached results."""
+        self._conn.execute("DELETE FROM results")
+        self._conn.commit()
+        self._size = 0
+
+    def _mark_dirty(self) -> None:
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_EVERY:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
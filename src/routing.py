@@ -0,0 +1,143 @@
+"""Language-partitioned work routing and flow control for the processing pipeline."""
+
+import asyncio
+from collections import Counter, deque
+
+
+class LanguageRouter[T]:
+    """Per-language work queues drained by a shared pool of workers.
+
+    Each language gets a concurrency share proportional to its share of the rows routed
+    so far, so a 70/20/10 file keeps about 70/20/10 of the workers busy on each language
+    and a slow language cannot hold every worker. Scheduling is work-conserving: when a
+    language has nothing queued its share goes to the others.
+    """
+
+    def __init__(self, worker_count: int) -> None:
+        """Initialize empty queues.
+
+        Args:
+            worker_count: Number of workers calling get
+        """
+        self.worker_count = max(1, worker_count)
+        self.routed: Counter[str] = Counter()
+        self.in_flight: Counter[str] = Counter()
+        self._queues: dict[str, deque[T]] = {}
+        self._queued = asyncio.Semaphore(0)
+        self._closed = False
+
+    def put(self, language: str, item: T) -> None:
+        """Queue an item on its language queue.
+
+        Args:
+            language: Language code of the item
+            item: Work item
+
+        Raises:
+            RuntimeError: If the router is already closed
+        """
+        if self._closed:
+            msg = "Language router is closed"
+            raise RuntimeError(msg)
+        self._queues.setdefault(language, deque()).append(item)
+        self.routed[language] += 1
+        self._queued.release()
+
+    def close(self) -> None:
+        """Signal that no more items will be queued; idle workers receive None."""
+        self._closed = True
+        for _ in range(self.worker_count):
+            self._queued.release()
+
+    def share(self, language: str) -> int:
+        """Return the concurrency share of a language.
+
+        Args:
+            language: Language code
+
+        Returns:
+            Workers the language is entitled to (at least one)
+        """
+        total = self.routed.total()
+        if not total:
+            return self.worker_count
+        return max(1, round(self.worker_count * self.routed[language] / total))
+
+    async def get(self) -> tuple[str, T] | None:
+        """Take the next item from the language furthest below its share.
+
+        Returns:
+            (language, item), or None once the router is closed and drained
+        """
+        await self._queued.acquire()
+        waiting = [language for language, queue in self._queues.items() if queue]
+        if not waiting:
+            # Only close() releases without an item
+            return None
+        language = min(waiting, key=lambda code: self.in_flight[code] / self.share(code))
+        self.in_flight[language] += 1
+        return language, self._queues[language].popleft()
+
+    def task_done(self, language: str) -> None:
+        """Mark an item taken by get as finished.
+
+        Args:
+            language: Language code of the finished item
+        """
+        self.in_flight[language] -= 1
+
+
+class PendingBudget:
+    """Caps the rows held by the pipeline, by count and by size.
+
+    A row is admitted while both limits have room. A row larger than max_bytes on its
+    own is admitted once nothing else is pending, so it slows the pipeline down instead
+    of stalling it.
+    """
+
+    def __init__(self, max_rows: int, max_bytes: int) -> None:
+        """Initialize an empty budget.
+
+        Args:
+            max_rows: Rows that may be pending at once
+            max_bytes: Total size of pending rows
+        """
+        self.max_rows = max(1, max_rows)
+        self.max_bytes = max_bytes
+        self.rows = 0
+        self.bytes = 0
+        self.peak_bytes = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    def _fits(self, size: int) -> bool:
+        if self.rows == 0:
+            return True
+        return self.rows < self.max_rows and self.bytes + size <= self.max_bytes
+
+    async def acquire(self, size: int) -> None:
+        """Wait until a row of the given size fits, then account for it.
+
+        Args:
+            size: Size of the row in bytes
+        """
+        while not self._fits(size):
+            waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        self.rows += 1
+        self.bytes += size
+        self.peak_bytes = max(self.peak_bytes, self.bytes)
+
+    def release(self, size: int) -> None:
+        """Return a row taken with acquire.
+
+        Args:
+            size: Size the row was acquired with
+        """
+        self.rows -= 1
+        self.bytes -= size
+        # Waiters re-check the limits themselves; cancelled ones are simply dropped
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
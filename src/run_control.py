@@ -0,0 +1,101 @@
+"""Pause and cancel signals for a running categorization, usable from any thread."""
+
+import asyncio
+import threading
+from collections.abc import Callable
+
+
+class RunControl:
+    """Thread-safe pause/resume/cancel switch for process_csv_async.
+
+    The GUI thread calls pause, resume and cancel; the event loop running the pipeline
+    binds the control and is notified through call_soon_threadsafe. Signals sent before
+    the run binds are applied when it does.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an unbound, running (not paused) control."""
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._resumed: asyncio.Event | None = None
+        self._cancel_callbacks: list[Callable[[], None]] = []
+        self._paused = False
+        self._cancelled = False
+
+    @property
+    def paused(self) -> bool:
+        """Whether new rows are held back."""
+        return self._paused
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the run was asked to stop."""
+        return self._cancelled
+
+    def bind(self) -> None:
+        """Attach the control to the running event loop; call from within the loop."""
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._resumed = asyncio.Event()
+            self._cancel_callbacks.clear()
+        self._apply()
+
+    def add_cancel_callback(self, callback: Callable[[], None]) -> None:
+        """Register a callback run in the event loop when the run is cancelled.
+
+        Args:
+            callback: Function called once, immediately if already cancelled
+        """
+        if self._cancelled:
+            callback()
+        else:
+            self._cancel_callbacks.append(callback)
+
+    def pause(self) -> None:
+        """Stop starting new rows; rows already in flight finish."""
+        with self._lock:
+            self._paused = True
+        self._notify()
+
+    def resume(self) -> None:
+        """Continue after pause."""
+        with self._lock:
+            self._paused = False
+        self._notify()
+
+    def cancel(self) -> None:
+        """Stop the run.
+
+        In-flight requests are cancelled and the remaining rows are written as unknown
+        without being journaled, so the output is complete and the run can be resumed.
+        """
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            self._paused = False
+        self._notify()
+
+    async def wait_resumed(self) -> None:
+        """Wait while the run is paused."""
+        if self._resumed is not None:
+            await self._resumed.wait()
+
+    def _notify(self) -> None:
+        with self._lock:
+            loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._apply)
+
+    def _apply(self) -> None:
+        # Runs in the event loop thread
+        if self._resumed is None:
+            return
+        if self._paused:
+            self._resumed.clear()
+        else:
+            self._resumed.set()
+        if self._cancelled:
+            callbacks, self._cancel_callbacks = self._cancel_callbacks, []
+            for callback in callbacks:
+                callback()
@@ -1,6 +1,95 @@
+import json
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
 import src.config
 
 src.config.RETRY_MIN_WAIT = 0
 src.config.RETRY_MAX_WAIT = 0
 src.config.RETRY_MAX_ATTEMPTS = 6
+src.config.TRANSIENT_RETRY_MIN_WAIT = 0
+src.config.TRANSIENT_RETRY_MAX_WAIT = 0
 src.config.LANGUAGE_SAMPLE_LINES = 5
+src.config.RESULT_CACHE_ENABLED = False
+src.config.KEYWORD_INDEX_ENABLED = False
+src.config.PROMPT_BRANCH_TOP_K = 0
+src.config.MODEL_RATE_LIMITS = {}
+src.config.DEFAULT_RATE_LIMITS = src.config.ModelRateLimits(rpm=10**9, tpm=10**9)
+
+
+class FakeOpenAIServer:
+    """Local HTTP server answering chat completions with scripted statuses and headers."""
+
+    def __init__(self) -> None:
+        self.response_statuses: list[int] = []
+        self.response_headers: list[dict[str, str]] = []
+        self.content = json.dumps({"category": "292", "comment": "Chosen 292 (0.90)."})
+        self.request_times: list[float] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}/v1"
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                server.request_times.append(time.monotonic())
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                body = json.dumps(
+                    {
+                        "id": "chatcmpl-test",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": "gpt-5-nano",
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": server.content},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                    }
+                ).encode()
+                headers = server.response_headers.pop(0) if server.response_headers else {}
+                status = server.response_statuses.pop(0) if server.response_statuses else 200
+                if status != 200:
+                    body = json.dumps(
+                        {"error": {"message": "Scripted error", "type": None}}
+                    ).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+                pass
+
+        return Handler
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def fake_openai_server() -> Iterator[FakeOpenAIServer]:
+    """Run a FakeOpenAIServer for the duration of a test."""
+    server = FakeOpenAIServer()
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,210 @@
+"""Tests for the offline Batch API engine."""
+
+import asyncio
+import json
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+from openai import APIConnectionError, InternalServerError
+from src.batch_service import (
+    BatchStatus,
+    LocalDirectoryTransport,
+    load_batch_results,
+    make_custom_id,
+    parse_batch_result_line,
+    run_batch,
+    write_batch_files,
+)
+from src.llm_service import CategoryOutput, ProductInput, TokenUsage
+
+
+class FlakyTransport(LocalDirectoryTransport):
+    """LocalDirectoryTransport whose first submit, poll and download each fail."""
+
+    def __init__(
+        self, directory: Path, responder: Callable[[dict[str, Any]], dict[str, Any]]
+    ) -> None:
+        super().__init__(directory, responder)
+        self.failures: list[str] = []
+
+    def _fail_once(self, call: str) -> None:
+        if call not in self.failures:
+            self.failures.append(call)
+            if call == "poll":
+                msg = "Service unavailable"
+                raise InternalServerError(
+                    msg, response=Mock(status_code=503, headers={}), body=None
+                )
+            raise APIConnectionError(request=Mock())
+
+    async def submit(self, batch_file: Path) -> str:
+        self._fail_once("submit")
+        return await super().submit(batch_file)
+
+    async def poll(self, batch_id: str) -> BatchStatus:
+        self._fail_once("poll")
+        return await super().poll(batch_id)
+
+    async def download(self, batch_id: str, destination: Path) -> None:
+        self._fail_once("download")
+        await super().download(batch_id, destination)
+
+
+def _product(name: str) -> ProductInput:
+    return ProductInput(program_name=name, program_description="", about_place="")
+
+
+def _respond(body: dict[str, Any]) -> dict[str, Any]:
+    """Answer a chat completion request with the product name as comment."""
+    product_name = body["messages"][-1]["content"].split("- Name: ")[-1].split("\n")[0]
+    content = json.dumps({"category": "292", "comment": product_name})
+    return {
+        "choices": [{"message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110},
+    }
+
+
+def test_write_batch_files_splits_on_limits(tmp_path: Path) -> None:
+    """Test that requests are split across files by count and size."""
+    rows = [(index, _product(f"Product {index}"), "lt") for index in range(5)]
+
+    paths = write_batch_files(rows, tmp_path, "gpt-5-nano", max_requests=2)
+
+    assert [path.name for path in paths] == [
+        "batch_0000.jsonl",
+        "batch_0001.jsonl",
+        "batch_0002.jsonl",
+    ]
+    requests = [json.loads(line) for path in paths for line in path.open(encoding="utf-8")]
+    assert [request["custom_id"] for request in requests] == [
+        make_custom_id(index) for index in range(5)
+    ]
+    assert requests[0]["url"] == "/v1/chat/completions"
+    assert requests[0]["body"]["model"] == "gpt-5-nano"
+    assert requests[0]["body"]["response_format"] == {"type": "json_object"}
+
+    one_per_file = write_batch_files(rows[:3], tmp_path / "small", "gpt-5-nano", max_bytes=1)
+    assert len(one_per_file) == 3
+
+
+def test_parse_batch_result_line() -> None:
+    """Test that successes, failures and foreign lines are mapped correctly."""
+    usage = TokenUsage()
+    success = json.dumps(
+        {
+            "custom_id": "row-7",
+            "response": {"status_code": 200, "body": _respond({"messages": [{"content": "SPA"}]})},
+            "error": None,
+        }
+    )
+    failure = json.dumps(
+        {
+            "custom_id": "row-8",
+            "response": {"status_code": 400, "body": {"error": {"message": "Bad request"}}},
+            "error": None,
+        }
+    )
+
+    assert parse_batch_result_line(success, usage) == (
+        7,
+        CategoryOutput(category="292", comment="SPA"),
+    )
+    index, result = parse_batch_result_line(failure, usage) or (None, None)
+    assert index == 8
+    assert result is not None
+    assert result.category == "unknown"
+    assert "Bad request" in result.comment
+    assert parse_batch_result_line('{"custom_id": "other"}') is None
+    assert usage.requests == 1
+    assert usage.input_tokens == 100
+
+
+@pytest.mark.asyncio
+async def test_run_batch_with_local_transport(tmp_path: Path) -> None:
+    """Test a full submit, poll and download cycle through the local transport."""
+    rows = [(index, _product(f"Product {index}"), "lt") for index in range(4)]
+    batch_files = write_batch_files(rows, tmp_path / "requests", "gpt-5-nano", max_requests=3)
+    transport = LocalDirectoryTransport(tmp_path / "exchange", responder=_respond)
+    results_directory = tmp_path / "results"
+    results_directory.mkdir()
+    statuses: list[BatchStatus] = []
+
+    result_files = await run_batch(
+        transport, batch_files, results_directory, poll_interval=0, status_callback=statuses.append
+    )
+    results = load_batch_results(result_files)
+
+    assert len(result_files) == 2
+    assert results == {
+        index: CategoryOutput(category="292", comment=f"Product {index}") for index in range(4)
+    }
+    assert statuses[-1].status == "completed"
+    assert statuses[-1].completed == 4
+
+
+@pytest.mark.asyncio
+async def test_local_transport_waits_for_external_results(tmp_path: Path) -> None:
+    """Test that without a responder the batch stays in progress until results appear."""
+    batch_file = tmp_path / "batch.jsonl"
+    batch_file.write_text('{"custom_id": "row-0"}\n', encoding="utf-8")
+    transport = LocalDirectoryTransport(tmp_path / "exchange")
+
+    batch_id = await transport.submit(batch_file)
+    assert (await transport.poll(batch_id)).status == "in_progress"
+
+    (tmp_path / "exchange" / f"{batch_id}.output.jsonl").write_text(
+        '{"custom_id": "row-0"}\n', encoding="utf-8"
+    )
+    status = await transport.poll(batch_id)
+    assert status.is_terminal
+    assert status.completed == 1
+
+
+@pytest.mark.asyncio
+async def test_run_batch_resumes_submitted_batches(tmp_path: Path) -> None:
+    """Test that a rerun polls the batches an interrupted run submitted instead of resubmitting."""
+    rows = [(index, _product(f"Product {index}"), "lt") for index in range(4)]
+    results_directory = tmp_path / "work"
+    batch_files = write_batch_files(rows, results_directory, "gpt-5-nano", max_requests=2)
+    exchange = tmp_path / "exchange"
+
+    # Interrupted while waiting for results that never arrive
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.1):
+            await run_batch(
+                LocalDirectoryTransport(exchange), batch_files, results_directory, poll_interval=0
+            )
+    assert len(list(exchange.glob("*.input.jsonl"))) == 2
+
+    # A request file rewritten with other contents is submitted anew
+    batch_files = write_batch_files(rows[:3], results_directory, "gpt-5-nano", max_requests=2)
+    result_files = await run_batch(
+        LocalDirectoryTransport(exchange, responder=_respond),
+        batch_files,
+        results_directory,
+        poll_interval=0,
+    )
+
+    assert len(list(exchange.glob("*.input.jsonl"))) == 3
+    assert load_batch_results(result_files) == {
+        index: CategoryOutput(category="292", comment=f"Product {index}") for index in range(3)
+    }
+
+
+@pytest.mark.asyncio
+async def test_run_batch_retries_transient_transport_errors(tmp_path: Path) -> None:
+    """Test that a failed submit, poll or download is retried instead of aborting the run."""
+    rows = [(index, _product(f"Product {index}"), "lt") for index in range(2)]
+    results_directory = tmp_path / "work"
+    batch_files = write_batch_files(rows, results_directory, "gpt-5-nano")
+    transport = FlakyTransport(tmp_path / "exchange", responder=_respond)
+
+    result_files = await run_batch(transport, batch_files, results_directory, poll_interval=0)
+
+    assert transport.failures == ["submit", "poll", "download"]
+    assert load_batch_results(result_files) == {
+        index: CategoryOutput(category="292", comment=f"Product {index}") for index in range(2)
+    }
@@ -0,0 +1,43 @@
+"""Tests for candidate-branch retrieval."""
+
+import pytest
+from src.branch_retrieval import BranchRetriever, get_branch_retriever
+
+
+def test_branch_retriever_ranks_by_idf() -> None:
+    """Test that distinctive tokens outweigh tokens shared by many branches."""
+    retriever = BranchRetriever(
+        {
+            "Food & Drink": {"vakari", "degust", "dviem"},
+            "Stay & Travel": {"nakvyn", "poilsi", "dviem"},
+            "Relaxation, Beauty & Wellness": {"masaza", "dviem"},
+        }
+    )
+
+    assert retriever.select("Vakarienė dviem", "", 1) == ["Food & Drink"]
+    assert retriever.select("Vakarienė ir nakvynė", "Poilsis dviem", 1) == ["Stay & Travel"]
+    assert retriever.select("Dovana mamai", "", 2) is None
+
+
+@pytest.mark.parametrize(
+    ("language", "name", "description", "branch"),
+    [
+        (
+            "lt",
+            "Nugaros masažas",
+            "Atpalaiduojantis masažas 30 min.",
+            "Relaxation, Beauty & Wellness",
+        ),
+        ("lt", "Šuolis parašiutu", "Tandeminis šuolis", "Adventure & Active"),
+        ("lv", "Lidojums ar gaisa balonu", "", "Adventure & Active"),
+        ("pl", "Degustacja wina", "", "Food & Drink"),
+    ],
+)
+def test_get_branch_retriever_from_catalogs(
+    language: str, name: str, description: str, branch: str
+) -> None:
+    """Test the shipped retrievers on typical products."""
+    branches = get_branch_retriever(language).select(name, description, 2)
+
+    assert branches is not None
+    assert branches[0] == branch
@@ -0,0 +1,96 @@
+"""Tests for the checkpoint journal."""
+
+from pathlib import Path
+
+from src.checkpoint import CheckpointJournal, build_journal_header, get_journal_path
+from src.llm_service import CategoryOutput
+
+PROMPT_VERSIONS = {"lt": "a1b2c3", "lv": "d4e5f6", "pl": "0718a9"}
+
+
+def _input_file(tmp_path: Path, content: str = "ProgramName\nSPA\n") -> Path:
+    input_path = tmp_path / "input.csv"
+    input_path.write_text(content, encoding="utf-8")
+    return input_path
+
+
+def test_get_journal_path() -> None:
+    """Test that the journal lives next to the output file."""
+    path = get_journal_path(Path("/data/export_categorized.csv"))
+
+    assert path == Path("/data/export_categorized.journal.jsonl")
+
+
+def test_checkpoint_journal_roundtrip(tmp_path: Path) -> None:
+    """Test that recorded rows are restored by the next run."""
+    header = build_journal_header(_input_file(tmp_path), "gpt-5-nano", PROMPT_VERSIONS, None)
+    journal_path = tmp_path / "out.journal.jsonl"
+
+    journal = CheckpointJournal(journal_path, header, flush_rows=1)
+    assert journal.load() == {}
+    journal.open()
+    journal.record(3, CategoryOutput(category="292", comment="SPA"))
+    journal.record(0, CategoryOutput(category="252", comment="Balionas"))
+    journal.close()
+
+    restored = CheckpointJournal(journal_path, header).load()
+    assert restored == {
+        3: CategoryOutput(category="292", comment="SPA"),
+        0: CategoryOutput(category="252", comment="Balionas"),
+    }
+
+
+def test_checkpoint_journal_recovers_truncated_line(tmp_path: Path) -> None:
+    """Test that a line cut short by a crash is skipped and appending continues."""
+    header = build_journal_header(_input_file(tmp_path), "gpt-5-nano", PROMPT_VERSIONS, None)
+    journal_path = tmp_path / "out.journal.jsonl"
+    journal_path.write_text(
+        header.model_dump_json()
+        + '\n{"index": 0, "category": "292", "comment": "SPA"}\n{"index": 1, "categ',
+        encoding="utf-8",
+    )
+
+    journal = CheckpointJournal(journal_path, header)
+    assert list(journal.load()) == [0]
+    journal.open()
+    journal.record(1, CategoryOutput(category="299", comment="Vakarienė"))
+    journal.close()
+
+    assert CheckpointJournal(journal_path, header).load() == {
+        0: CategoryOutput(category="292", comment="SPA"),
+        1: CategoryOutput(category="299", comment="Vakarienė"),
+    }
+
+
+def test_checkpoint_journal_ignores_other_runs(tmp_path: Path) -> None:
+    """Test that a journal from another input, model, prompt or language is not resumed."""
+    input_path = _input_file(tmp_path)
+    journal_path = tmp_path / "out.journal.jsonl"
+    journal = CheckpointJournal(
+        journal_path, build_journal_header(input_path, "gpt-5-nano", PROMPT_VERSIONS, None)
+    )
+    journal.open()
+    journal.record(0, CategoryOutput(category="292", comment=""))
+    journal.close()
+
+    edited_prompt = {**PROMPT_VERSIONS, "lt": "ffffff"}
+    other_prompt = CheckpointJournal(
+        journal_path, build_journal_header(input_path, "gpt-5-nano", edited_prompt, None)
+    )
+    assert other_prompt.load() == {}
+
+    other_language = CheckpointJournal(
+        journal_path, build_journal_header(input_path, "gpt-5-nano", PROMPT_VERSIONS, "lv")
+    )
+    assert other_language.load() == {}
+
+    other_model = CheckpointJournal(
+        journal_path, build_journal_header(input_path, "gpt-5-mini", PROMPT_VERSIONS, None)
+    )
+    assert other_model.load() == {}
+
+    _input_file(tmp_path, "ProgramName\nVakarienė\n")
+    other_input = CheckpointJournal(
+        journal_path, build_journal_header(input_path, "gpt-5-nano", PROMPT_VERSIONS, None)
+    )
+    assert other_input.load() == {}
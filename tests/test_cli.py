@@ -0,0 +1,136 @@
+"""Tests for the headless command-line entry point."""
+
+import json
+import subprocess
+import sys
+from collections.abc import Callable
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from src import config
+from src.cli import build_parser, main
+from src.core import RunProgress
+
+
+def test_build_parser() -> None:
+    """Test that options map onto process_csv_async overrides."""
+    args = build_parser().parse_args(
+        [
+            "in.csv",
+            "-o",
+            "out.csv",
+            "-m",
+            "gpt-5-mini-2025-08-07",
+            "-c",
+            "5",
+            "-b",
+            "10",
+            "-l",
+            "pl",
+            "--deadline",
+            "600",
+        ]
+    )
+
+    assert args.input == Path("in.csv")
+    assert args.output == Path("out.csv")
+    assert args.model == "gpt-5-mini-2025-08-07"
+    assert args.concurrency == 5
+    assert args.batch_size == 10
+    assert args.language == "pl"
+    assert args.deadline == 600
+
+
+def test_build_parser_rejects_invalid_values() -> None:
+    """Test that unknown languages and non-positive sizes are rejected."""
+    parser = build_parser()
+
+    with pytest.raises(SystemExit):
+        parser.parse_args(["in.csv", "-l", "en"])
+    with pytest.raises(SystemExit):
+        parser.parse_args(["in.csv", "-c", "0"])
+
+
+def test_main_emits_json_events(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Test that progress and summary are printed as JSON lines."""
+    input_path = tmp_path / "input.csv"
+    input_path.write_text("ProgramName,ProgramDescription,About_Place\n", encoding="utf-8")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(config.ACTIVE_CONFIG, "openai_api_key", "")
+    calls: dict[str, object] = {}
+
+    async def fake_process_csv_async(
+        input_path: Path,
+        progress_callback: Callable[[RunProgress], None],
+        _rate_limit_callback: Callable[[bool], None],
+        **kwargs: object,
+    ) -> tuple[Path, dict[str, int | float]]:
+        calls.update(kwargs)
+        progress_callback(
+            RunProgress(rows_processed=2, total_rows=2, bytes_processed=80, total_bytes=80)
+        )
+        return input_path.with_name("out.csv"), {"total": 2, "categorized": 2, "unknown": 0}
+
+    with (
+        patch("src.core.process_csv_async", side_effect=fake_process_csv_async),
+        patch("src.logging_utils.setup_logging"),
+    ):
+        exit_code = main([str(input_path), "-l", "lv", "-c", "3"])
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert exit_code == 0
+    assert calls["language"] == "lv"
+    assert calls["concurrency"] == 3
+    assert config.ACTIVE_CONFIG.openai_api_key == "sk-test"
+    assert events == [
+        {
+            "event": "progress",
+            "processed": 2,
+            "total": 2,
+            "bytes_processed": 80,
+            "total_bytes": 80,
+        },
+        {
+            "event": "summary",
+            "output_path": str(tmp_path / "out.csv"),
+            "total": 2,
+            "categorized": 2,
+            "unknown": 0,
+        },
+    ]
+
+
+def test_main_reports_failure(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Test that a failed run exits non-zero with an error event."""
+    input_path = tmp_path / "input.csv"
+    input_path.write_text("Name\n", encoding="utf-8")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+    with (
+        patch("src.core.process_csv_async", side_effect=ValueError("Missing columns")),
+        patch("src.logging_utils.setup_logging"),
+    ):
+        exit_code = main([str(input_path)])
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert exit_code == 1
+    assert events == [{"event": "error", "message": "Missing columns"}]
+
+
+def test_headless_modules_do_not_import_tkinter() -> None:
+    """Test that the CLI and the processing core load without tkinter."""
+    code = "import sys, src.cli, src.core; sys.exit('tkinter' in sys.modules)"
+
+    completed = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        check=False,
+    )
+
+    assert completed.returncode == 0, completed.stderr.decode()
@@ -1,12 +1,23 @@
 """Tests for CSV processing pipeline."""
 
+import asyncio
 import csv
+import json
+import threading
 from pathlib import Path
+from typing import Any
 from unittest.mock import AsyncMock, patch
 
 import pytest
-from src.core import normalize_comment_with_names, process_csv_async
-from src.llm_service import CategoryOutput
+from src.batch_service import LocalDirectoryTransport
+from src.core import (
+    RunProgress,
+    normalize_comment_with_names,
+    process_csv_async,
+    process_csv_batch_async,
+)
+from src.llm_service import CategoryOutput, ProductInput
+from src.run_control import RunControl
 
 
 @pytest.mark.asyncio
@@ -24,16 +35,20 @@ async def test_process_csv_async(tmp_path: Path) -> None:
     # Mock OpenAI client
     mock_client = AsyncMock()
 
-    # Mock categorize_batch_async
-    mock_results = [
-        CategoryOutput(category="spa_wellness", comment=""),
-        CategoryOutput(category="restaurants_food", comment=""),
-    ]
+    # Mock categorize_product_async
+    mock_results = {
+        "Test Program": CategoryOutput(category="spa_wellness", comment=""),
+        "Another": CategoryOutput(category="restaurants_food", comment=""),
+    }
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock, product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        return mock_results[product.program_name]
 
     with (
         patch("src.core.AsyncOpenAI", return_value=mock_client),
-        patch("src.core.detect_language_async", return_value="lt"),
-        patch("src.core.categorize_batch_async", return_value=mock_results),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
     ):
         output_path, summary = await process_csv_async(input_file)
 
@@ -72,13 +87,12 @@ async def test_process_csv_async_with_unknown_categories(tmp_path: Path) -> None
     # Mock OpenAI client
     mock_client = AsyncMock()
 
-    # Mock categorize_batch_async with unknown result
-    mock_results = [CategoryOutput(category="unknown", comment="API error")]
+    # Mock categorize_product_async with unknown result
+    mock_result = CategoryOutput(category="unknown", comment="API error")
 
     with (
         patch("src.core.AsyncOpenAI", return_value=mock_client),
-        patch("src.core.detect_language_async", return_value="lt"),
-        patch("src.core.categorize_batch_async", return_value=mock_results),
+        patch("src.core.categorize_product_async", return_value=mock_result),
     ):
         _output_path, summary = await process_csv_async(input_file)
 
@@ -88,6 +102,472 @@ async def test_process_csv_async_with_unknown_categories(tmp_path: Path) -> None
     assert summary["unknown"] == 1
 
 
+@pytest.mark.asyncio
+async def test_process_csv_async_result_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a re-run answers unchanged rows from the persistent cache."""
+    monkeypatch.setattr("src.core.RESULT_CACHE_ENABLED", True)
+    monkeypatch.setattr("src.core.RESULT_CACHE_PATH", tmp_path / "cache.sqlite3")
+
+    input_file = tmp_path / "input.csv"
+    input_file.write_text(
+        "ProgramName,ProgramDescription,About_Place\nSPA,Masažai,Vilnius\nVakarienė,,Kaunas\n",
+        encoding="utf-8",
+    )
+    mock_categorize = AsyncMock(return_value=CategoryOutput(category="292", comment=""))
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", mock_categorize),
+    ):
+        _output_path, first = await process_csv_async(input_file)
+        _output_path, second = await process_csv_async(input_file)
+
+    assert mock_categorize.call_count == 2
+    assert first["cache_misses"] == 2
+    assert first["cache_hits"] == 0
+    assert second["cache_hits"] == 2
+    assert second["cache_misses"] == 0
+    assert second["categorized"] == 2
+
+
+@pytest.mark.asyncio
+async def test_process_csv_async_deduplicates_products(tmp_path: Path) -> None:
+    """Test that identical products across chunks share a single API request."""
+    input_file = tmp_path / "input.csv"
+    names = ["SPA", "Vakarienė", "Skrydis oro balionu"]
+    lines = ["ProgramName,ProgramDescription,About_Place"]
+    lines += [f"{names[idx % 3]},Aprašymas,Vilnius" for idx in range(120)]
+    input_file.write_text("\n".join(lines), encoding="utf-8")
+
+    categories = {"SPA": "292", "Vakarienė": "299", "Skrydis oro balionu": "252"}
+    calls: list[str] = []
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock, product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        calls.append(product.program_name)
+        # Stay in flight long enough for concurrent duplicates to attach
+        await asyncio.sleep(0.01)
+        return CategoryOutput(category=categories[product.program_name], comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
+    ):
+        output_path, summary = await process_csv_async(input_file)
+
+    assert sorted(calls) == sorted(names)
+    assert summary["duplicate_rows"] == 117
+    assert summary["dedup_ratio"] == 0.975
+    assert summary["categorized"] == 120
+
+    with output_path.open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert all(row["category_id"] == categories[row["ProgramName"]] for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_process_csv_async_bounded_deduplication(tmp_path: Path) -> None:
+    """Test that only the most recent results are kept for deduplication."""
+    input_file = tmp_path / "input.csv"
+    names = ["SPA", "Vakarienė", "SPA", "Skrydis", "Skrydis", "Vakarienė"]
+    input_file.write_text(
+        "ProgramName,ProgramDescription,About_Place\n"
+        + "\n".join(f"{name},Aprašymas,Vilnius" for name in names),
+        encoding="utf-8",
+    )
+    mock_categorize = AsyncMock(return_value=CategoryOutput(category="292", comment=""))
+
+    with (
+        patch("src.core.DEDUP_MAX_ENTRIES", 1),
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", mock_categorize),
+    ):
+        _, summary = await process_csv_async(input_file, concurrency=1)
+
+    # "Skrydis" directly repeats; the others were evicted before they came back
+    assert mock_categorize.call_count == 5
+    assert summary["duplicate_rows"] == 1
+    assert summary["peak_pending_bytes"] > 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("concurrency", [1, 4])
+async def test_process_csv_async_does_not_share_unknown_results(
+    tmp_path: Path, concurrency: int
+) -> None:
+    """Test that a duplicate of a row that ended unknown issues its own request."""
+    input_file = tmp_path / "input.csv"
+    input_file.write_text(
+        "ProgramName,ProgramDescription,About_Place\nSPA,,Vilnius\nVakarienė,,Kaunas\nSPA,,Vilnius\n",
+        encoding="utf-8",
+    )
+    calls: list[str] = []
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock, product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        calls.append(product.program_name)
+        # Keep the first request in flight while its duplicate is read
+        await asyncio.sleep(0.01)
+        if calls.count(product.program_name) == 1 and product.program_name == "SPA":
+            return CategoryOutput(category="unknown", comment="OpenAI API error")
+        return CategoryOutput(category="292", comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", fake_categorize_product_async),
+    ):
+        output_path, summary = await process_csv_async(input_file, concurrency=concurrency)
+
+    with output_path.open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["category_id"] for row in rows] == ["unknown", "292", "292"]
+    assert len(calls) == 3
+    assert summary["duplicate_rows"] == 0
+
+
+@pytest.mark.asyncio
+async def test_process_csv_async_mixed_languages(tmp_path: Path) -> None:
+    """Test that each row gets the prompt and catalog of its language, counted per language."""
+    input_file = tmp_path / "input.csv"
+    input_file.write_text(
+        "ProgramName,ProgramDescription,About_Place\n"
+        "Nugaros masažas,Atpalaiduojantis masažas 60 min.,Vilnius\n"
+        "Masāža divām personām,Relaksējoša masāža,Rīga\n"
+        "Lot balonem,Lot balonem nad Krakowem dla dwojga,Kraków\n",
+        encoding="utf-8",
+    )
+    categories = {"lt": "292", "lv": "177", "pl": "355"}
+    languages: list[str] = []
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock,
+        _product: ProductInput,
+        _model: str,
+        language: str,
+        *_args: object,
+        **_kwargs: object,
+    ) -> CategoryOutput:
+        languages.append(language)
+        return CategoryOutput(category=categories[language], comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
+    ):
+        output_path, summary = await process_csv_async(input_file)
+
+    assert sorted(languages) == ["lt", "lv", "pl"]
+    assert summary["lt_rows"] == summary["lv_rows"] == summary["pl_rows"] == 1
+    assert summary["lv_categorized"] == 1
+    assert "lv_unknown" not in summary
+    with output_path.open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["category_name"] for row in rows] == ["SPA ir masažai", "Jūrmala", "Loty"]
+    assert all("Language unidentified" not in row["comment"] for row in rows)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("failing", ["src.core.get_row_size", "src.core.categorize_product_async"])
+async def test_process_csv_async_raises_original_error(tmp_path: Path, failing: str) -> None:
+    """Test that a reader or worker failure reaches the caller as itself, not as a group."""
+    input_file = tmp_path / "input.csv"
+    input_file.write_text(
+        "ProgramName,ProgramDescription,About_Place\nSPA,,Vilnius\n", encoding="utf-8"
+    )
+    error = csv.Error("field larger than field limit (16777216)")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", AsyncMock()),
+        patch(failing, side_effect=error),
+        pytest.raises(csv.Error) as raised,
+    ):
+        await process_csv_async(input_file)
+
+    assert raised.value is error
+    assert str(raised.value) == "field larger than field limit (16777216)"
+
+
+@pytest.mark.asyncio
+async def test_process_csv_async_english_rows_keep_file_language(tmp_path: Path) -> None:
+    """Test that rows in none of the languages use the file's language, not the closest one."""
+    input_file = tmp_path / "input.csv"
+    input_file.write_text(
+        "ProgramName,ProgramDescription,About_Place\n"
+        "Nugaros masažas,Atpalaiduojantis masažas 60 min.,Vilnius\n"
+        "Wellness day,Spa and sauna,Palanga\n"
+        "Wine tasting for two,,Kaunas\n"
+        "Vakarienė dviem,Romantiška vakarienė,Klaipėda\n",
+        encoding="utf-8",
+    )
+    languages: list[str] = []
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock,
+        _product: ProductInput,
+        _model: str,
+        language: str,
+        *_args: object,
+        **_kwargs: object,
+    ) -> CategoryOutput:
+        languages.append(language)
+        return CategoryOutput(category="292", comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
+    ):
+        output_path, summary = await process_csv_async(input_file)
+
+    assert languages == ["lt"] * 4
+    assert summary["lt_rows"] == 4
+    with output_path.open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert all(row["category_name"] == "SPA ir masažai" for row in rows)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count_max_bytes", [1024 * 1024, 0])
+async def test_process_csv_async_progress(tmp_path: Path, count_max_bytes: int) -> None:
+    """Test progress over multi-line rows, counted or reported in bytes only."""
+    input_file = tmp_path / "input.csv"
+    lines = [f'Product {idx},"Line one\nline two",Place' for idx in range(5)]
+    input_file.write_text(
+        "ProgramName,ProgramDescription,About_Place\n" + "\n".join(lines), encoding="utf-8"
+    )
+    progress: list[RunProgress] = []
+
+    with (
+        patch("src.core.ROW_COUNT_MAX_BYTES", count_max_bytes),
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch(
+            "src.core.categorize_product_async",
+            return_value=CategoryOutput(category="292", comment=""),
+        ),
+    ):
+        _, summary = await process_csv_async(input_file, progress.append, batch_size=2)
+
+    assert summary["total"] == 5
+    assert [p.rows_processed for p in progress] == [2, 4, 5]
+    assert all(p.total_rows in (None, 5) for p in progress)
+    assert progress[-1].total_rows == 5
+    assert progress[-1].bytes_processed == progress[-1].total_bytes
+    assert progress[-1].fraction == 1.0
+
+
+@pytest.mark.asyncio
+async def test_process_csv_async_failure_publishes_no_output(tmp_path: Path) -> None:
+    """Test that a failed run leaves neither the output nor its partial file behind."""
+    input_file = tmp_path / "input.csv"
+    lines = [f"Product {idx},Description,Place" for idx in range(5)]
+    input_file.write_text(
+        "ProgramName,ProgramDescription,About_Place\n" + "\n".join(lines), encoding="utf-8"
+    )
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock, product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        if product.program_name == "Product 4":
+            msg = "disk full"
+            raise OSError(msg)
+        return CategoryOutput(category="292", comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
+        pytest.raises(OSError, match="disk full"),
+    ):
+        await process_csv_async(input_file, batch_size=2)
+
+    assert not (tmp_path / "input_categorized.csv").exists()
+    assert not (tmp_path / "input_categorized.csv.partial").exists()
+
+
+@pytest.mark.asyncio
+async def test_process_csv_async_mixed_encoding(tmp_path: Path) -> None:
+    """Test that a cp1252 row after the detection sample does not stop the run."""
+    input_file = tmp_path / "input.csv"
+    lines = [b"ProgramName,ProgramDescription,About_Place"]
+    lines += [b"SPA,Mas\xc4\x97\xc5\xbeas,Vilnius"] * 3000
+    lines.append(b"Caf\xe9,,Vilnius")
+    input_file.write_bytes(b"\n".join(lines))
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch(
+            "src.core.categorize_product_async",
+            return_value=CategoryOutput(category="292", comment=""),
+        ),
+    ):
+        output_path, summary = await process_csv_async(input_file, language="lt")
+
+    assert summary["total"] == 3001
+    assert summary["decode_fallback_lines"] == 1
+    with output_path.open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["ProgramDescription"] == "Masėžas"
+    assert rows[-1]["ProgramName"] == "Café"
+
+
+@pytest.mark.asyncio
+async def test_process_csv_async_run_deadline(tmp_path: Path) -> None:
+    """Test that rows left at the deadline are written as unknown and stay resumable."""
+    input_file = tmp_path / "input.csv"
+    names = ["SPA", "Lėtas", "SPA", "Lėtas", "Vakarienė"]
+    lines = ["ProgramName,ProgramDescription,About_Place"]
+    lines += [f"{name},,Vilnius" for name in names]
+    input_file.write_text("\n".join(lines), encoding="utf-8")
+    requested: list[str] = []
+    slow_names = {"Lėtas"}
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock, product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        requested.append(product.program_name)
+        if product.program_name in slow_names:
+            await asyncio.sleep(10)
+        return CategoryOutput(category="292", comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
+    ):
+        output_path, summary = await process_csv_async(input_file, deadline=0.2)
+
+        with output_path.open(encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["category_id"] for row in rows] == ["292", "unknown", "292", "unknown", "292"]
+        assert "Run deadline of 0.2s" in rows[1]["comment"]
+        assert summary["deadline_rows"] == 2
+        assert summary["unknown"] == 2
+        assert (tmp_path / "input_categorized.journal.jsonl").exists()
+
+        requested.clear()
+        slow_names.clear()
+        _output_path, resumed = await process_csv_async(input_file, deadline=None)
+
+    assert requested == ["Lėtas"]
+    assert resumed["resumed_rows"] == 3
+    assert resumed["categorized"] == 5
+
+
+@pytest.mark.asyncio
+async def test_process_csv_async_resume_retries_unknown_rows(tmp_path: Path) -> None:
+    """Test that rows which ended unknown are not journaled, so a resumed run retries them."""
+    input_file = tmp_path / "input.csv"
+    names = ["SPA", "Lėtas", "Vakarienė"]
+    lines = ["ProgramName,ProgramDescription,About_Place"]
+    lines += [f"{name},,Vilnius" for name in names]
+    input_file.write_text("\n".join(lines), encoding="utf-8")
+    requested: list[str] = []
+    slow_names = {"Lėtas"}
+    failing_names = {"SPA"}
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock, product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        requested.append(product.program_name)
+        if product.program_name in slow_names:
+            await asyncio.sleep(10)
+        if product.program_name in failing_names:
+            return CategoryOutput(category="unknown", comment="OpenAI API error")
+        return CategoryOutput(category="292", comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
+    ):
+        _output_path, summary = await process_csv_async(input_file, deadline=0.2)
+        assert summary["deadline_rows"] == 1
+
+        requested.clear()
+        slow_names.clear()
+        failing_names.clear()
+        _output_path, resumed = await process_csv_async(input_file, deadline=None)
+
+    assert sorted(requested) == ["Lėtas", "SPA"]
+    assert resumed["resumed_rows"] == 1
+    assert resumed["categorized"] == 3
+
+
+@pytest.mark.asyncio
+async def test_process_csv_async_cancel(tmp_path: Path) -> None:
+    """Test that a cancel from another thread writes a complete, resumable output."""
+    input_file = tmp_path / "input.csv"
+    names = ["SPA", "Lėtas", "SPA", "Lėtas", "Vakarienė"]
+    lines = ["ProgramName,ProgramDescription,About_Place"]
+    lines += [f"{name},,Vilnius" for name in names]
+    input_file.write_text("\n".join(lines), encoding="utf-8")
+    requested: list[str] = []
+    slow_names = {"Lėtas"}
+    control = RunControl()
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock, product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        requested.append(product.program_name)
+        if product.program_name in slow_names:
+            threading.Timer(0.05, control.cancel).start()
+            await asyncio.sleep(10)
+        return CategoryOutput(category="292", comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
+    ):
+        output_path, summary = await process_csv_async(input_file, control=control)
+
+        with output_path.open(encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 5
+        assert rows[1]["category_id"] == "unknown"
+        assert "Run cancelled" in rows[1]["comment"]
+        assert summary["cancelled_rows"] >= 2
+        assert "deadline_rows" not in summary
+        assert (tmp_path / "input_categorized.journal.jsonl").exists()
+
+        requested.clear()
+        slow_names.clear()
+        _output_path, resumed = await process_csv_async(input_file)
+
+    assert "Lėtas" in requested
+    assert resumed["categorized"] == 5
+
+
+@pytest.mark.asyncio
+async def test_process_csv_async_pause(tmp_path: Path) -> None:
+    """Test that a paused run starts no rows until resumed."""
+    input_file = tmp_path / "input.csv"
+    input_file.write_text("ProgramName,ProgramDescription,About_Place\nSPA,,Vilnius", "utf-8")
+    requested: list[str] = []
+    control = RunControl()
+    control.pause()
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock, product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        requested.append(product.program_name)
+        return CategoryOutput(category="292", comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
+    ):
+        run = asyncio.create_task(process_csv_async(input_file, control=control))
+        await asyncio.sleep(0.1)
+        assert requested == []
+
+        control.resume()
+        _output_path, summary = await run
+
+    assert requested == ["SPA"]
+    assert summary["categorized"] == 1
+
+
 def test_normalize_comment_with_names() -> None:
     """Test comment normalization with category names."""
     category_map = {
@@ -138,3 +618,84 @@ def test_normalize_comment_no_category_ids() -> None:
 
     # Should return unchanged
     assert result == comment
+
+
+@pytest.mark.asyncio
+async def test_process_csv_batch_async(tmp_path: Path) -> None:
+    """Test the Batch API engine end to end through the local directory transport."""
+    input_file = tmp_path / "input.csv"
+    lines = [f"Product {idx},Description,Place" for idx in range(7)]
+    input_file.write_text(
+        "ProgramName,ProgramDescription,About_Place\n" + "\n".join(lines), encoding="utf-8"
+    )
+
+    def respond(body: dict[str, Any]) -> dict[str, Any]:
+        name = body["messages"][-1]["content"].split("- Name: ")[1].split("\n")[0]
+        if name == "Product 3":
+            return {"choices": [{"message": {"content": ""}}]}
+        content = json.dumps({"category": "292", "comment": name})
+        return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+    transport = LocalDirectoryTransport(tmp_path / "exchange", responder=respond)
+    progress: list[RunProgress] = []
+
+    with patch("src.core.AsyncOpenAI", return_value=AsyncMock()):
+        output_path, summary = await process_csv_batch_async(
+            input_file,
+            transport,
+            progress.append,
+            batch_size=3,
+            language="lt",
+            poll_interval=0,
+        )
+
+    with output_path.open(encoding="utf-8") as f:
+        result_rows = list(csv.DictReader(f))
+
+    assert [row["ProgramName"] for row in result_rows] == [f"Product {idx}" for idx in range(7)]
+    assert result_rows[0]["category_id"] == "292"
+    assert result_rows[0]["comment"] == "Product 0"
+    assert result_rows[3]["category_id"] == "unknown"
+    assert summary["total"] == 7
+    assert summary["categorized"] == 6
+    assert summary["unknown"] == 1
+    assert [(p.rows_processed, p.total_rows) for p in progress] == [(3, 7), (6, 7), (7, 7)]
+    assert progress[-1].bytes_processed == progress[-1].total_bytes
+    assert not (tmp_path / "input_categorized.batch").exists()
+
+
+@pytest.mark.asyncio
+async def test_process_csv_async_keyword_index(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that rows matched by the keyword index skip the API."""
+    monkeypatch.setattr("src.core.KEYWORD_INDEX_ENABLED", True)
+    input_file = tmp_path / "input.csv"
+    input_file.write_text(
+        "ProgramName,ProgramDescription,About_Place\n"
+        "Skrydis oro balionu,,Vilnius\n"
+        "Romantiška staigmena,,Vilnius\n",
+        encoding="utf-8",
+    )
+    requested: list[str] = []
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock, product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        requested.append(product.program_name)
+        return CategoryOutput(category="290", comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
+    ):
+        output_path, summary = await process_csv_async(input_file, language="lt")
+
+    with output_path.open(encoding="utf-8") as f:
+        result_rows = list(csv.DictReader(f))
+
+    assert requested == ["Romantiška staigmena"]
+    assert result_rows[0]["category_id"] == "252"
+    assert result_rows[0]["comment"].startswith("Chosen Skrydis oro balionu")
+    assert summary["local_hits"] == 1
+    assert summary["local_hit_rate"] == 0.5
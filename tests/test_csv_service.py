@@ -5,11 +5,13 @@ from pathlib import Path
 
 from src.config import REQUIRED_COLUMNS
 from src.csv_service import (
-    build_language_sample,
+    CsvChunkReader,
+    CsvOutputWriter,
+    DecodedLines,
+    count_csv_rows,
     detect_encoding,
     extract_product_input,
     read_csv_chunk,
-    write_csv_chunk,
 )
 from src.llm_service import ProductInput
 
@@ -41,6 +43,50 @@ def test_detect_encoding_cp1252(tmp_path: Path) -> None:
     assert encoding in ["utf-8", "cp1252", "latin1"]
 
 
+def test_detect_encoding_scores_candidates(tmp_path: Path) -> None:
+    """Test BOM detection and that cp1252 beats latin1 on bytes cp1252 defines."""
+    test_file = tmp_path / "test.csv"
+
+    test_file.write_bytes(b"\xef\xbb\xbfName\nT\xc4\x99st")
+    assert detect_encoding(test_file) == "utf-8-sig"
+
+    test_file.write_bytes(b"Name,Price\nVakariene,50 \x80")
+    assert detect_encoding(test_file) == "cp1252"
+
+    # 0x81 is undefined in cp1252, leaving latin1
+    test_file.write_bytes(b"Name\nT\x81st")
+    assert detect_encoding(test_file) == "latin1"
+
+
+def test_csv_chunk_reader_mid_file_fallback(tmp_path: Path) -> None:
+    """Test that a cp1252 row deep in a UTF-8 file is decoded instead of failing."""
+    test_file = tmp_path / "test.csv"
+    lines = [b"Name,Place"] + [f"Row{i},Kaun\u0173".encode() for i in range(1000)]
+    lines[900] = b"Caf\xe9,Paris"
+    test_file.write_bytes(b"\r\n".join(lines))
+
+    assert detect_encoding(test_file) == "utf-8"
+    with CsvChunkReader(test_file, "utf-8", 100) as reader:
+        rows = [row for chunk in reader for row in chunk]
+
+    assert len(rows) == 1000
+    assert rows[0]["Place"] == "Kaunų"
+    assert rows[899]["Name"] == "Café"
+    assert reader.fallback_lines == 1
+
+
+def test_decoded_lines_switches_encoding(tmp_path: Path) -> None:
+    """Test that consecutive fallback lines switch the encoding for the rest of the file."""
+    test_file = tmp_path / "test.txt"
+    test_file.write_bytes(b"ok\nCaf\xe9\nna\xefve\nd\xe9j\xe0\n")
+
+    with DecodedLines(test_file, "utf-8", switch_after=2) as lines:
+        assert list(lines) == ["ok\n", "Café\n", "naïve\n", "déjà\n"]
+
+    assert lines.encoding == "cp1252"
+    assert lines.fallback_lines == 2
+
+
 def test_read_csv_chunk(tmp_path: Path) -> None:
     """Test reading a chunk of CSV rows."""
     test_file = tmp_path / "test.csv"
@@ -68,6 +114,61 @@ def test_read_csv_chunk_offset_beyond_file(tmp_path: Path) -> None:
     assert len(rows) == 0
 
 
+def test_csv_chunk_reader_streams_chunks(tmp_path: Path) -> None:
+    """Test that the streaming reader yields successive chunks in one pass."""
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("Name,Value\nRow1,A\nRow2,B\nRow3,C\nRow4,D\nRow5,E", encoding="utf-8")
+
+    with CsvChunkReader(test_file, encoding="utf-8", chunk_size=2) as reader:
+        chunks = list(reader)
+        assert reader.rows_read == 5
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert [row["Name"] for chunk in chunks for row in chunk] == [
+        "Row1",
+        "Row2",
+        "Row3",
+        "Row4",
+        "Row5",
+    ]
+
+
+def test_csv_chunk_reader_quoted_newlines(tmp_path: Path) -> None:
+    """Test that chunks follow CSV records, not physical lines."""
+    test_file = tmp_path / "test.csv"
+    test_file.write_text('Name,Value\nRow1,"multi\nline"\nRow2,B\n', encoding="utf-8")
+
+    with CsvChunkReader(test_file, encoding="utf-8", chunk_size=1) as reader:
+        first = reader.read_chunk()
+        second = reader.read_chunk()
+        third = reader.read_chunk()
+
+    assert first[0]["Value"] == "multi\nline"
+    assert second[0]["Name"] == "Row2"
+    assert third == []
+    assert reader.bytes_read == test_file.stat().st_size
+
+
+def test_count_csv_rows(tmp_path: Path) -> None:
+    """Test that row counting follows CSV quoting, also across block boundaries."""
+    test_file = tmp_path / "test.csv"
+    test_file.write_bytes(
+        b'Name,Description\r\nRow1,"multi\r\nline, with ""quoted\n"" text"\r\n'
+        b'Row2,plain\r\nRow3,""""\r\nRow4,last'
+    )
+
+    with test_file.open(encoding="utf-8", newline="") as f:
+        expected = len(list(csv.DictReader(f)))
+    assert expected == 4
+    for block_size in (1, 2, 3, 7, 1024):
+        assert count_csv_rows(test_file, block_size) == expected
+
+    test_file.write_bytes(b"Name,Description\n")
+    assert count_csv_rows(test_file) == 0
+    test_file.write_bytes(b"")
+    assert count_csv_rows(test_file) == 0
+
+
 def test_extract_product_input() -> None:
     """Test extracting ProductInput from CSV row."""
     row = {
@@ -96,8 +197,8 @@ def test_extract_product_input_missing_fields() -> None:
     assert product.about_place == ""
 
 
-def test_write_csv_chunk_first(tmp_path: Path) -> None:
-    """Test writing first chunk with header."""
+def test_csv_output_writer(tmp_path: Path) -> None:
+    """Test writing rows with a header, published to the output path on commit."""
     output_file = tmp_path / "output.csv"
 
     # Create minimal test data
@@ -121,9 +222,13 @@ def test_write_csv_chunk_first(tmp_path: Path) -> None:
         },
     ]
 
-    write_csv_chunk(
-        output_file, rows, is_first_chunk=True, encoding="utf-8", output_columns=output_cols
-    )
+    with CsvOutputWriter(output_file, "utf-8", output_cols) as writer:
+        writer.write_rows(rows)
+        # Nothing is visible under the output name before commit
+        assert not output_file.exists()
+        writer.commit()
+
+    assert not writer.partial_path.exists()
 
     # Verify file contents
     with output_file.open(encoding="utf-8") as f:
@@ -135,8 +240,8 @@ def test_write_csv_chunk_first(tmp_path: Path) -> None:
     assert result_rows[1]["category"] == "unknown"
 
 
-def test_write_csv_chunk_append(tmp_path: Path) -> None:
-    """Test appending chunk without header."""
+def test_csv_output_writer_append(tmp_path: Path) -> None:
+    """Test appending successive chunks through one handle, flushed every flush_rows rows."""
     output_file = tmp_path / "output.csv"
 
     input_cols = ["ProgramName", "ProgramDescription", "About_Place"]
@@ -152,9 +257,11 @@ def test_write_csv_chunk_append(tmp_path: Path) -> None:
             "comment": "",
         }
     ]
-    write_csv_chunk(
-        output_file, rows1, is_first_chunk=True, encoding="utf-8", output_columns=output_cols
-    )
+    writer = CsvOutputWriter(output_file, "utf-8", output_cols, flush_rows=1)
+    writer.open()
+    writer.write_rows(rows1)
+    # Flushed rows are on disk in the partial file
+    assert "Test1" in writer.partial_path.read_text(encoding="utf-8")
 
     # Append second chunk
     rows2 = [
@@ -166,9 +273,9 @@ def test_write_csv_chunk_append(tmp_path: Path) -> None:
             "comment": "",
         }
     ]
-    write_csv_chunk(
-        output_file, rows2, is_first_chunk=False, encoding="utf-8", output_columns=output_cols
-    )
+    writer.write_rows(rows2)
+    writer.commit()
+    writer.close()
 
     # Verify file contents
     with output_file.open(encoding="utf-8") as f:
@@ -176,20 +283,16 @@ def test_write_csv_chunk_append(tmp_path: Path) -> None:
         result_rows = list(reader)
 
     assert len(result_rows) == 2
+    assert writer.rows_written == 2
 
 
-def test_build_language_sample(tmp_path: Path) -> None:
-    """Test building language sample from CSV."""
-    test_file = tmp_path / "test.csv"
-    content = """ProgramName,ProgramDescription,About_Place
-SPA dovana,Atsipalaidavimas ir masažai,Vilnius
-Vakarienė restorane,Skanus maistas,Kaunas
-Nuotykių parkas,Aktyvus poilsis,Klaipėda"""
-    test_file.write_text(content, encoding="utf-8")
-
-    sample = build_language_sample(test_file, "utf-8")
-
-    assert "SPA dovana" in sample
-    assert "Atsipalaidavimas ir masažai" in sample
-    assert "Vilnius" in sample
-    assert "|" in sample
+def test_csv_output_writer_discards_uncommitted(tmp_path: Path) -> None:
+    """Test that a writer closed without commit leaves no output behind."""
+    output_file = tmp_path / "output.csv"
+    output_file.write_text("previous run\n", encoding="utf-8")
+
+    with CsvOutputWriter(output_file, "utf-8", ["ProgramName"]) as writer:
+        writer.write_rows([{"ProgramName": "Test1"}])
+
+    assert not writer.partial_path.exists()
+    assert output_file.read_text(encoding="utf-8") == "previous run\n"
@@ -1,15 +1,21 @@
 """Integration tests for Gift Voucher Categorizer."""
 
+import asyncio
 import csv
-import math
+import json
+import re
 from pathlib import Path
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
-from src.config import CSV_BATCH_SIZE, REQUIRED_COLUMNS
+from openai import AsyncOpenAI
+from src import config
+from src.config import API_CONCURRENT_BATCH_SIZE, REQUIRED_COLUMNS
 from src.core import process_csv_async
 from src.llm_service import CategoryOutput, ProductInput
 
+from tests.conftest import FakeOpenAIServer
+
 
 @pytest.mark.asyncio
 @pytest.mark.integration
@@ -39,19 +45,19 @@ async def test_integration_processes_sample_csv(tmp_path: Path) -> None:
 
     mock_client = AsyncMock()
 
-    async def fake_categorize_batch_async(
+    async def fake_categorize_product_async(
         _client: AsyncMock,
-        products: list[ProductInput],
+        _product: ProductInput,
         _model: str,
         _language: str,
         _rate_limit_callback: object = None,
-    ) -> list[CategoryOutput]:
-        return [CategoryOutput(category="spa_wellness", comment="") for _ in products]
+        **_kwargs: object,
+    ) -> CategoryOutput:
+        return CategoryOutput(category="spa_wellness", comment="")
 
     with (
         patch("src.core.AsyncOpenAI", return_value=mock_client),
-        patch("src.core.detect_language_async", return_value="lt"),
-        patch("src.core.categorize_batch_async", side_effect=fake_categorize_batch_async),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
     ):
         output_path, summary = await process_csv_async(input_path)
 
@@ -87,7 +93,7 @@ async def test_integration_processes_sample_csv(tmp_path: Path) -> None:
 @pytest.mark.asyncio
 @pytest.mark.integration
 async def test_integration_chunked_processing(tmp_path: Path) -> None:
-    """Process 2001 rows to verify chunking and batch boundaries."""
+    """Process 2001 rows to verify ordering and sustained concurrency."""
     input_path = tmp_path / "large.csv"
     fieldnames = ["ProgramName", "ProgramDescription", "About_Place", "ExtraCol"]
 
@@ -105,22 +111,29 @@ async def test_integration_chunked_processing(tmp_path: Path) -> None:
             )
 
     mock_client = AsyncMock()
-    batch_sizes: list[int] = []
+    in_flight = 0
+    peak_in_flight = 0
 
-    async def fake_categorize_batch_async(
+    async def fake_categorize_product_async(
         _client: AsyncMock,
-        products: list[ProductInput],
+        product: ProductInput,
         _model: str,
         _language: str,
         _rate_limit_callback: object = None,
-    ) -> list[CategoryOutput]:
-        batch_sizes.append(len(products))
-        return [CategoryOutput(category="restaurants_food", comment="") for _ in products]
+        **_kwargs: object,
+    ) -> CategoryOutput:
+        nonlocal in_flight, peak_in_flight
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        idx = int(product.program_name.rsplit(" ", 1)[1])
+        # Vary latency so completions arrive out of order
+        await asyncio.sleep((idx % 7) * 0.0005)
+        in_flight -= 1
+        return CategoryOutput(category=f"cat-{idx}", comment="")
 
     with (
         patch("src.core.AsyncOpenAI", return_value=mock_client),
-        patch("src.core.detect_language_async", return_value="lt"),
-        patch("src.core.categorize_batch_async", side_effect=fake_categorize_batch_async),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
     ):
         output_path, summary = await process_csv_async(input_path)
 
@@ -128,9 +141,65 @@ async def test_integration_chunked_processing(tmp_path: Path) -> None:
     assert summary["total"] == 2001
     assert summary["categorized"] == 2001
     assert summary["unknown"] == 0
-    assert sum(batch_sizes) == 2001
-    assert all(size <= CSV_BATCH_SIZE for size in batch_sizes)
-    assert len(batch_sizes) == math.ceil(2001 / CSV_BATCH_SIZE)
+    assert peak_in_flight == API_CONCURRENT_BATCH_SIZE
+
+    with output_path.open(encoding="utf-8") as f:
+        output_rows = list(csv.DictReader(f))
+
+    # Rows are written in input order even though they completed out of order
+    assert [row["ExtraCol"] for row in output_rows] == [f"extra-{idx}" for idx in range(2001)]
+    assert all(row["category_id"] == f"cat-{idx}" for idx, row in enumerate(output_rows))
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_integration_slow_row_does_not_stall_pipeline(tmp_path: Path) -> None:
+    """A straggler must not block the other workers from picking up new rows."""
+    input_path = tmp_path / "straggler.csv"
+    with input_path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REQUIRED_COLUMNS)
+        writer.writeheader()
+        for idx in range(200):
+            writer.writerow(
+                {"ProgramName": f"Row {idx}", "ProgramDescription": "", "About_Place": ""}
+            )
+
+    mock_client = AsyncMock()
+    straggler_release = asyncio.Event()
+    finished_while_straggling = 0
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock,
+        product: ProductInput,
+        _model: str,
+        _language: str,
+        _rate_limit_callback: object = None,
+        **_kwargs: object,
+    ) -> CategoryOutput:
+        nonlocal finished_while_straggling
+        if product.program_name == "Row 0":
+            await straggler_release.wait()
+        else:
+            await asyncio.sleep(0)
+            if not straggler_release.is_set():
+                finished_while_straggling += 1
+                if finished_while_straggling == 199:
+                    straggler_release.set()
+        return CategoryOutput(category="292", comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=mock_client),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
+    ):
+        output_path, summary = await process_csv_async(input_path)
+
+    # Every other row finished while row 0 was still in flight
+    assert finished_while_straggling == 199
+    assert summary["categorized"] == 200
+
+    with output_path.open(encoding="utf-8") as f:
+        names = [row["ProgramName"] for row in csv.DictReader(f)]
+    assert names == [f"Row {idx}" for idx in range(200)]
 
 
 @pytest.mark.asyncio
@@ -163,19 +232,19 @@ async def test_integration_network_error_marks_unknown(tmp_path: Path) -> None:
 
     mock_client = AsyncMock()
 
-    async def fake_categorize_batch_async(
+    async def fake_categorize_product_async(
         _client: AsyncMock,
-        products: list[ProductInput],
+        _product: ProductInput,
         _model: str,
         _language: str,
         _rate_limit_callback: object = None,
-    ) -> list[CategoryOutput]:
-        return [CategoryOutput(category="unknown", comment="Network error") for _ in products]
+        **_kwargs: object,
+    ) -> CategoryOutput:
+        return CategoryOutput(category="unknown", comment="Network error")
 
     with (
         patch("src.core.AsyncOpenAI", return_value=mock_client),
-        patch("src.core.detect_language_async", return_value="lt"),
-        patch("src.core.categorize_batch_async", side_effect=fake_categorize_batch_async),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
     ):
         output_path, summary = await process_csv_async(input_path)
 
@@ -204,21 +273,21 @@ async def test_integration_unknown_language_defaults_to_lithuanian(tmp_path: Pat
 
     mock_client = AsyncMock()
 
-    async def fake_categorize_batch_async(
+    async def fake_categorize_product_async(
         _client: AsyncMock,
-        products: list[ProductInput],
+        _product: ProductInput,
         _model: str,
         language: str,
         _rate_limit_callback: object = None,
-    ) -> list[CategoryOutput]:
-        # Verify that language is "lt" even though detection returned unknown
+        **_kwargs: object,
+    ) -> CategoryOutput:
+        # Verify that language is "lt" even though the text has no identifiable language
         assert language == "lt"
-        return [CategoryOutput(category="292", comment="Chosen 292 (0.80)") for _ in products]
+        return CategoryOutput(category="292", comment="Chosen 292 (0.80)")
 
     with (
         patch("src.core.AsyncOpenAI", return_value=mock_client),
-        patch("src.core.detect_language_async", return_value="unknown"),
-        patch("src.core.categorize_batch_async", side_effect=fake_categorize_batch_async),
+        patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async),
     ):
         output_path, _ = await process_csv_async(input_path)
 
@@ -229,3 +298,148 @@ async def test_integration_unknown_language_defaults_to_lithuanian(tmp_path: Pat
 
     assert len(rows) == 1
     assert "; Language unidentified, defaulted to Lithuanian." in rows[0]["comment"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_integration_packed_mode(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Packed mode sends several rows per request and maps results back to rows."""
+    monkeypatch.setattr("src.core.PACK_SIZE", 5)
+    input_path = tmp_path / "packed.csv"
+    with input_path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REQUIRED_COLUMNS)
+        writer.writeheader()
+        for idx in range(100):
+            writer.writerow(
+                {"ProgramName": f"Product {idx}", "ProgramDescription": "", "About_Place": ""}
+            )
+
+    async def fake_create(**kwargs: object) -> Mock:
+        messages = kwargs["messages"]
+        assert isinstance(messages, list)
+        entries = re.findall(
+            r"Product entry (\d+):\n- Name: Product (\d+)", messages[-1]["content"]
+        )
+        response = Mock()
+        response.choices = [Mock()]
+        response.choices[0].message.content = json.dumps(
+            {
+                "results": [
+                    {"id": int(entry_id), "category": f"cat-{name}", "comment": ""}
+                    for entry_id, name in entries
+                ]
+            }
+        )
+        return response
+
+    async def fake_raw_create(**kwargs: object) -> Mock:
+        response = await fake_create(**kwargs)
+        return Mock(headers={}, parse=Mock(return_value=response))
+
+    mock_client = AsyncMock()
+    mock_client.chat.completions.with_raw_response.create = AsyncMock(side_effect=fake_raw_create)
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=mock_client),
+    ):
+        output_path, summary = await process_csv_async(input_path)
+
+    assert summary["categorized"] == 100
+    assert mock_client.chat.completions.with_raw_response.create.call_count == 20
+
+    with output_path.open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["category_id"] for row in rows] == [f"cat-{idx}" for idx in range(100)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_integration_resumes_from_checkpoint(tmp_path: Path) -> None:
+    """A crashed run is resumed without re-requesting completed rows."""
+    input_path = tmp_path / "resume.csv"
+    with input_path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REQUIRED_COLUMNS)
+        writer.writeheader()
+        for idx in range(300):
+            writer.writerow(
+                {"ProgramName": f"Product {idx}", "ProgramDescription": "", "About_Place": ""}
+            )
+
+    requested: list[str] = []
+
+    async def crashing_categorize_product_async(
+        _client: AsyncMock, product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        if product.program_name == "Product 250":
+            msg = "Laptop went to sleep"
+            raise RuntimeError(msg)
+        await asyncio.sleep(0)
+        return CategoryOutput(category="292", comment="")
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock, product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        requested.append(product.program_name)
+        return CategoryOutput(category="292", comment="")
+
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+    ):
+        with (
+            patch(
+                "src.core.categorize_product_async",
+                side_effect=crashing_categorize_product_async,
+            ),
+            pytest.raises(RuntimeError, match="Laptop went to sleep"),
+        ):
+            await process_csv_async(input_path)
+
+        journal_path = tmp_path / "resume_categorized.journal.jsonl"
+        assert journal_path.exists()
+
+        with patch("src.core.categorize_product_async", side_effect=fake_categorize_product_async):
+            output_path, summary = await process_csv_async(input_path)
+
+    assert "Product 250" in requested
+    assert summary["resumed_rows"] > 0
+    assert len(requested) == 300 - summary["resumed_rows"]
+    assert summary["categorized"] == 300
+    assert not journal_path.exists()
+
+    with output_path.open(encoding="utf-8") as f:
+        names = [row["ProgramName"] for row in csv.DictReader(f)]
+    assert names == [f"Product {idx}" for idx in range(300)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_integration_429_reaches_rate_limit_controller(
+    tmp_path: Path, fake_openai_server: FakeOpenAIServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the run's own client leaves 429s to the retry policy and the controller."""
+    monkeypatch.setattr(config.ACTIVE_CONFIG, "openai_api_key", "sk-test")
+    input_path = tmp_path / "input.csv"
+    input_path.write_text(
+        "ProgramName,ProgramDescription,About_Place\nSPA,Masažai,Vilnius\n", encoding="utf-8"
+    )
+    fake_openai_server.response_statuses = [429]
+    fake_openai_server.response_headers = [{"retry-after-ms": "10"}]
+    pauses: list[bool] = []
+
+    def local_client(*, api_key: str, max_retries: int = 2) -> AsyncOpenAI:
+        # Keep the run's client settings (2 is the SDK default), only redirect it locally
+        return AsyncOpenAI(
+            api_key=api_key, max_retries=max_retries, base_url=fake_openai_server.base_url
+        )
+
+    with patch("src.core.AsyncOpenAI", side_effect=local_client):
+        output_path, summary = await process_csv_async(
+            input_path, rate_limit_callback=pauses.append, language="lt"
+        )
+
+    # One 429 and one retry by the retry policy, none hidden inside the SDK
+    assert len(fake_openai_server.request_times) == 2
+    assert pauses == [True, False]
+    assert summary["categorized"] == 1
+    with output_path.open(encoding="utf-8") as f:
+        assert next(csv.DictReader(f))["category_id"] == "292"
@@ -0,0 +1,112 @@
+"""Tests for the local keyword index."""
+
+import pytest
+from src.category_tree import fold_text, load_category_tree, parse_category_tree, stem_tokens
+from src.keyword_index import KeywordIndex, get_keyword_index
+from src.llm_service import ProductInput
+
+TREE = """LT Categories
+|-- Adventure & Active
+|   |-- Oro pramogos (251)
+|   |   |-- Skrydis oro balionu (252)
+|   |   \\-- Šuolis parašiutu (253)
+|   \\-- Unknown
+\\-- Unknown
+"""
+
+
+def _product(name: str) -> ProductInput:
+    return ProductInput(program_name=name, program_description="", about_place="")
+
+
+def test_fold_text() -> None:
+    """Test that diacritics, case and punctuation are removed."""
+    assert fold_text("Šuolis  parašiutu!") == "suolis parasiutu"
+    assert fold_text("Lot balonem - Łódź") == "lot balonem lodz"
+    assert stem_tokens("Skrydžiai oro balionais") == ("skrydz", "oro", "balion")
+
+
+def test_parse_category_tree() -> None:
+    """Test that IDs, labels and parents are read from the tree."""
+    nodes = parse_category_tree(TREE)
+
+    assert [(node.category_id, node.label, node.parent_id) for node in nodes] == [
+        ("251", "Oro pramogos", None),
+        ("252", "Skrydis oro balionu", "251"),
+        ("253", "Šuolis parašiutu", "251"),
+    ]
+    assert {node.group for node in nodes} == {"Adventure & Active"}
+
+
+def test_keyword_index_matches_unambiguous_names() -> None:
+    """Test that a single clearly named category is matched locally."""
+    index = KeywordIndex(
+        {"Oro pramogos": {"251"}, "Skrydis oro balionu": {"252"}, "Šuolis parašiutu": {"253"}},
+        {"251": None, "252": "251", "253": "251"},
+    )
+
+    match = index.match(_product("SKRYDIS ORO BALIONU virš Vilniaus"))
+    assert match is not None
+    assert match.category == "252"
+    assert match.coverage == pytest.approx(0.6)
+
+    # Parent and child matched together resolve to the child
+    match = index.match(_product("Oro pramogos: suolis parasiutu"))
+    assert match is not None
+    assert match.category == "253"
+
+    result = index.classify(_product("Šuolis parašiutu"))
+    assert result is not None
+    assert result.category == "253"
+    assert result.comment.startswith("Chosen 253;")
+    assert "(1.00)" not in result.comment
+
+
+def test_keyword_index_defers_ambiguous_names() -> None:
+    """Test that conflicting or weak matches are left to the model."""
+    index = KeywordIndex(
+        {
+            "Oro pramogos": {"251"},
+            "Skrydis oro balionu": {"252"},
+            "Šuolis parašiutu": {"253"},
+            "Desertai": {"535", "650"},
+        },
+        {"251": None, "252": "251", "253": "251"},
+    )
+
+    assert index.match(_product("Skrydis oro balionu ir šuolis parašiutu")) is None
+    assert index.match(_product("Desertai")) is None
+    # A parent category alone is too broad to answer locally
+    assert index.match(_product("Oro pramogos")) is None
+    assert index.match(_product("Dovanų čekis")) is None
+    # Matched phrase covers too little of the name
+    assert index.match(_product("Šuolis parašiutu ir vakarienė dviem restorane")) is None
+
+
+@pytest.mark.parametrize(
+    ("language", "name", "category"),
+    [
+        ("lt", "Skrydis oro balionu", "252"),
+        ("lt", "Šuolis parašiutu", "253"),
+        ("lv", "Lidojumi ar gaisa balonu", "203"),
+        ("pl", "Lot balonem", "361"),
+    ],
+)
+def test_get_keyword_index_from_catalogs(language: str, name: str, category: str) -> None:
+    """Test the shipped indexes on category names from the catalogs."""
+    match = get_keyword_index(language).match(_product(name))
+
+    assert match is not None
+    assert match.category == category
+
+
+@pytest.mark.parametrize("name", ["Masažai", "SPA ir masažai", "Oro pramogos"])
+def test_get_keyword_index_leaves_generic_names_to_model(name: str) -> None:
+    """Test that names matching only a parent or catch-all category are not answered locally."""
+    assert get_keyword_index("lt").match(_product(name)) is None
+
+
+@pytest.mark.parametrize("language", ["lt", "lv", "pl"])
+def test_load_category_tree_from_package_data(language: str) -> None:
+    """Test that every language's tree ships with the categories package."""
+    assert load_category_tree(language)
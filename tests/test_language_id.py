@@ -0,0 +1,105 @@
+"""Tests for local language identification."""
+
+import pytest
+from src.language_id import (
+    LanguageIdentifier,
+    extract_ngrams,
+    get_language_identifier,
+    has_language_letters,
+    identify_majority_language,
+    identify_product_language,
+)
+from src.llm_service import ProductInput
+
+
+def _product(name: str, description: str = "", place: str = "") -> ProductInput:
+    return ProductInput(program_name=name, program_description=description, about_place=place)
+
+
+def test_extract_ngrams() -> None:
+    """Test that text is lowercased, whitespace-normalized and padded."""
+    grams = extract_ngrams("Ab  C")
+
+    assert grams[:5] == [" ", "a", "b", " ", "c"]
+    assert " ab" in grams
+    assert "b c" in grams
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Skrydis oro balionu virš Vilniaus su šampanu", "lt"),
+        ("Nugaros masažas 30 min.", "lt"),
+        ("Masāža divām personām 60 minūtes", "lv"),
+        ("Vakariņas restorānā divatā", "lv"),
+        ("Lidojums ar gaisa balonu virs Rigas", "lv"),
+        ("Masaż relaksacyjny dla dwojga", "pl"),
+        ("Skok spadochronowy w tandemie", "pl"),
+        ("Kolacja w restauracji", "pl"),
+    ],
+)
+def test_identify_language(text: str, expected: str) -> None:
+    """Test that typical product texts are identified, with or without diacritics."""
+    assert get_language_identifier().identify(text) == expected
+
+
+def test_identify_language_unknown() -> None:
+    """Test that texts without letters or without a clear winner are unknown."""
+    identifier = get_language_identifier()
+
+    assert identifier.identify("") == "unknown"
+    assert identifier.identify("123 - 45") == "unknown"
+    assert identifier.identify("Test") == "unknown"
+
+
+def test_min_margin() -> None:
+    """Test that the margin threshold decides between a language and unknown."""
+    corpora = {"aa": ["aaaa aaa"], "bb": ["bbbb bbb"]}
+
+    assert LanguageIdentifier(corpora, min_margin=0).identify("ab a") == "aa"
+    assert LanguageIdentifier(corpora, min_margin=100).identify("ab a") == "unknown"
+
+
+def test_identify_product_language() -> None:
+    """Test that name, description and place are considered together."""
+    product = _product("SPA", "Atpūtas rituāls divām personām", "Rīga")
+
+    assert identify_product_language(product) == "lv"
+
+
+def test_identify_majority_language() -> None:
+    """Test that the most common identified language wins and unknown rows are ignored."""
+    products = [
+        _product("Kolacja w restauracji"),
+        _product("Masaż relaksacyjny dla dwojga"),
+        _product("Nugaros masažas 30 min."),
+        _product("123"),
+    ]
+
+    assert identify_majority_language(products) == "pl"
+    assert identify_majority_language([_product("123")]) == "unknown"
+
+
+@pytest.mark.parametrize("name", ["Wellness day / Spa and sauna / Palanga", "Wine tasting for two"])
+def test_identify_product_language_needs_letters_to_differ_from_file(name: str) -> None:
+    """Test that text in none of the languages cannot override the file language."""
+    product = _product(name)
+
+    assert not has_language_letters(name, get_language_identifier().identify(name))
+    assert identify_product_language(product, "lt") == "unknown"
+    assert (
+        identify_product_language(_product("Lot balonem nad Krakowem", place="Kraków"), "lt")
+        == "pl"
+    )
+
+
+def test_identify_majority_language_prefers_rows_with_letters() -> None:
+    """Test that rows with language-specific letters outvote diacritic-free ones."""
+    products = [
+        _product("Wine tasting for two"),
+        _product("Wellness day / Spa and sauna"),
+        _product("Nugaros masažas 30 min."),
+    ]
+
+    assert identify_majority_language(products) == "lt"
+    assert identify_majority_language([_product("Kolacja w restauracji")]) == "pl"
@@ -1,18 +1,51 @@
 """Tests for AI client layer."""
 
+import asyncio
+import itertools
 import json
+import time
 from unittest.mock import AsyncMock, Mock
 
 import pytest
-from openai import APIError, RateLimitError
+from openai import (
+    APIError,
+    APITimeoutError,
+    AsyncOpenAI,
+    BadRequestError,
+    InternalServerError,
+    RateLimitError,
+)
+from openai.types import CompletionUsage
+from openai.types.completion_usage import PromptTokensDetails
+from src.config import REQUEST_TIMEOUT_SECONDS, TRANSIENT_RETRY_MAX_ATTEMPTS, ModelRateLimits
 from src.llm_service import (
+    DECISION_TREE_PROMPTS,
+    PROMPT_TEMPLATES,
+    SYSTEM_PROMPTS,
     CategoryOutput,
+    CompiledTemplate,
+    PackedCategorizer,
     ProductInput,
-    categorize_batch_async,
+    RateLimitController,
+    RateLimiter,
+    RequestHedger,
+    RetryPolicy,
+    RetryRule,
+    TokenUsage,
+    build_categorization_messages,
+    build_categorization_prompt,
+    build_packed_messages,
+    build_pruned_system_prompt,
+    categorize_packed_async,
     categorize_product_async,
-    detect_language_async,
+    get_prompt_version,
+    parse_packed_response,
+    parse_reset_duration,
+    parse_retry_after,
 )
 
+from tests.conftest import FakeOpenAIServer
+
 
 @pytest.mark.asyncio
 async def test_categorize_product_async_success() -> None:
@@ -43,6 +76,344 @@ async def test_categorize_product_async_success() -> None:
     mock_client.chat.completions.create.assert_called_once()
 
 
+@pytest.mark.parametrize("language", ["lt", "lv", "pl"])
+def test_build_categorization_messages_static_prefix(language: str) -> None:
+    """Test that the decision tree is a byte-identical system prefix for every product."""
+    spa = ProductInput(program_name="SPA", program_description="Masažai", about_place="Vilnius")
+    dinner = ProductInput(program_name="Vakarienė", program_description="", about_place="Kaunas")
+
+    spa_messages = build_categorization_messages(spa, language, layout="prefix_cached")
+    dinner_messages = build_categorization_messages(dinner, language, layout="prefix_cached")
+
+    assert [m["role"] for m in spa_messages] == ["system", "user"]
+    assert spa_messages[0] == dinner_messages[0]
+    system_content = str(spa_messages[0]["content"])
+    assert "{{PRODUCT_" not in system_content
+    assert "Product entry:" not in system_content
+    assert "OUTPUT:" in system_content
+
+    user_content = str(spa_messages[1]["content"])
+    assert "- Name: SPA" in user_content
+    assert "- Description: Masažai" in user_content
+    assert "- Location: Vilnius" in user_content
+    assert len(user_content) < 200
+
+
+@pytest.mark.parametrize("language", ["lt", "lv", "pl"])
+def test_build_pruned_system_prompt(language: str) -> None:
+    """Test that branches are cut out cleanly and the Unknown escape is kept."""
+    tree = DECISION_TREE_PROMPTS[language]
+    assert len(tree.top_level) == 6
+    assert build_pruned_system_prompt(language, tuple(tree.top_level)) == SYSTEM_PROMPTS[language]
+
+    pruned = build_pruned_system_prompt(language, ("Food & Drink",))
+    assert "1) Food, drink, dining, tasting, culinary? -> Food & Drink" in pruned
+    assert "2) Otherwise -> Unknown" in pruned
+    assert "\nFood & Drink:\n" in pruned
+    assert "\nAdventure & Active:\n" not in pruned
+    assert "OUTPUT:" in pruned
+    assert len(pruned) < len(SYSTEM_PROMPTS[language]) / 3
+
+
+def test_build_categorization_messages_branch_pruning() -> None:
+    """Test that products are sent with their best-matching branches only."""
+    massage = ProductInput(
+        program_name="Nugaros masažas", program_description="", about_place="Vilnius"
+    )
+    vague = ProductInput(program_name="Dovana mamai", program_description="", about_place="")
+
+    pruned = build_categorization_messages(massage, "lt", branch_top_k=1)
+    full = build_categorization_messages(vague, "lt", branch_top_k=1)
+
+    assert pruned[0]["content"] == build_pruned_system_prompt(
+        "lt", ("Relaxation, Beauty & Wellness",)
+    )
+    assert full[0]["content"] == SYSTEM_PROMPTS["lt"]
+    assert get_prompt_version("lt", branch_top_k=1) != get_prompt_version("lt", branch_top_k=0)
+
+
+def test_build_categorization_messages_inline() -> None:
+    """Test that the inline layout sends the single templated prompt."""
+    product = ProductInput(program_name="SPA", program_description="Masažai", about_place="Vilnius")
+
+    messages = build_categorization_messages(product, "lt", layout="inline")
+
+    assert messages == [{"role": "user", "content": build_categorization_prompt(product, "lt")}]
+
+
+@pytest.mark.parametrize("language", ["lt", "lv", "pl"])
+def test_build_categorization_prompt_matches_template(language: str) -> None:
+    """Test that the compiled template renders the same text as the raw template."""
+    product = ProductInput(program_name="SPA", program_description="Masažai", about_place="Vilnius")
+    expected = (
+        PROMPT_TEMPLATES[language]
+        .replace("{{PRODUCT_NAME}}", "SPA")
+        .replace("{{PRODUCT_DESCRIPTION}}", "Masažai")
+        .replace("{{PRODUCT_LOCATION}}", "Vilnius")
+    )
+
+    assert build_categorization_prompt(product, language) == expected
+
+
+def test_compiled_template_does_not_expand_product_text() -> None:
+    """Test that placeholder-like text inside product fields is kept verbatim."""
+    product = ProductInput(
+        program_name="{{PRODUCT_DESCRIPTION}}",
+        program_description="Meet at {{PRODUCT_LOCATION}}",
+        about_place="Vilnius",
+    )
+    template = CompiledTemplate("{{PRODUCT_NAME}} | {{PRODUCT_DESCRIPTION}} | {{PRODUCT_LOCATION}}")
+
+    assert template.render(product) == (
+        "{{PRODUCT_DESCRIPTION}} | Meet at {{PRODUCT_LOCATION}} | Vilnius"
+    )
+    prompt = build_categorization_prompt(product, "lt")
+    assert "- Description: Meet at {{PRODUCT_LOCATION}}\n" in prompt
+    assert "- Name: {{PRODUCT_DESCRIPTION}}\n" in prompt
+
+
+@pytest.mark.asyncio
+async def test_categorize_product_async_records_token_usage() -> None:
+    """Test that cached and uncached input tokens are accumulated."""
+    mock_client = AsyncMock()
+    mock_response = Mock()
+    mock_response.choices = [Mock()]
+    mock_response.choices[0].message.content = json.dumps({"category": "292", "comment": "ok"})
+    mock_response.usage = CompletionUsage(
+        prompt_tokens=4000,
+        completion_tokens=40,
+        total_tokens=4040,
+        prompt_tokens_details=PromptTokensDetails(cached_tokens=3840),
+    )
+    mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+    product = ProductInput(program_name="SPA", program_description="", about_place="")
+    usage = TokenUsage()
+
+    await categorize_product_async(mock_client, product, "gpt-5-nano", "lt", usage=usage)
+    await categorize_product_async(mock_client, product, "gpt-5-nano", "lt", usage=usage)
+
+    assert usage.to_summary() == {
+        "api_requests": 2,
+        "input_tokens": 8000,
+        "cached_input_tokens": 7680,
+        "uncached_input_tokens": 320,
+        "output_tokens": 80,
+    }
+
+
+async def _warm_up(hedger: RequestHedger, samples: int) -> None:
+    async def fast() -> str:
+        await asyncio.sleep(0.001)
+        return "fast"
+
+    for _ in range(samples):
+        await hedger.run(fast)
+
+
+@pytest.mark.asyncio
+async def test_request_hedger_first_response_wins() -> None:
+    """Test that a straggler gets a duplicate and the faster attempt wins."""
+    hedger = RequestHedger(percentile=0.95, max_hedge_rate=0.0, min_samples=5)
+    assert hedger.hedge_delay() is None
+    await _warm_up(hedger, 20)
+
+    async def straggler() -> str:
+        await asyncio.sleep(0.2)
+        return "slow"
+
+    # Unhedged stragglers estimate what a hedge saves
+    assert await hedger.run(straggler) == "slow"
+    assert hedger.hedges == 0
+    hedger.max_hedge_rate = 1.0
+
+    cancelled: list[str] = []
+    attempts = iter([5.0, 0.001])
+
+    async def request() -> str:
+        duration = next(attempts)
+        try:
+            await asyncio.sleep(duration)
+        except asyncio.CancelledError:
+            cancelled.append(f"{duration}")
+            raise
+        return f"took {duration}"
+
+    started = time.monotonic()
+    result = await hedger.run(request)
+    await asyncio.sleep(0)
+
+    assert result == "took 0.001"
+    assert time.monotonic() - started < 1
+    assert cancelled == ["5.0"]
+    assert hedger.to_summary()["hedged_requests"] == 1
+    assert hedger.hedge_wins == 1
+    assert hedger.time_saved > 0
+
+
+@pytest.mark.asyncio
+async def test_request_hedger_rate_cap() -> None:
+    """Test that no duplicates are sent beyond the maximum hedge rate."""
+    hedger = RequestHedger(max_hedge_rate=0.0, min_samples=3)
+    await _warm_up(hedger, 3)
+    calls = 0
+
+    async def slow() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "slow"
+
+    assert await hedger.run(slow) == "slow"
+    assert calls == 1
+    assert hedger.hedges == 0
+
+
+@pytest.mark.asyncio
+async def test_request_hedger_failed_attempt() -> None:
+    """Test that a failed attempt loses to a successful one, and double failure raises."""
+    hedger = RequestHedger(max_hedge_rate=1.0, min_samples=3)
+    await _warm_up(hedger, 3)
+
+    async def failing_primary() -> str:
+        await asyncio.sleep(0.05)
+        msg = "primary failed"
+        raise ValueError(msg)
+
+    async def hedge() -> str:
+        await asyncio.sleep(0.1)
+        return "hedge"
+
+    assert await hedger.run(failing_primary, hedge) == "hedge"
+
+    async def failing_hedge() -> str:
+        msg = "hedge failed"
+        raise ValueError(msg)
+
+    with pytest.raises(ValueError, match="primary failed"):
+        await hedger.run(failing_primary, failing_hedge)
+
+
+@pytest.mark.asyncio
+async def test_request_hedger_cancel_during_hedge_delay() -> None:
+    """Test that cancelling the caller before the hedge is sent cancels the primary."""
+    hedger = RequestHedger(max_hedge_rate=1.0, min_samples=3)
+
+    async def warm_up() -> str:
+        await asyncio.sleep(0.1)
+        return "warm"
+
+    for _ in range(3):
+        await hedger.run(warm_up)
+    cancelled = asyncio.Event()
+
+    async def request() -> str:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "slow"
+
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.05):
+            await hedger.run(request)
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert hedger.hedges == 0
+
+
+@pytest.mark.asyncio
+async def test_categorize_product_async_hedged() -> None:
+    """Test that a slow completion is answered by its hedge."""
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = json.dumps({"category": "292", "comment": "ok"})
+    response.usage = None
+    delays = itertools.chain([0.001] * 3, [5.0], itertools.repeat(0.001))
+
+    async def create(**_kwargs: object) -> Mock:
+        await asyncio.sleep(next(delays))
+        return response
+
+    mock_client = AsyncMock()
+    mock_client.chat.completions.create = create
+    product = ProductInput(program_name="SPA", program_description="", about_place="")
+    hedger = RequestHedger(max_hedge_rate=1.0, min_samples=3)
+
+    for _ in range(4):
+        result = await categorize_product_async(
+            mock_client, product, "gpt-5-nano", "lt", hedger=hedger
+        )
+
+    assert result.category == "292"
+    assert hedger.hedges == 1
+    assert hedger.hedge_wins == 1
+
+
+@pytest.mark.asyncio
+async def test_categorize_product_async_hedge_ignores_rate_limit_pause() -> None:
+    """Test that time queued behind a rate-limit pause neither triggers nor skews hedging."""
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = json.dumps({"category": "292", "comment": "ok"})
+    response.usage = None
+    raw_response = Mock(headers={})
+    raw_response.parse.return_value = response
+    requests = 0
+
+    async def create(**_kwargs: object) -> Mock:
+        nonlocal requests
+        requests += 1
+        await asyncio.sleep(0.001)
+        return raw_response
+
+    mock_client = AsyncMock()
+    mock_client.chat.completions.with_raw_response.create = create
+    product = ProductInput(program_name="SPA", program_description="", about_place="")
+    hedger = RequestHedger(max_hedge_rate=1.0, min_samples=3)
+    controller = RateLimitController(4)
+    for _ in range(3):
+        await categorize_product_async(
+            mock_client, product, "gpt-5-nano", "lt", controller=controller, hedger=hedger
+        )
+
+    controller.pause(0.2)
+    result = await categorize_product_async(
+        mock_client, product, "gpt-5-nano", "lt", controller=controller, hedger=hedger
+    )
+
+    assert result.category == "292"
+    assert requests == 4
+    assert hedger.hedges == 0
+    delay = hedger.hedge_delay()
+    assert delay is not None
+    assert delay < 0.1
+
+
+@pytest.mark.asyncio
+async def test_categorize_product_async_timeouts() -> None:
+    """Test the per-attempt timeout and that the row budget bounds all attempts."""
+    mock_client = AsyncMock()
+
+    async def create(**kwargs: object) -> Mock:
+        assert kwargs["timeout"] == REQUEST_TIMEOUT_SECONDS
+        await asyncio.sleep(10)
+        return Mock()
+
+    mock_client.chat.completions.create = create
+    product = ProductInput(program_name="SPA", program_description="", about_place="")
+
+    started = time.monotonic()
+    result = await categorize_product_async(
+        mock_client, product, "gpt-5-nano", "lt", time_budget=0.05
+    )
+
+    assert time.monotonic() - started < 1
+    assert result.category == "unknown"
+    assert "time budget" in result.comment
+
+
 @pytest.mark.asyncio
 async def test_categorize_product_async_empty_response() -> None:
     """Test handling of empty API response."""
@@ -157,6 +528,77 @@ async def test_categorize_product_async_rate_limit_error() -> None:
     assert mock_client.chat.completions.create.call_count == 6
 
 
+def _status_error[E: APIError](
+    error_type: type[E], status: int, headers: dict[str, str] | None = None
+) -> E:
+    response = Mock(status_code=status, headers=headers or {})
+    return error_type("API error", response=response, body=None)  # type: ignore[call-arg]
+
+
+@pytest.mark.asyncio
+async def test_categorize_product_async_retries_transient_errors() -> None:
+    """Test that timeouts and 5xx errors are retried while client errors are not."""
+    mock_response = Mock()
+    mock_response.choices = [Mock()]
+    mock_response.choices[0].message.content = json.dumps({"category": "292", "comment": ""})
+    product = ProductInput(program_name="Test", program_description="", about_place="")
+    timeout = APITimeoutError(request=Mock())
+
+    mock_client = AsyncMock()
+    mock_client.chat.completions.create = AsyncMock(
+        side_effect=[timeout, _status_error(InternalServerError, 503), mock_response]
+    )
+    result = await categorize_product_async(mock_client, product, "gpt-5-nano", "lt")
+
+    assert result.category == "292"
+    assert mock_client.chat.completions.create.call_count == 3
+
+    mock_client.chat.completions.create = AsyncMock(side_effect=_status_error(BadRequestError, 400))
+    result = await categorize_product_async(mock_client, product, "gpt-5-nano", "lt")
+
+    assert result.category == "unknown"
+    assert mock_client.chat.completions.create.call_count == 1
+
+
+def test_parse_retry_after() -> None:
+    """Test that retry-after-ms takes precedence over retry-after and bad values are ignored."""
+    assert parse_retry_after(_status_error(RateLimitError, 429, {"retry-after": "2"})) == 2
+    assert (
+        parse_retry_after(
+            _status_error(RateLimitError, 429, {"retry-after": "2", "retry-after-ms": "1500"})
+        )
+        == 1.5
+    )
+    assert parse_retry_after(_status_error(RateLimitError, 429, {"retry-after": "soon"})) is None
+    assert parse_retry_after(ValueError("no response")) is None
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_backoff() -> None:
+    """Test exponential backoff with jitter, Retry-After and rule lookup by base class."""
+    policy = RetryPolicy({APIError: RetryRule(max_attempts=3, min_wait=1, max_wait=3, jitter=0.5)})
+    error = _status_error(InternalServerError, 500)
+    rule = policy.rule_for(error)
+
+    assert rule is not None
+    assert policy.rule_for(ValueError()) is None
+    assert 0.5 <= policy.wait_seconds(rule, 1, error) <= 1
+    assert 1 <= policy.wait_seconds(rule, 2, error) <= 2
+    assert 1.5 <= policy.wait_seconds(rule, 5, error) <= 3
+    limited = _status_error(RateLimitError, 429, {"retry-after-ms": "20"})
+    assert policy.wait_seconds(rule, 1, limited) == pytest.approx(0.02)
+
+    attempts: list[float] = []
+    policy = RetryPolicy({APIError: RetryRule(max_attempts=3, min_wait=0, max_wait=0)})
+
+    async def failing() -> None:
+        raise error
+
+    with pytest.raises(InternalServerError):
+        await policy.call(failing, lambda _error, wait: attempts.append(wait))
+    assert attempts == [0, 0]
+
+
 @pytest.mark.asyncio
 async def test_categorize_product_async_api_error() -> None:
     """Test handling of general API errors."""
@@ -202,205 +644,387 @@ async def test_categorize_product_async_unexpected_error() -> None:
     assert "Unexpected error during categorization" in result.comment
 
 
-@pytest.mark.asyncio
-async def test_categorize_batch_async_success() -> None:
-    """Test batch categorization with multiple products."""
-    mock_client = AsyncMock()
+def _raw_response(response: Mock, headers: dict[str, str] | None = None) -> Mock:
+    return Mock(headers=headers or {}, parse=Mock(return_value=response))
 
-    # Mock responses for different products
-    def create_mock_response(category: str) -> Mock:
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps(
-            {
-                "category": category,
-                "comment": f"Chosen {category} (0.70); considered Unknown (0.10) but matches.",
-            }
-        )
-        return mock_response
 
-    mock_client.chat.completions.create = AsyncMock(
-        side_effect=[
-            create_mock_response("SPA ir masažai (spa-ir-masazai)"),
-            create_mock_response("Vakarienės (vakarienes)"),
-            create_mock_response("Poilsis Lietuvoje (poilsis-su-nakvyne)"),
-        ]
-    )
+def _packed_response(items: list[dict[str, object]]) -> Mock:
+    mock_response = Mock()
+    mock_response.choices = [Mock()]
+    mock_response.choices[0].message.content = json.dumps({"results": items})
+    return mock_response
 
-    products: list[ProductInput] = [
-        ProductInput(
-            program_name="SPA",
-            program_description="Masažai",
-            about_place="Vilnius",
-        ),
-        ProductInput(
-            program_name="Restoranas",
-            program_description="Pietūs",
-            about_place="Kaunas",
-        ),
-        ProductInput(
-            program_name="Viešbutis",
-            program_description="Nakvynė",
-            about_place="Klaipėda",
-        ),
+
+def test_build_packed_messages_shares_static_prefix() -> None:
+    """Test that packed requests reuse the single-product system prefix."""
+    products = [
+        ProductInput(program_name="SPA", program_description="", about_place="Vilnius"),
+        ProductInput(program_name="Vakarienė", program_description="", about_place="Kaunas"),
     ]
 
-    results = await categorize_batch_async(mock_client, products, "gpt-5-nano", "lt")
+    messages = build_packed_messages(products, "lt")
+    single = build_categorization_messages(products[0], "lt", layout="prefix_cached")
 
-    # Wrap in gather check since gather return values might be wrapped
-    assert len(results) == 3
-    assert isinstance(results[0], CategoryOutput)
-    assert results[0].category == "SPA ir masažai (spa-ir-masazai)"
-    assert isinstance(results[1], CategoryOutput)
-    assert results[1].category == "Vakarienės (vakarienes)"
-    assert isinstance(results[2], CategoryOutput)
-    assert results[2].category == "Poilsis Lietuvoje (poilsis-su-nakvyne)"
+    assert messages[0] == single[0]
+    user_content = str(messages[-1]["content"])
+    assert "Product entry 1:\n- Name: SPA" in user_content
+    assert "Product entry 2:\n- Name: Vakarienė" in user_content
 
 
-@pytest.mark.asyncio
-async def test_categorize_batch_async_with_exceptions() -> None:
-    """Test batch categorization handles exceptions gracefully."""
-    mock_client = AsyncMock()
+def test_build_packed_messages_branch_pruning() -> None:
+    """Test that packs keep the union of their products' branches."""
+    massage = ProductInput(
+        program_name="Nugaros masažas", program_description="", about_place="Vilnius"
+    )
+    dinner = ProductInput(
+        program_name="Degustacinė vakarienė", program_description="", about_place="Kaunas"
+    )
+    vague = ProductInput(program_name="Dovana mamai", program_description="", about_place="")
+
+    pruned = build_packed_messages([massage, dinner], "lt", branch_top_k=1)
+    full = build_packed_messages([massage, vague], "lt", branch_top_k=1)
+
+    assert pruned[0]["content"] == build_pruned_system_prompt(
+        "lt", ("Food & Drink", "Relaxation, Beauty & Wellness")
+    )
+    assert full[0]["content"] == SYSTEM_PROMPTS["lt"]
+
+
+def test_parse_packed_response_drops_invalid_items() -> None:
+    """Test that malformed, duplicate and out-of-range items are dropped."""
+    content = json.dumps(
+        {
+            "results": [
+                {"id": 1, "category": "292", "comment": "SPA"},
+                {"id": "2", "category": "299", "comment": "Dinner"},
+                {"id": 2, "category": "111", "comment": "Duplicate"},
+                {"id": 3, "comment": "Missing category"},
+                {"id": 9, "category": "252", "comment": "Unknown id"},
+            ]
+        }
+    )
+
+    results = parse_packed_response(content, expected=3)
+
+    assert results == {
+        1: CategoryOutput(category="292", comment="SPA"),
+        2: CategoryOutput(category="299", comment="Dinner"),
+    }
+    assert parse_packed_response("{invalid json}", expected=3) == {}
 
-    def create_mock_response(category: str) -> Mock:
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps(
-            {
-                "category": category,
-                "comment": f"Chosen {category} (0.70); considered Unknown (0.10) but matches.",
-            }
-        )
-        return mock_response
 
-    # First succeeds, second fails, third succeeds
+@pytest.mark.asyncio
+async def test_categorize_packed_async_retries_missing_individually() -> None:
+    """Test that products missing from a packed response are retried one by one."""
+    mock_client = AsyncMock()
+    single_response = Mock()
+    single_response.choices = [Mock()]
+    single_response.choices[0].message.content = json.dumps(
+        {"category": "252", "comment": "Balloon"}
+    )
     mock_client.chat.completions.create = AsyncMock(
         side_effect=[
-            create_mock_response("SPA ir masažai (spa-ir-masazai)"),
-            ValueError("Test error"),
-            create_mock_response("Poilsis Lietuvoje (poilsis-su-nakvyne)"),
+            _packed_response(
+                [
+                    {"id": 1, "category": "292", "comment": "SPA"},
+                    {"id": 3, "category": "299", "comment": "Dinner"},
+                ]
+            ),
+            single_response,
         ]
     )
-
-    products: list[ProductInput] = [
-        ProductInput(program_name="SPA", program_description="Test", about_place="Test"),
-        ProductInput(
-            program_name="Error",
-            program_description="Test",
-            about_place="Test",
-        ),
-        ProductInput(
-            program_name="Hotel",
-            program_description="Test",
-            about_place="Test",
-        ),
+    products = [
+        ProductInput(program_name=name, program_description="", about_place="")
+        for name in ["SPA", "Skrydis oro balionu", "Vakarienė"]
     ]
 
-    results = await categorize_batch_async(mock_client, products, "gpt-5-nano", "lt")
+    results = await categorize_packed_async(mock_client, products, "gpt-5-nano", "lt")
 
-    assert len(results) == 3
-    assert isinstance(results[0], CategoryOutput)
-    assert results[0].category == "SPA ir masažai (spa-ir-masazai)"
-    assert isinstance(results[1], CategoryOutput)
-    assert results[1].category == "unknown"
-    assert "Unexpected error" in results[1].comment
-    assert isinstance(results[2], CategoryOutput)
-    assert results[2].category == "Poilsis Lietuvoje (poilsis-su-nakvyne)"
+    assert [result.category for result in results] == ["292", "252", "299"]
+    assert mock_client.chat.completions.create.call_count == 2
+    retry_messages = mock_client.chat.completions.create.call_args.kwargs["messages"]
+    assert "Skrydis oro balionu" in str(retry_messages[-1]["content"])
 
 
 @pytest.mark.asyncio
-async def test_categorize_batch_async_empty_list() -> None:
-    """Test batch categorization with empty product list."""
+async def test_categorize_packed_async_shares_row_time_budget() -> None:
+    """Test that the packed request and its individual fallbacks share one row budget."""
     mock_client = AsyncMock()
+    calls = 0
+
+    async def create(**_kwargs: object) -> Mock:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(0.15)
+            return _packed_response([{"id": 1, "category": "292", "comment": "SPA"}])
+        await asyncio.sleep(10)
+        return Mock()
+
+    mock_client.chat.completions.create = create
+    products = [
+        ProductInput(program_name=name, program_description="", about_place="")
+        for name in ["SPA", "Skrydis oro balionu"]
+    ]
 
-    results = await categorize_batch_async(mock_client, [], "gpt-5-nano", "lt")
+    started = time.monotonic()
+    results = await categorize_packed_async(
+        mock_client, products, "gpt-5-nano", "lt", time_budget=0.2
+    )
 
-    assert len(results) == 0
-    mock_client.chat.completions.create.assert_not_called()
+    # A fresh budget for the fallback would end at 0.35s
+    assert time.monotonic() - started < 0.3
+    assert results[0].category == "292"
+    assert results[1].category == "unknown"
+    assert "time budget" in results[1].comment
 
 
 @pytest.mark.asyncio
-async def test_detect_language_async_lithuanian() -> None:
-    """Test language detection returns Lithuanian."""
+async def test_categorize_packed_async_times_out_packed_request() -> None:
+    """Test that a hanging packed request is bounded by the row budget."""
     mock_client = AsyncMock()
-    mock_response = Mock()
-    mock_response.choices = [Mock()]
-    mock_response.choices[0].message.content = json.dumps({"language": "lt"})
 
-    mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+    async def create(**_kwargs: object) -> Mock:
+        await asyncio.sleep(10)
+        return Mock()
 
-    result = await detect_language_async(mock_client, "SPA dovana Vilniuje", "gpt-5-nano")
+    mock_client.chat.completions.create = create
+    products = [
+        ProductInput(program_name=name, program_description="", about_place="")
+        for name in ["SPA", "Vakarienė"]
+    ]
 
-    assert result == "lt"
-    mock_client.chat.completions.create.assert_called_once()
+    started = time.monotonic()
+    results = await categorize_packed_async(
+        mock_client, products, "gpt-5-nano", "lt", time_budget=0.05
+    )
+
+    assert time.monotonic() - started < 1
+    assert [result.category for result in results] == ["unknown", "unknown"]
+    assert all("time budget" in result.comment for result in results)
 
 
 @pytest.mark.asyncio
-async def test_detect_language_async_latvian() -> None:
-    """Test language detection returns Latvian."""
+async def test_packed_categorizer_groups_concurrent_requests() -> None:
+    """Test that concurrent single-product calls are sent as one packed request."""
     mock_client = AsyncMock()
-    mock_response = Mock()
-    mock_response.choices = [Mock()]
-    mock_response.choices[0].message.content = json.dumps({"language": "lv"})
+    mock_client.chat.completions.create = AsyncMock(
+        return_value=_packed_response(
+            [{"id": idx, "category": str(300 + idx), "comment": ""} for idx in range(1, 5)]
+        )
+    )
+    packer = PackedCategorizer(mock_client, "gpt-5-nano", pack_size=4, linger_seconds=10)
+    products = [
+        ProductInput(program_name=f"Product {idx}", program_description="", about_place="")
+        for idx in range(4)
+    ]
 
-    mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+    results = await asyncio.gather(*(packer.categorize(product, "lt") for product in products))
+    await packer.aclose()
 
-    result = await detect_language_async(mock_client, "SPA dāvana Rīgā", "gpt-5-nano")
+    assert [result.category for result in results] == ["301", "302", "303", "304"]
+    mock_client.chat.completions.create.assert_called_once()
 
-    assert result == "lv"
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_requests_by_rpm() -> None:
+    """Test that requests beyond the RPM burst are delayed."""
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=10**9, burst_seconds=0.1)
+
+    start = time.monotonic()
+    for _ in range(3):
+        await limiter.acquire(1)
+    elapsed = time.monotonic() - start
+
+    # Burst holds one request, then one request per 0.1s
+    assert elapsed >= 0.18
 
 
 @pytest.mark.asyncio
-async def test_detect_language_async_polish() -> None:
-    """Test language detection returns Polish."""
-    mock_client = AsyncMock()
-    mock_response = Mock()
-    mock_response.choices = [Mock()]
-    mock_response.choices[0].message.content = json.dumps({"language": "pl"})
+async def test_rate_limiter_waits_for_token_budget() -> None:
+    """Test that a request waits until its estimated tokens fit the TPM budget."""
+    limiter = RateLimiter(requests_per_minute=10**9, tokens_per_minute=60_000, burst_seconds=0.1)
 
-    mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+    start = time.monotonic()
+    await limiter.acquire(100)
+    immediate = time.monotonic() - start
+    await limiter.acquire(50)
+    elapsed = time.monotonic() - start
+
+    assert immediate < 0.02
+    assert elapsed >= 0.045
+
+
+def test_rate_limiter_for_model_uses_configured_limits(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that per-model RPM/TPM budgets come from the config."""
+    monkeypatch.setattr(
+        "src.llm_service.MODEL_RATE_LIMITS",
+        {"gpt-5-nano": ModelRateLimits(rpm=600, tpm=120_000)},
+    )
+    monkeypatch.setattr("src.llm_service.RATE_LIMIT_UTILIZATION", 1.0)
 
-    result = await detect_language_async(mock_client, "Prezent SPA w Warszawie", "gpt-5-nano")
+    limiter = RateLimiter.for_model("gpt-5-nano")
 
-    assert result == "pl"
+    assert limiter.requests.rate_per_second == 10
+    assert limiter.tokens.rate_per_second == 2000
 
 
 @pytest.mark.asyncio
-async def test_detect_language_async_unknown() -> None:
-    """Test language detection returns unknown for unrecognized language."""
+async def test_categorize_product_async_settles_actual_usage() -> None:
+    """Test that the token budget is charged with the actual usage of the response."""
     mock_client = AsyncMock()
     mock_response = Mock()
     mock_response.choices = [Mock()]
-    mock_response.choices[0].message.content = json.dumps({"language": "unknown"})
-
+    mock_response.choices[0].message.content = json.dumps({"category": "292", "comment": "ok"})
+    mock_response.usage = CompletionUsage(
+        prompt_tokens=900, completion_tokens=100, total_tokens=1000
+    )
     mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+    limiter = RateLimiter(requests_per_minute=10**6, tokens_per_minute=10**6, burst_seconds=60)
+    product = ProductInput(program_name="SPA", program_description="", about_place="")
+
+    await categorize_product_async(mock_client, product, "gpt-5-nano", "lt", limiter=limiter)
+
+    assert limiter.tokens.capacity - limiter.tokens.level == pytest.approx(1000, abs=50)
+
+
+def test_parse_reset_duration() -> None:
+    """Test parsing of x-ratelimit-reset-* durations."""
+    assert parse_reset_duration("1s") == 1.0
+    assert parse_reset_duration("6m0s") == 360.0
+    assert parse_reset_duration("20ms") == pytest.approx(0.02)
+    assert parse_reset_duration("1h2m3.5s") == pytest.approx(3723.5)
+    assert parse_reset_duration(None) is None
+    assert parse_reset_duration("soon") is None
+
 
-    result = await detect_language_async(mock_client, "???", "gpt-5-nano")
+def test_rate_limit_controller_adapts_concurrency() -> None:
+    """Test additive increase on ample quota and multiplicative decrease on low quota."""
+    controller = RateLimitController(max_concurrency=8)
+    low = {"x-ratelimit-remaining-requests": "40", "x-ratelimit-limit-requests": "500"}
+    ample = {"x-ratelimit-remaining-tokens": "150000", "x-ratelimit-limit-tokens": "200000"}
 
-    assert result == "unknown"
+    controller.observe(low)
+    assert controller.concurrency == 4
+    controller.observe(low)
+    assert controller.concurrency == 2
+    controller.observe(ample)
+    assert controller.concurrency == 3
+    controller.observe({})
+    assert controller.concurrency == 3
+    assert controller.pause_remaining() == 0
 
 
 @pytest.mark.asyncio
-async def test_detect_language_async_invalid_code() -> None:
-    """Test language detection handles invalid language codes."""
-    mock_client = AsyncMock()
-    mock_response = Mock()
-    mock_response.choices = [Mock()]
-    mock_response.choices[0].message.content = json.dumps({"language": "invalid"})
+async def test_rate_limit_controller_pauses_before_quota_runs_out(
+    fake_openai_server: FakeOpenAIServer,
+) -> None:
+    """Test against a local server that nearly exhausted quota pauses the next request."""
+    fake_openai_server.response_headers = [
+        {
+            "x-ratelimit-limit-requests": "500",
+            "x-ratelimit-remaining-requests": "499",
+            "x-ratelimit-limit-tokens": "200000",
+            "x-ratelimit-remaining-tokens": "199000",
+        },
+        {
+            "x-ratelimit-limit-requests": "500",
+            "x-ratelimit-remaining-requests": "3",
+            "x-ratelimit-reset-requests": "300ms",
+            "x-ratelimit-limit-tokens": "200000",
+            "x-ratelimit-remaining-tokens": "150000",
+            "x-ratelimit-reset-tokens": "1ms",
+        },
+    ]
+    client = AsyncOpenAI(api_key="test", base_url=fake_openai_server.base_url, max_retries=0)
+    controller = RateLimitController(max_concurrency=4)
+    product = ProductInput(program_name="SPA", program_description="", about_place="")
 
-    mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+    first = await categorize_product_async(
+        client, product, "gpt-5-nano", "lt", controller=controller
+    )
+    assert first.category == "292"
+    assert controller.concurrency == 4
 
-    result = await detect_language_async(mock_client, "test", "gpt-5-nano")
+    await categorize_product_async(client, product, "gpt-5-nano", "lt", controller=controller)
+    assert controller.concurrency == 2
+    assert controller.pause_remaining() > 0
 
-    assert result == "unknown"
+    await categorize_product_async(client, product, "gpt-5-nano", "lt", controller=controller)
+    gaps = [b - a for a, b in itertools.pairwise(fake_openai_server.request_times)]
+    assert gaps[1] >= 0.25
+    assert controller.in_flight == 0
 
 
 @pytest.mark.asyncio
-async def test_detect_language_async_error() -> None:
-    """Test language detection handles errors gracefully."""
-    mock_client = AsyncMock()
-    mock_client.chat.completions.create = AsyncMock(side_effect=ValueError("API error"))
+async def test_rate_limit_controller_pause_episode_and_slow_start() -> None:
+    """Test that 429s open one pause sized from the headers and concurrency ramps back up."""
+    events: list[bool] = []
+    controller = RateLimitController(max_concurrency=8, pause_callback=events.append)
+    reset_only = _status_error(RateLimitError, 429, {"x-ratelimit-reset-requests": "150ms"})
+
+    controller.rate_limited(reset_only, fallback_wait=30)
+    controller.rate_limited(_status_error(RateLimitError, 429), fallback_wait=0.01)
+    assert 0.1 < controller.pause_remaining() <= 0.15
+    assert controller.concurrency == 1
+    assert controller.pause_episodes == 1
+    assert events == [True]
+
+    await controller.acquire()
+    await controller.release()
+    assert events == [True, False]
+
+    for expected in range(2, 9):
+        controller.observe({})
+        assert controller.concurrency == expected
+    controller.observe({})
+    assert controller.concurrency == 8
+    assert controller.ramp_target == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_controller_coordinates_429s(
+    fake_openai_server: FakeOpenAIServer,
+) -> None:
+    """Test against a local server that a 429 burst pauses every request once."""
+    fake_openai_server.response_statuses = [429] * 4
+    fake_openai_server.response_headers = [{"retry-after-ms": "300"}] * 4
+    client = AsyncOpenAI(api_key="test", base_url=fake_openai_server.base_url, max_retries=0)
+    events: list[bool] = []
+    controller = RateLimitController(max_concurrency=4, pause_callback=events.append)
+    product = ProductInput(program_name="SPA", program_description="", about_place="")
+
+    started = time.monotonic()
+    results = await asyncio.gather(
+        *(
+            categorize_product_async(client, product, "gpt-5-nano", "lt", controller=controller)
+            for _ in range(4)
+        )
+    )
+
+    assert [result.category for result in results] == ["292"] * 4
+    assert events == [True, False]
+    assert controller.pause_episodes == 1
+    retries = fake_openai_server.request_times[4:]
+    assert len(retries) == 4
+    assert min(retries) - started >= 0.25
 
-    result = await detect_language_async(mock_client, "test", "gpt-5-nano")
 
-    assert result == "unknown"
+@pytest.mark.asyncio
+async def test_retry_policy_is_the_only_retry_layer(
+    fake_openai_server: FakeOpenAIServer,
+) -> None:
+    """Test that each 5xx attempt is one HTTP request admitted by the rate limiter."""
+    fake_openai_server.response_statuses = [500] * TRANSIENT_RETRY_MAX_ATTEMPTS
+    # Built like the clients of process_csv_async, without SDK retries
+    client = AsyncOpenAI(api_key="test", base_url=fake_openai_server.base_url, max_retries=0)
+    limiter = RateLimiter(requests_per_minute=10**9, tokens_per_minute=10**9)
+    acquire = AsyncMock(wraps=limiter.acquire)
+    limiter.acquire = acquire  # type: ignore[method-assign]
+    product = ProductInput(program_name="SPA", program_description="", about_place="")
+
+    result = await categorize_product_async(client, product, "gpt-5-nano", "lt", limiter=limiter)
+
+    assert result.category == "unknown"
+    assert len(fake_openai_server.request_times) == TRANSIENT_RETRY_MAX_ATTEMPTS
+    assert acquire.await_count == TRANSIENT_RETRY_MAX_ATTEMPTS
@@ -0,0 +1,115 @@
+"""Memory benchmark: peak memory of a run does not grow with the input file size.
+
+Deselected by default; run with:
+    uv run pytest -m benchmark tests/test_memory_benchmark.py
+"""
+
+import asyncio
+import resource
+import sys
+import tracemalloc
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from loguru import logger
+from src.config import PIPELINE_MAX_PENDING_BYTES
+from src.core import process_csv_async
+from src.llm_service import CategoryOutput, ProductInput
+
+INPUT_BYTES = 2 * 1024 * 1024 * 1024
+BASELINE_BYTES = INPUT_BYTES // 8
+EXTRA_COLUMNS = 57  # Plus the three required columns
+DESCRIPTION_CHARS = 100_000  # HTML description of a typical row
+HUGE_DESCRIPTION_CHARS = 1_000_000  # Every HUGE_ROW_EVERY-th row, past csv's default field limit
+HUGE_ROW_EVERY = 50
+# Allowance for everything besides the pending rows: interpreter state, category catalogs,
+# read and write buffers, the reader's current chunk and the bounded dedup results
+FIXED_OVERHEAD_BYTES = 96 * 1024 * 1024
+
+
+def write_wide_csv(path: Path, size: int) -> int:
+    """Write an export of about `size` bytes with 60 columns and long HTML descriptions.
+
+    Returns:
+        Number of data rows written
+    """
+    extra_names = [f"Extra{column}" for column in range(EXTRA_COLUMNS)]
+    extra_values = ",".join(f"value-{column}-abcdefghijklmnopqrstuvwxyz" for column in extra_names)
+    paragraph = "<p>Atpalaiduojantis masažas ir SPA ritualai dviem asmenims.</p>"
+    description = (paragraph * (DESCRIPTION_CHARS // len(paragraph) + 1))[:DESCRIPTION_CHARS]
+    huge_description = (paragraph * (HUGE_DESCRIPTION_CHARS // len(paragraph) + 1))[
+        :HUGE_DESCRIPTION_CHARS
+    ]
+
+    rows = 0
+    written = 0
+    with path.open("w", encoding="utf-8", newline="") as f:
+        written += f.write(f"ProgramName,ProgramDescription,About_Place,{','.join(extra_names)}\n")
+        while written < size:
+            text = huge_description if rows % HUGE_ROW_EVERY == 0 else description
+            written += f.write(f'Programa {rows},"{text}",Vilnius,{extra_values}\n')
+            rows += 1
+    return rows
+
+
+async def measure_run(input_path: Path) -> tuple[int, dict[str, int | float]]:
+    """Process a file and return the traced peak memory with the run summary."""
+
+    async def fake_categorize_product_async(
+        _client: AsyncMock, _product: ProductInput, *_args: object, **_kwargs: object
+    ) -> CategoryOutput:
+        await asyncio.sleep(0)
+        return CategoryOutput(category="292", comment="")
+
+    tracemalloc.reset_peak()
+    # Patched with the plain function: a mock would keep every call's product alive
+    with (
+        patch("src.core.AsyncOpenAI", return_value=AsyncMock()),
+        patch("src.core.categorize_product_async", fake_categorize_product_async),
+    ):
+        _, summary = await process_csv_async(input_path, language="lt")
+    return tracemalloc.get_traced_memory()[1], summary
+
+
+def max_rss_bytes() -> int:
+    """Return the peak resident set size of the process so far."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024  # Linux reports KiB
+
+
+@pytest.mark.asyncio
+@pytest.mark.benchmark
+@pytest.mark.skipif(sys.platform == "win32", reason="resource module is POSIX only")
+async def test_peak_memory_independent_of_input_size(tmp_path: Path) -> None:
+    """Test that a 2 GB input peaks at the same memory as one eight times smaller."""
+    baseline_path = tmp_path / "baseline.csv"
+    baseline_rows = write_wide_csv(baseline_path, BASELINE_BYTES)
+    input_path = tmp_path / "input.csv"
+    input_rows = write_wide_csv(input_path, INPUT_BYTES)
+
+    tracemalloc.start()
+    try:
+        baseline_peak, baseline_summary = await measure_run(baseline_path)
+        rss_after_baseline = max_rss_bytes()
+        input_peak, input_summary = await measure_run(input_path)
+        rss_growth = max_rss_bytes() - rss_after_baseline
+    finally:
+        tracemalloc.stop()
+
+    mib = 1024 * 1024
+    logger.info(
+        f"\nbaseline: {baseline_rows} rows, traced peak {baseline_peak / mib:.0f} MiB"
+        f"\n2 GB:     {input_rows} rows, traced peak {input_peak / mib:.0f} MiB, "
+        f"pending peak {input_summary['peak_pending_bytes'] / mib:.0f} MiB, "
+        f"max RSS growth {rss_growth / mib:.0f} MiB"
+    )
+
+    assert baseline_summary["total"] == baseline_rows
+    assert input_summary["total"] == input_rows
+    assert input_summary["peak_pending_bytes"] <= PIPELINE_MAX_PENDING_BYTES
+    assert input_peak <= PIPELINE_MAX_PENDING_BYTES + FIXED_OVERHEAD_BYTES
+    # Eight times the input, about the same peak; the spread is which large rows and
+    # buffers happen to coincide
+    assert input_peak <= baseline_peak * 1.25
+    assert rss_growth <= 32 * mib
@@ -0,0 +1,73 @@
+"""Tests for the persistent result cache."""
+
+from pathlib import Path
+
+from src.llm_service import CategoryOutput, ProductInput, get_prompt_version
+from src.result_cache import ResultCache, make_cache_key
+
+
+def _product(name: str, description: str = "Masažai", place: str = "Vilnius") -> ProductInput:
+    return ProductInput(program_name=name, program_description=description, about_place=place)
+
+
+def test_make_cache_key_normalizes_whitespace() -> None:
+    """Test that cosmetic whitespace differences map to the same key."""
+    key = make_cache_key(_product("SPA  dovana "), "lt", "gpt-5-nano", "v1")
+    same = make_cache_key(_product(" SPA dovana"), "lt", "gpt-5-nano", "v1")
+
+    assert key == same
+
+
+def test_make_cache_key_includes_settings() -> None:
+    """Test that language, model and prompt version are part of the key."""
+    product = _product("SPA dovana")
+    base = make_cache_key(product, "lt", "gpt-5-nano", "v1")
+
+    assert base != make_cache_key(product, "lv", "gpt-5-nano", "v1")
+    assert base != make_cache_key(product, "lt", "gpt-5-mini", "v1")
+    assert base != make_cache_key(product, "lt", "gpt-5-nano", "v2")
+
+
+def test_result_cache_roundtrip_and_counters(tmp_path: Path) -> None:
+    """Test storing and retrieving a result across reopen."""
+    path = tmp_path / "cache.sqlite3"
+    key = make_cache_key(_product("SPA"), "lt", "gpt-5-nano", "v1")
+
+    with ResultCache(path, max_entries=10) as cache:
+        assert cache.get(key) is None
+        cache.put(key, "v1", CategoryOutput(category="292", comment="Chosen 292 (0.90)"))
+        assert cache.hits == 0
+        assert cache.misses == 1
+
+    with ResultCache(path, max_entries=10) as cache:
+        result = cache.get(key)
+        assert result == CategoryOutput(category="292", comment="Chosen 292 (0.90)")
+        assert cache.hits == 1
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    """Test that the cache stays within max_entries, dropping the oldest entries."""
+    with ResultCache(tmp_path / "cache.sqlite3", max_entries=10) as cache:
+        for idx in range(10):
+            cache.put(f"key-{idx}", "v1", CategoryOutput(category=str(idx), comment=""))
+        # Touch the oldest entry so it survives eviction
+        assert cache.get("key-0") is not None
+        cache.put("key-10", "v1", CategoryOutput(category="10", comment=""))
+
+        assert len(cache) <= 10
+        assert cache.get("key-0") is not None
+        assert cache.get("key-1") is None
+        assert cache.get("key-10") is not None
+
+
+def test_result_cache_purge_stale(tmp_path: Path) -> None:
+    """Test that entries from outdated prompt versions are invalidated."""
+    current = get_prompt_version("lt")
+
+    with ResultCache(tmp_path / "cache.sqlite3", max_entries=10) as cache:
+        cache.put("old", "outdated", CategoryOutput(category="1", comment=""))
+        cache.put("new", current, CategoryOutput(category="2", comment=""))
+
+        assert cache.purge_stale([current]) == 1
+        assert cache.get("old") is None
+        assert cache.get("new") is not None
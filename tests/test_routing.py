@@ -0,0 +1,76 @@
+"""Tests for language-partitioned work routing and pipeline flow control."""
+
+import asyncio
+
+import pytest
+from src.routing import LanguageRouter, PendingBudget
+
+
+@pytest.mark.asyncio
+async def test_shares_follow_routed_rows() -> None:
+    """Test that workers are split between languages by their share of the rows."""
+    router: LanguageRouter[int] = LanguageRouter(worker_count=4)
+    for index in range(6):
+        router.put("lt", index)
+    for index in range(6, 8):
+        router.put("lv", index)
+
+    assert router.share("lt") == 3
+    assert router.share("lv") == 1
+    assert router.share("pl") == 1
+
+    taken = [await router.get() for _ in range(4)]
+
+    assert [item[0] for item in taken if item] == ["lt", "lv", "lt", "lt"]
+    assert router.in_flight == {"lt": 3, "lv": 1}
+
+
+@pytest.mark.asyncio
+async def test_idle_share_goes_to_other_languages() -> None:
+    """Test that a language with nothing queued does not leave workers idle."""
+    router: LanguageRouter[int] = LanguageRouter(worker_count=4)
+    router.put("lt", 0)
+    router.put("lt", 1)
+    router.put("lt", 2)
+    router.put("pl", 3)
+
+    assert await router.get() == ("lt", 0)
+    assert await router.get() == ("pl", 3)
+    router.task_done("pl")
+    assert await router.get() == ("lt", 1)
+    assert await router.get() == ("lt", 2)
+
+
+@pytest.mark.asyncio
+async def test_close_releases_every_worker() -> None:
+    """Test that queued items are drained before each worker receives None."""
+    router: LanguageRouter[int] = LanguageRouter(worker_count=3)
+    router.put("lv", 0)
+    router.close()
+
+    results = await asyncio.gather(*(router.get() for _ in range(4)))
+
+    assert sorted(results, key=str) == [("lv", 0), None, None, None]
+    with pytest.raises(RuntimeError):
+        router.put("lv", 1)
+
+
+@pytest.mark.asyncio
+async def test_pending_budget_caps_rows_and_bytes() -> None:
+    """Test that rows wait for room by count and size, and oversized rows still pass alone."""
+    budget = PendingBudget(max_rows=3, max_bytes=100)
+    await budget.acquire(60)
+    await budget.acquire(40)
+
+    blocked = asyncio.create_task(budget.acquire(10))
+    await asyncio.sleep(0)
+    assert not blocked.done()
+
+    budget.release(40)
+    await asyncio.wait_for(blocked, timeout=1)
+    assert (budget.rows, budget.bytes) == (2, 70)
+
+    budget.release(60)
+    budget.release(10)
+    await asyncio.wait_for(budget.acquire(500), timeout=1)
+    assert budget.peak_bytes == 500
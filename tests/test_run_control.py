@@ -0,0 +1,60 @@
+"""Tests for the pause/cancel run control."""
+
+import asyncio
+import threading
+
+import pytest
+from src.run_control import RunControl
+
+
+@pytest.mark.asyncio
+async def test_pause_and_resume_from_thread() -> None:
+    """Test that pause blocks waiters until resume is called from another thread."""
+    control = RunControl()
+    control.bind()
+    control.pause()
+    await asyncio.sleep(0)
+
+    waiter = asyncio.create_task(control.wait_resumed())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    thread = threading.Thread(target=control.resume)
+    thread.start()
+    thread.join()
+    await asyncio.wait_for(waiter, 1)
+    assert not control.paused
+
+
+@pytest.mark.asyncio
+async def test_cancel_runs_callbacks_once() -> None:
+    """Test that cancel callbacks run once in the loop and cancel releases paused waiters."""
+    control = RunControl()
+    control.pause()
+    control.bind()
+    calls: list[str] = []
+    control.add_cancel_callback(lambda: calls.append("first"))
+
+    waiter = asyncio.create_task(control.wait_resumed())
+    await asyncio.to_thread(control.cancel)
+    control.cancel()
+    await asyncio.wait_for(waiter, 1)
+    await asyncio.sleep(0)
+
+    assert calls == ["first"]
+    assert control.cancelled
+    control.add_cancel_callback(lambda: calls.append("late"))
+    assert calls == ["first", "late"]
+
+
+def test_signals_before_bind() -> None:
+    """Test that signals sent before the run starts are applied on bind."""
+    control = RunControl()
+    control.cancel()
+
+    async def run() -> bool:
+        control.bind()
+        await asyncio.wait_for(control.wait_resumed(), 1)
+        return control.cancelled
+
+    assert asyncio.run(run())